@@ -20,4 +20,9 @@ __all__ = [
     "process_repository",
     "get_documentation",
     "list_generated_docs",
+    "JobManager",
+    "submit_job",
+    "get_job",
+    "cancel_job",
+    "list_jobs",
 ]
@@ -2,12 +2,22 @@
 API module - Main entry point for the system
 """
 
-from typing import Tuple, Optional, List
+from typing import Dict, Tuple, Optional, List
+from .jobs import DEFAULT_WORKERS, JobCancelled, JobManager
+from .metrics import MetricsRegistry
+from .profiling import ProfileConfig
+from .singleflight import SingleFlight, flight_key
 from .supervisor import CodeGeniusSupervisor
 
 # Global supervisor instance
 _supervisor: Optional[CodeGeniusSupervisor] = None
 
+# Global job manager, created on first submit
+_job_manager: Optional[JobManager] = None
+
+# Concurrent process_repository calls for one repository share a single run
+_flights = SingleFlight()
+
 
 def create_supervisor(output_dir: str = "./docs") -> CodeGeniusSupervisor:
     """Create a new supervisor instance"""
@@ -16,13 +26,29 @@ def create_supervisor(output_dir: str = "./docs") -> CodeGeniusSupervisor:
     return _supervisor
 
 
-def process_repository(repo_url: str, output_dir: str = "./docs") -> Tuple[bool, str, Optional[str]]:
-    """Process a repository and generate documentation"""
+def process_repository(repo_url: str, output_dir: str = "./docs",
+                       timeout: Optional[float] = None) -> Tuple[bool, str, Optional[str]]:
+    """Process a repository and generate documentation.
+
+    Calls made while the same repository is already being processed wait
+    for that run and return its result. A caller that gives up after
+    timeout seconds leaves the run going for the others.
+    """
     global _supervisor
     if not _supervisor:
         _supervisor = create_supervisor(output_dir)
-    
-    return _supervisor.process_repository(repo_url)
+    supervisor = _supervisor
+
+    def process(cancelled):
+        def on_stage(stage: str) -> None:
+            if cancelled.is_set():
+                raise JobCancelled(repo_url)
+        return supervisor.process_repository(repo_url, on_stage)
+
+    try:
+        return _flights.do(flight_key(repo_url), process, timeout)
+    except TimeoutError:
+        return False, f"Timed out after {timeout} seconds processing {repo_url}", None
 
 
 def get_documentation() -> Optional[str]:
@@ -39,3 +65,44 @@ def list_generated_docs(output_dir: str = "./docs") -> List[str]:
     if not _supervisor:
         _supervisor = create_supervisor(output_dir)
     return _supervisor.list_generated_docs()
+
+
+def create_job_manager(workers: int = DEFAULT_WORKERS, output_dir: str = "./docs",
+                       db_path: Optional[str] = None,
+                       metrics: Optional[MetricsRegistry] = None,
+                       profiling: Optional[ProfileConfig] = None) -> JobManager:
+    """Create a new job manager, replacing any existing one"""
+    global _job_manager
+    if _job_manager:
+        _job_manager.shutdown()
+    _job_manager = JobManager(workers, db_path, output_dir, metrics=metrics, profiling=profiling)
+    return _job_manager
+
+
+def submit_job(repo_url: str, output_dir: str = "./docs", profile: Optional[bool] = None) -> str:
+    """Queue a repository for background processing and return the job ID"""
+    global _job_manager
+    if not _job_manager:
+        _job_manager = create_job_manager(output_dir=output_dir)
+    return _job_manager.submit(repo_url, profile)
+
+
+def get_job(job_id: str) -> Optional[Dict]:
+    """Get the status, stage progress and result of a job"""
+    if not _job_manager:
+        return None
+    return _job_manager.get_job(job_id)
+
+
+def cancel_job(job_id: str) -> bool:
+    """Cancel a queued or running job"""
+    if not _job_manager:
+        return False
+    return _job_manager.cancel(job_id)
+
+
+def list_jobs() -> List[Dict]:
+    """List all known jobs, oldest first"""
+    if not _job_manager:
+        return []
+    return _job_manager.list_jobs()
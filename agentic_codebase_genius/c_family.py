@@ -0,0 +1,563 @@
+"""
+C Family - Streaming tokenizer-based extraction for brace-delimited languages
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Pattern, Tuple
+from .utils import CodeEntity, FileAnalysis, LanguageType, LineIndex
+
+# Longer headers are cut so one generated declaration cannot bloat the cache
+MAX_SIGNATURE_LENGTH = 200
+
+# Scopes whose functions are methods rather than free functions
+CLASS_TYPES = frozenset({'class', 'interface', 'struct', 'union', 'enum', 'trait', 'impl'})
+FUNCTION_TYPES = frozenset({'function', 'method'})
+
+# Words that look like 'name(' but never start a declaration
+CONTROL_WORDS = frozenset({
+    'if', 'for', 'while', 'switch', 'catch', 'return', 'sizeof', 'new', 'delete', 'throw',
+    'typeof', 'await', 'yield', 'do', 'else', 'case', 'try', 'synchronized', 'assert',
+    'decltype', 'alignof', 'static_assert', 'defined', 'super', 'this', 'function',
+})
+
+_DOC = r'(?P<doc>/\*\*(?!/)[\s\S]*?(?:\*/|\Z)|///[^\n]*)'
+_COMMENTS = r'//[^\n]*|/\*[\s\S]*?(?:\*/|\Z)'
+_DOUBLE_QUOTED = r'"(?:\\.|[^"\\\n])*"'
+_CHAR = r"'(?:\\[^'\n]*|[^'\\\n])'"
+_NUMBER = r'\.?\d[\w.]*'
+_PUNCT = r'(?P<p>===|!==|=>|==|!=|<=|>=|::|->|[{}()\[\];=<>,:~@*.])'
+
+
+def _token_pattern(strings: str, identifier: str = r'[A-Za-z_]\w*', directives: str = '') -> Pattern:
+    """Build a scanner: docs, skipped text, identifiers, then punctuation"""
+    return re.compile(
+        f"{_DOC}|(?P<skip>{directives}{_COMMENTS}|{strings}|{_NUMBER})"
+        f"|(?P<id>{identifier})|{_PUNCT}"
+    )
+
+
+def _body_pattern(strings: str, directives: str = '') -> Pattern:
+    """Build a scanner that only sees braces outside comments and literals"""
+    return re.compile(f"(?P<skip>{directives}{_COMMENTS}|{strings})|(?P<p>[{{}}])")
+
+
+@dataclass(frozen=True)
+class CFamilySyntax:
+    """What the shared parser needs to know about one language"""
+    language: LanguageType
+    tokens: Pattern
+    # keyword -> entity type for named types, e.g. {'class': 'class'}
+    type_keywords: Dict[str, str] = field(default_factory=dict)
+    function_keywords: FrozenSet[str] = frozenset()
+    modifier_words: FrozenSet[str] = frozenset()
+    # Scopes where 'name(' starts a method or function declaration
+    call_style_scopes: FrozenSet[str] = frozenset()
+    # Scopes where a declaration ended by ';' (no body) is still recorded
+    bodyless_scopes: FrozenSet[str] = frozenset()
+    # Scopes where 'name(' declarations end at the line break (Go interfaces)
+    line_scopes: FrozenSet[str] = frozenset()
+    bodyless_types: FrozenSet[str] = frozenset()
+    arrow_functions: bool = False
+    access_labels: bool = False
+    go_declarations: bool = False
+    rust_impls: bool = False
+    # When set, function bodies are matched with this brace-only scanner
+    # instead of being tokenized, so declarations inside them are not seen
+    body_tokens: Optional[Pattern] = None
+
+
+def _clean_doc(text: str) -> str:
+    """Strip comment markers from a /** */ or /// doc comment"""
+    if text.startswith('///'):
+        return text[3:].strip()
+    lines = [line.strip().lstrip('*').strip() for line in text[3:-2].split('\n')]
+    return '\n'.join(line for line in lines if line)
+
+
+class _Candidate:
+    """A declaration seen by the parser but not yet confirmed by '{' or ';'"""
+
+    __slots__ = ('name', 'entity_type', 'start', 'name_offset', 'needs_body', 'paren',
+                 'modifiers', 'qualified', 'parent', 'child_prefix')
+
+    def __init__(self, name: str, entity_type: str, start: int, name_offset: int,
+                 needs_body: bool, paren: int, modifiers: List[str]):
+        self.name = name
+        self.entity_type = entity_type
+        self.start = start
+        self.name_offset = name_offset
+        self.needs_body = needs_body
+        self.paren = paren
+        self.modifiers = modifiers
+        self.qualified: Optional[str] = None
+        self.parent: Optional[str] = None
+        self.child_prefix: Optional[str] = None
+
+
+class CFamilyParser:
+    """Single-pass declaration finder over a token stream.
+
+    Tracks braces and parentheses instead of building a syntax tree: a
+    declaration is recognized from its keyword (class, fn, func, ...) or,
+    inside class-like bodies, from a 'name(' pattern, and becomes an entity
+    once its body opens (or, where allowed, when ';' ends it).
+    """
+
+    def __init__(self, syntax: CFamilySyntax, content: str, file_path: str,
+                 analysis: FileAnalysis):
+        self.syntax = syntax
+        self.content = content
+        self.file_path = file_path
+        self.entities = analysis.entities
+        self.lines = LineIndex(content)
+        # (scope type, member prefix, entity or None, saved paren depth, parent qualified name)
+        self.scopes: List[tuple] = []
+        self.paren = 0
+        self.pending: Optional[_Candidate] = None
+        self.skip_body = False
+        self.seen: Dict[str, int] = {}
+        self.doc: Optional[str] = None
+        # Sub-state for multi-token declaration headers
+        self.expect: Optional[str] = None
+        self.expect_data: dict = {}
+        self._reset_statement()
+        # The last two tokens, most recent first
+        self.prev = self.prev2 = ('', '', 0)
+
+    def _reset_statement(self) -> None:
+        self.stmt_start = -1
+        self.run_start = -1
+        self.assign_name: Optional[Tuple[str, int]] = None
+        self.modifiers: List[str] = []
+        # Identifiers before each open '<', and the owner named before the last '::'
+        self.angles: List[str] = []
+        self.closed_angle = ''
+        self.owner = ''
+
+    def _scope_type(self) -> str:
+        return self.scopes[-1][0] if self.scopes else 'file'
+
+    def _prefix(self) -> str:
+        return self.scopes[-1][1] if self.scopes else ''
+
+    def _parent(self) -> Optional[str]:
+        return self.scopes[-1][4] if self.scopes else None
+
+    def _function_type(self) -> str:
+        return 'method' if self._scope_type() in CLASS_TYPES else 'function'
+
+    def parse(self) -> None:
+        """Scan the source and record entities"""
+        position: Optional[int] = 0
+        while position is not None:
+            position = self._scan(position)
+        last_line = len(self.lines)
+        for scope in self.scopes:
+            if scope[2] is not None:
+                scope[2].end_line = last_line
+
+    def _scan(self, position: int) -> Optional[int]:
+        """Tokenize from position; return where to resume after a skipped body"""
+        for match in self.syntax.tokens.finditer(self.content, position):
+            kind = match.lastgroup
+            if kind == 'skip':
+                continue
+            text, offset = match.group(), match.start()
+            if kind == 'doc':
+                if self.stmt_start < 0:
+                    self.doc = _clean_doc(text)
+                continue
+            if self.stmt_start < 0:
+                self.stmt_start = offset
+            if self.expect is None or not self._continue_header(kind, text, offset):
+                self._token(kind, text, offset)
+            self.prev2, self.prev = self.prev, (kind, text, offset)
+            if self.skip_body:
+                self.skip_body = False
+                return self._skip_body(match.end())
+        return None
+
+    def _skip_body(self, position: int) -> Optional[int]:
+        """Find the brace closing the body opened before position"""
+        depth = 1
+        for match in self.syntax.body_tokens.finditer(self.content, position):
+            if match.lastgroup == 'skip':
+                continue
+            if match.group() == '{':
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 0:
+                offset = match.start()
+                self._close_brace(offset)
+                self.prev = ('p', '}', offset)
+                return match.end()
+        return None
+
+    def _token(self, kind: str, text: str, offset: int) -> None:
+        syntax = self.syntax
+        if kind == 'id':
+            if self.prev[1] in ('.', '::', '->') and text not in ('class', 'struct', 'enum'):
+                self.run_start = -1
+                return
+            if text in syntax.modifier_words:
+                self.modifiers.append(text)
+                if self.run_start < 0:
+                    self.run_start = offset
+                return
+            start = self.run_start if self.run_start >= 0 else offset
+            self.run_start = -1
+            if text in syntax.type_keywords and self.prev[1] != '.':
+                self._expect('type_name', start=start, entity_type=syntax.type_keywords[text])
+            elif text in syntax.function_keywords:
+                self._expect('function_name', start=start)
+            elif syntax.go_declarations and text == 'type':
+                self._expect('go_type_name', start=start)
+            elif syntax.rust_impls and text == 'impl':
+                self._expect('impl', start=start, angle=0, paren=0, first=None,
+                             target=None, saw_for=False, done=False)
+            return
+
+        self.run_start = -1
+        if text == '(':
+            self._maybe_call_style(offset)
+            self.paren += 1
+        elif text == '[':
+            self.paren += 1
+        elif text in (')', ']'):
+            if self.paren > 0:
+                self.paren -= 1
+        elif text == '{':
+            self._open_brace(offset)
+        elif text == '}':
+            self._close_brace(offset)
+        elif text == ';':
+            if self.pending is not None and self.paren == self.pending.paren:
+                if not self.pending.needs_body:
+                    self._confirm(self.pending, offset, has_body=False)
+                self.pending = None
+            if self.paren == 0:
+                self._reset_statement()
+                self.doc = None
+        elif text == '=':
+            if self.paren == 0 and self.assign_name is None and self.prev[0] == 'id':
+                self.assign_name = (self.prev[1], self.prev[2])
+        elif text == '=>':
+            if (syntax.arrow_functions and self.assign_name and self.paren == 0
+                    and self.pending is None):
+                name, name_offset = self.assign_name
+                self.pending = _Candidate(name, self._function_type(), self.stmt_start,
+                                          name_offset, False, self.paren, self.modifiers[:])
+        elif text == '<':
+            self.angles.append(self.prev[1] if self.prev[0] == 'id' else '')
+        elif text == '>':
+            if self.angles:
+                self.closed_angle = self.angles.pop()
+        elif text == '::':
+            self.owner = self.closed_angle if self.prev[1] == '>' else self.prev[1]
+        elif text == ':':
+            if syntax.access_labels and self.prev[1] in ('public', 'private', 'protected'):
+                self._reset_statement()
+
+    def _maybe_call_style(self, offset: int) -> None:
+        """Treat 'name(' as a declaration inside the scopes that allow it"""
+        scope_type = self._scope_type()
+        syntax = self.syntax
+        if (self.pending is not None or self.paren != 0 or self.assign_name is not None
+                or scope_type not in syntax.call_style_scopes):
+            return
+        kind, name, name_offset = self.prev
+        if kind != 'id' or name in CONTROL_WORDS or name in syntax.modifier_words:
+            return
+        before = self.prev2[1]
+        if before in ('.', '->', '@', 'new', '='):
+            return
+        candidate = _Candidate(name, self._function_type(), self.stmt_start, name_offset,
+                               scope_type not in syntax.bodyless_scopes, self.paren,
+                               self.modifiers[:])
+        if before == '~':
+            candidate.name = '~' + name
+        elif before == '::' and self.owner:
+            # Out-of-class definition, e.g. 'void Widget<T>::draw() {'
+            owner = f"{self._prefix()}{self.owner}"
+            candidate.entity_type = 'method'
+            candidate.parent = owner
+            candidate.qualified = f"{owner}.{name}"
+        if scope_type in syntax.line_scopes:
+            candidate.start = self.content.rfind('\n', 0, name_offset) + 1
+            end = self.content.find('\n', offset)
+            self._confirm(candidate, end if end >= 0 else len(self.content), has_body=False)
+            return
+        self.pending = candidate
+
+    def _expect(self, state: str, **data) -> None:
+        self.expect = state
+        self.expect_data = data
+
+    def _continue_header(self, kind: str, text: str, offset: int) -> bool:
+        """Advance a multi-token declaration header; False to process the token normally"""
+        state, data = self.expect, self.expect_data
+        if state == 'type_name':
+            if kind == 'id' and text in ('class', 'struct'):
+                return True  # C++ 'enum class Name'
+            self.expect = None
+            if kind != 'id':
+                return False
+            self._expect('after_type_name', candidate=_Candidate(
+                text, data['entity_type'], data['start'], offset,
+                data['entity_type'] not in self.syntax.bodyless_types, self.paren,
+                self.modifiers[:]))
+            return True
+        if state == 'after_type_name':
+            self.expect = None
+            # 'template <class T>' and friends name a parameter, not a type
+            if text not in ('>', ',', '=', ')'):
+                self.pending = data['candidate']
+            return False
+        if state == 'function_name':
+            if text == '*':
+                return True  # JS generator functions
+            self.expect = None
+            if kind == 'id':
+                self.pending = _Candidate(text, self._function_type(), data['start'], offset,
+                                          False, self.paren, self.modifiers[:])
+                return True
+            if text == '(' and self.syntax.go_declarations:
+                self._expect('go_receiver', start=data['start'], depth=1, names=[])
+                return False
+            if text == '(' and self.assign_name:
+                # 'const handler = function (...) {' takes the assigned name
+                name, name_offset = self.assign_name
+                self.pending = _Candidate(name, self._function_type(), self.stmt_start,
+                                          name_offset, False, self.paren, self.modifiers[:])
+            return False
+        if state == 'go_receiver':
+            if text == '(':
+                data['depth'] += 1
+            elif text == ')':
+                data['depth'] -= 1
+                if data['depth'] == 0:
+                    self._token(kind, text, offset)
+                    self._expect('go_method_name', start=data['start'], names=data['names'])
+                    return True
+            elif kind == 'id':
+                data['names'].append(text)
+            return False
+        if state == 'go_method_name':
+            self.expect = None
+            names = data['names']
+            if kind != 'id' or not names:
+                return False
+            receiver = names[1] if len(names) > 1 else names[0]
+            candidate = _Candidate(text, 'method', data['start'], offset, False, self.paren,
+                                   self.modifiers[:])
+            candidate.parent = receiver
+            candidate.qualified = f"{receiver}.{text}"
+            self.pending = candidate
+            return True
+        if state == 'go_type_name':
+            self.expect = None
+            if kind == 'id':
+                self._expect('go_type_kind', start=data['start'], name=text, name_offset=offset,
+                             depth=0)
+                return True
+            return False
+        if state == 'go_type_kind':
+            if text == '[':
+                data['depth'] += 1
+                return True
+            if text == ']':
+                data['depth'] -= 1
+                return True
+            if data['depth'] > 0:
+                return True
+            self.expect = None
+            if text in ('struct', 'interface'):
+                self.pending = _Candidate(data['name'], text, data['start'], data['name_offset'],
+                                          True, self.paren, [])
+                return True
+            return False
+        if state == 'impl':
+            return self._continue_impl(kind, text, offset, data)
+        self.expect = None
+        return False
+
+    def _continue_impl(self, kind: str, text: str, offset: int, data: dict) -> bool:
+        """Collect a Rust 'impl<T> Trait for Type<T> where ...' header"""
+        if text in ('{', ';') and data['angle'] == 0 and data['paren'] == 0:
+            self.expect = None
+            target = data['target'] or data['first']
+            if text == '{' and target:
+                trait = data['first'] if data['saw_for'] else None
+                candidate = _Candidate(target, 'impl', data['start'], data['offset'], True,
+                                       self.paren, self.modifiers[:])
+                candidate.qualified = f"impl {trait} for {target}" if trait else f"impl {target}"
+                candidate.child_prefix = f"{self._prefix()}{target}."
+                self.pending = candidate
+            return False
+        if text == '<':
+            data['angle'] += 1
+        elif text == '>':
+            data['angle'] = max(data['angle'] - 1, 0)
+        elif text in ('(', '['):
+            data['paren'] += 1
+        elif text in (')', ']'):
+            data['paren'] = max(data['paren'] - 1, 0)
+        elif kind == 'id' and data['angle'] == 0 and data['paren'] == 0 and not data['done']:
+            if text == 'for':
+                data['saw_for'] = True
+            elif text == 'where':
+                data['done'] = True
+            elif text not in ('dyn', 'mut', 'unsafe', 'const'):
+                if data['saw_for']:
+                    data['target'] = text
+                else:
+                    data['first'] = text
+                data['offset'] = offset
+        return True
+
+    def _open_brace(self, offset: int) -> None:
+        pending = self.pending
+        if pending is not None and self.paren == pending.paren:
+            self.pending = None
+            entity, qualified = self._confirm(pending, offset, has_body=True)
+            if pending.child_prefix is not None:
+                prefix = pending.child_prefix
+            elif pending.entity_type in FUNCTION_TYPES:
+                prefix = f"{qualified}.<locals>."
+            else:
+                prefix = f"{qualified}."
+            self.scopes.append((pending.entity_type, prefix, entity, self.paren, qualified))
+            self.skip_body = (pending.entity_type in FUNCTION_TYPES
+                              and self.syntax.body_tokens is not None)
+        else:
+            self.scopes.append(('block', self._prefix(), None, self.paren, self._parent()))
+        self.paren = 0
+        self._reset_statement()
+        self.doc = None
+
+    def _close_brace(self, offset: int) -> None:
+        if self.scopes:
+            scope = self.scopes.pop()
+            if scope[2] is not None:
+                scope[2].end_line = self.lines.line_of(offset)
+            self.paren = scope[3]
+        self.pending = None
+        self.expect = None
+        self._reset_statement()
+        self.doc = None
+
+    def _confirm(self, candidate: _Candidate, end: int, has_body: bool) -> Tuple[CodeEntity, str]:
+        """Record a candidate as an entity and return it with its qualified name"""
+        qualified = candidate.qualified or f"{self._prefix()}{candidate.name}"
+        count = self.seen.get(qualified, 0) + 1
+        self.seen[qualified] = count
+        if count > 1:
+            qualified = f"{qualified}#{count}"
+        signature = ' '.join(self.content[candidate.start:end].split())
+        line = self.lines.line_of(candidate.name_offset)
+        entity = CodeEntity(
+            name=candidate.name,
+            entity_type=candidate.entity_type,
+            file_path=self.file_path,
+            line_number=line,
+            end_line=line,
+            language=self.syntax.language,
+            docstring=self.doc or "",
+            signature=signature[:MAX_SIGNATURE_LENGTH],
+            modifiers=tuple(candidate.modifiers),
+            parent_entity=candidate.parent or self._parent(),
+            qualified_name=qualified,
+        )
+        self.entities.append(entity)
+        self.doc = None
+        return entity, qualified
+
+
+def extract_c_family(syntax: CFamilySyntax, content: str, file_path: str,
+                     analysis: FileAnalysis) -> None:
+    """Extract declarations from brace-language source into analysis"""
+    CFamilyParser(syntax, content, file_path, analysis).parse()
+
+
+_JS_STRINGS = rf"{_DOUBLE_QUOTED}|'(?:\\.|[^'\\\n])*'|`(?:\\[\s\S]|[^`\\])*`"
+_JS_MODIFIERS = frozenset({'export', 'default', 'async', 'static', 'get', 'set'})
+
+JAVASCRIPT = CFamilySyntax(
+    language=LanguageType.JAVASCRIPT,
+    tokens=_token_pattern(_JS_STRINGS, identifier=r'[A-Za-z_$][\w$]*'),
+    type_keywords={'class': 'class'},
+    function_keywords=frozenset({'function'}),
+    modifier_words=_JS_MODIFIERS,
+    call_style_scopes=frozenset({'class'}),
+    arrow_functions=True,
+)
+
+TYPESCRIPT = CFamilySyntax(
+    language=LanguageType.TYPESCRIPT,
+    tokens=_token_pattern(_JS_STRINGS, identifier=r'[A-Za-z_$][\w$]*'),
+    type_keywords={'class': 'class', 'interface': 'interface', 'enum': 'enum',
+                   'namespace': 'namespace'},
+    function_keywords=frozenset({'function'}),
+    modifier_words=_JS_MODIFIERS | {'public', 'private', 'protected', 'abstract', 'readonly',
+                                    'declare', 'override'},
+    call_style_scopes=frozenset({'class', 'interface'}),
+    bodyless_scopes=frozenset({'class', 'interface'}),
+    arrow_functions=True,
+)
+
+_JAVA_STRINGS = rf'"""[\s\S]*?"""|{_DOUBLE_QUOTED}|{_CHAR}'
+_GO_STRINGS = rf'{_DOUBLE_QUOTED}|`[^`]*`|{_CHAR}'
+_RUST_STRINGS = rf'r(?P<hashes>#*)"[\s\S]*?"(?P=hashes)|{_DOUBLE_QUOTED}|{_CHAR}'
+_CPP_STRINGS = rf'R"(?P<delim>[^(\s"\\]*)\([\s\S]*?\)(?P=delim)"|{_DOUBLE_QUOTED}|{_CHAR}'
+# Preprocessor lines, including backslash continuations
+_CPP_DIRECTIVES = r'(?m:^[ \t]*#(?:\\\r?\n|[^\n])*)|'
+
+JAVA = CFamilySyntax(
+    language=LanguageType.JAVA,
+    tokens=_token_pattern(_JAVA_STRINGS),
+    body_tokens=_body_pattern(_JAVA_STRINGS),
+    type_keywords={'class': 'class', 'interface': 'interface', 'enum': 'enum',
+                   'record': 'class'},
+    modifier_words=frozenset({'public', 'private', 'protected', 'static', 'final', 'abstract',
+                              'synchronized', 'native', 'default', 'sealed', 'strictfp'}),
+    call_style_scopes=frozenset({'class', 'interface', 'enum'}),
+    bodyless_scopes=frozenset({'class', 'interface'}),
+)
+
+GO = CFamilySyntax(
+    language=LanguageType.GO,
+    tokens=_token_pattern(_GO_STRINGS),
+    body_tokens=_body_pattern(_GO_STRINGS),
+    function_keywords=frozenset({'func'}),
+    call_style_scopes=frozenset({'interface'}),
+    line_scopes=frozenset({'interface'}),
+    go_declarations=True,
+)
+
+RUST = CFamilySyntax(
+    language=LanguageType.RUST,
+    tokens=_token_pattern(_RUST_STRINGS),
+    body_tokens=_body_pattern(_RUST_STRINGS),
+    type_keywords={'struct': 'struct', 'enum': 'enum', 'trait': 'trait', 'union': 'union',
+                   'mod': 'module'},
+    function_keywords=frozenset({'fn'}),
+    modifier_words=frozenset({'pub', 'async', 'unsafe', 'const', 'extern', 'default'}),
+    bodyless_scopes=frozenset({'trait'}),
+    bodyless_types=frozenset({'struct'}),
+    rust_impls=True,
+)
+
+CPP = CFamilySyntax(
+    language=LanguageType.CPP,
+    tokens=_token_pattern(_CPP_STRINGS, directives=_CPP_DIRECTIVES),
+    body_tokens=_body_pattern(_CPP_STRINGS, directives=_CPP_DIRECTIVES),
+    type_keywords={'class': 'class', 'struct': 'struct', 'union': 'union', 'enum': 'enum',
+                   'namespace': 'namespace'},
+    modifier_words=frozenset({'static', 'virtual', 'inline', 'explicit', 'constexpr',
+                              'extern', 'friend', 'public', 'private', 'protected'}),
+    call_style_scopes=frozenset({'file', 'namespace', 'class', 'struct', 'union'}),
+    bodyless_scopes=frozenset({'class', 'struct', 'union'}),
+    access_labels=True,
+)
@@ -0,0 +1,302 @@
+"""
+Call Graph - Resolves call sites to entities and stores edges in CSR arrays
+"""
+
+import re
+from array import array
+from typing import Dict, Iterator, List, Optional
+from .import_graph import ModuleIndex
+from .utils import CallSite, CodeEntity, CodeRelationship, ImportRecord
+
+# Re-exports and inherited methods are followed at most this many hops
+MAX_RESOLVE_DEPTH = 8
+
+_DUPLICATE_SUFFIX = re.compile(r'#\d+')
+_BASE_NAME = re.compile(r'[A-Za-z_][\w.]*')
+
+_FUNCTION_TYPES = ('function', 'method')
+
+
+def _plain(qualified_name: str) -> str:
+    """Drop '#n' duplicate markers so a name refers to its latest definition"""
+    return _DUPLICATE_SUFFIX.sub('', qualified_name) if '#' in qualified_name else qualified_name
+
+
+def _class_bases(signature: str) -> List[str]:
+    """Dotted base class names from a 'class Name(A, b.B, metaclass=M)' signature"""
+    if '(' not in signature:
+        return []
+    bases = []
+    for part in signature[signature.index('(') + 1:signature.rindex(')')].split(','):
+        part = part.strip()
+        match = _BASE_NAME.match(part)
+        if match and '=' not in part:
+            bases.append(match.group(0))
+    return bases
+
+
+class CallGraph:
+    """Entity call graph stored as compressed sparse rows.
+
+    Node i is keys[i]; its callees are targets[offsets[i]:offsets[i + 1]],
+    with the line of the first such call in the matching slot of lines.
+    """
+
+    def __init__(self, keys: List[str], offsets: array, targets: array, lines: array):
+        self.keys = keys
+        self.offsets = offsets
+        self.targets = targets
+        self.lines = lines
+        self._index: Optional[Dict[str, int]] = None
+        self._reverse: Optional[tuple] = None
+
+    @property
+    def node_count(self) -> int:
+        return len(self.keys)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def index_of(self, key: str) -> Optional[int]:
+        """Get the node number of an entity key ('file::qualified_name')"""
+        if self._index is None:
+            self._index = {key: i for i, key in enumerate(self.keys)}
+        return self._index.get(key)
+
+    def callees(self, key: str) -> List[str]:
+        """Get the entities called by an entity"""
+        node = self.index_of(key)
+        if node is None:
+            return []
+        keys = self.keys
+        return [keys[t] for t in self.targets[self.offsets[node]:self.offsets[node + 1]]]
+
+    def callers(self, key: str) -> List[str]:
+        """Get the entities that call an entity"""
+        node = self.index_of(key)
+        if node is None:
+            return []
+        if self._reverse is None:
+            self._reverse = self._build_reverse()
+        offsets, sources = self._reverse
+        keys = self.keys
+        return [keys[s] for s in sources[offsets[node]:offsets[node + 1]]]
+
+    def _build_reverse(self) -> tuple:
+        """Build the transposed CSR arrays for caller lookups"""
+        count = len(self.keys)
+        offsets = array('I', [0]) * (count + 1)
+        for target in self.targets:
+            offsets[target + 1] += 1
+        for node in range(count):
+            offsets[node + 1] += offsets[node]
+        sources = array('I', [0]) * len(self.targets)
+        fill = array('I', offsets[:count])
+        for node in range(count):
+            for target in self.targets[self.offsets[node]:self.offsets[node + 1]]:
+                sources[fill[target]] = node
+                fill[target] += 1
+        return offsets, sources
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        """Convert to {caller key: [callee keys]} for entities that make calls"""
+        keys, offsets, targets = self.keys, self.offsets, self.targets
+        return {
+            keys[node]: [keys[t] for t in targets[offsets[node]:offsets[node + 1]]]
+            for node in range(len(keys)) if offsets[node] != offsets[node + 1]
+        }
+
+    def relationships(self) -> Iterator[CodeRelationship]:
+        """Yield a 'calls' CodeRelationship per edge"""
+        keys, offsets, targets, lines = self.keys, self.offsets, self.targets, self.lines
+        for node in range(len(keys)):
+            source_file, _, source_entity = keys[node].rpartition('::')
+            for edge in range(offsets[node], offsets[node + 1]):
+                target_file, _, target_entity = keys[targets[edge]].rpartition('::')
+                yield CodeRelationship(
+                    source_entity=source_entity,
+                    target_entity=target_entity,
+                    relationship_type='calls',
+                    source_file=source_file,
+                    target_file=target_file,
+                    line_number=lines[edge],
+                )
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the edge arrays (excluding the key list)"""
+        return sum(a.itemsize * len(a) for a in (self.offsets, self.targets, self.lines))
+
+    @classmethod
+    def build(cls, entities: Dict[str, CodeEntity], imports: Dict[str, List[ImportRecord]],
+              call_sites: Dict[str, List[CallSite]]) -> 'CallGraph':
+        """Resolve every call site and build the graph"""
+        resolver = _CallResolver(entities, imports)
+        ids = resolver.ids
+        edges: Dict[int, int] = {}
+        for file_path, calls in call_sites.items():
+            for call in calls:
+                if not call.caller:
+                    continue
+                source = ids.get(f"{file_path}::{call.caller}")
+                if source is None:
+                    continue
+                target = resolver.resolve(file_path, source, call.callee)
+                if target is not None:
+                    edges.setdefault((source << 32) | target, call.line_number)
+
+        count = len(resolver.keys)
+        offsets = array('I', [0]) * (count + 1)
+        targets = array('I')
+        lines = array('I')
+        for code in sorted(edges):
+            offsets[(code >> 32) + 1] += 1
+            targets.append(code & 0xFFFFFFFF)
+            lines.append(edges[code])
+        for node in range(count):
+            offsets[node + 1] += offsets[node]
+        return cls(resolver.keys, offsets, targets, lines)
+
+
+class _CallResolver:
+    """Maps call expressions to entity node numbers.
+
+    Resolution tries, in order: 'self.'/'cls.' methods of the enclosing
+    class and its bases, definitions visible from the calling scope, and
+    names bound by imports (through module aliases and re-exports).
+    """
+
+    def __init__(self, entities: Dict[str, CodeEntity], imports: Dict[str, List[ImportRecord]]):
+        self.keys: List[str] = []
+        self.entities: List[CodeEntity] = []
+        self.ids: Dict[str, int] = {}
+        # file -> plain qualified name -> node of its latest definition
+        self.scopes: Dict[str, Dict[str, int]] = {}
+        for key, entity in entities.items():
+            self.ids[key] = len(self.keys)
+            self.scopes.setdefault(entity.file_path, {})[
+                _plain(entity.qualified_name or entity.name)] = len(self.keys)
+            self.keys.append(key)
+            self.entities.append(entity)
+
+        self.bindings: Dict[str, Dict[str, ImportRecord]] = {}
+        self.star_imports: Dict[str, List[ImportRecord]] = {}
+        for file_path, records in imports.items():
+            for record in records:
+                if record.name == '*':
+                    self.star_imports.setdefault(file_path, []).append(record)
+                else:
+                    self.bindings.setdefault(file_path, {})[record.alias] = record
+
+        self.module_index = ModuleIndex(set(imports) | set(self.scopes))
+
+    def resolve(self, file_path: str, caller: int, callee: str) -> Optional[int]:
+        """Resolve a call made by entity caller in file_path"""
+        parts = callee.split('.')
+        if parts[0] in ('self', 'cls'):
+            owner = self._enclosing_class(caller)
+            if owner is None or len(parts) != 2:
+                return None
+            return self._method(owner, parts[1], 0)
+        return self._resolve_name(file_path, caller, parts, 0)
+
+    def _resolve_name(self, file_path: str, scope: Optional[int], parts: List[str],
+                      depth: int) -> Optional[int]:
+        """Resolve a dotted name as seen from scope (None for module level)"""
+        definitions = self.scopes.get(file_path, {})
+        name = '.'.join(parts)
+        # Functions enclosing the call, innermost first
+        while scope is not None:
+            entity = self.entities[scope]
+            if entity.entity_type in _FUNCTION_TYPES:
+                found = definitions.get(f"{_plain(entity.qualified_name)}.<locals>.{name}")
+                if found is not None:
+                    return found
+            scope = self._parent(scope)
+        found = definitions.get(name)
+        if found is not None:
+            return found
+
+        binding = self.bindings.get(file_path, {}).get(parts[0])
+        if binding is not None:
+            return self._resolve_import(file_path, binding, parts[1:], depth)
+        for record in self.star_imports.get(file_path, []):
+            module = self.module_index.find(file_path, record.module, record.level)
+            if module is not None:
+                found = self._lookup(module, parts, depth + 1)
+                if found is not None:
+                    return found
+        return None
+
+    def _resolve_import(self, file_path: str, record: ImportRecord, rest: List[str],
+                        depth: int) -> Optional[int]:
+        """Resolve the rest of a dotted name through the import that bound its head"""
+        if depth > MAX_RESOLVE_DEPTH:
+            return None
+        if record.name is None:
+            # 'import a.b' binds 'a'; 'import a.b as c' binds 'a.b'
+            root = record.module.split('.')[0]
+            bound = root if record.alias == root else record.module
+            return self._resolve_module_path(file_path, bound.split('.') + rest, depth)
+
+        module = self.module_index.find(file_path, record.module, record.level)
+        if module is not None:
+            found = self._lookup(module, [record.name] + rest, depth + 1)
+            if found is not None:
+                return found
+        if not rest:
+            return None
+        submodule = '.'.join(filter(None, [record.module, record.name]))
+        module = self.module_index.find(file_path, submodule, record.level)
+        return self._lookup(module, rest, depth + 1) if module is not None else None
+
+    def _resolve_module_path(self, file_path: str, parts: List[str],
+                             depth: int) -> Optional[int]:
+        """Resolve 'pkg.mod.Class.method' using the longest known module prefix"""
+        for split in range(len(parts) - 1, 0, -1):
+            module = self.module_index.find(file_path, '.'.join(parts[:split]), 0)
+            if module is not None:
+                return self._lookup(module, parts[split:], depth + 1)
+        return None
+
+    def _lookup(self, module: str, parts: List[str], depth: int) -> Optional[int]:
+        """Find a module-level name, following the module's own imports"""
+        found = self.scopes.get(module, {}).get('.'.join(parts))
+        if found is not None or depth > MAX_RESOLVE_DEPTH:
+            return found
+        binding = self.bindings.get(module, {}).get(parts[0])
+        if binding is not None:
+            return self._resolve_import(module, binding, parts[1:], depth)
+        return None
+
+    def _parent(self, node: int) -> Optional[int]:
+        """Get the node of an entity's enclosing entity"""
+        entity = self.entities[node]
+        if not entity.parent_entity:
+            return None
+        return self.ids.get(f"{entity.file_path}::{entity.parent_entity}")
+
+    def _enclosing_class(self, node: Optional[int]) -> Optional[int]:
+        """Get the nearest class enclosing an entity"""
+        while node is not None:
+            if self.entities[node].entity_type == 'class':
+                return node
+            node = self._parent(node)
+        return None
+
+    def _method(self, owner: int, name: str, depth: int) -> Optional[int]:
+        """Find a method on a class or, failing that, on its bases"""
+        entity = self.entities[owner]
+        found = self.scopes.get(entity.file_path, {}).get(
+            f"{_plain(entity.qualified_name or entity.name)}.{name}")
+        if found is not None or depth > MAX_RESOLVE_DEPTH:
+            return found
+        for base in _class_bases(entity.signature):
+            resolved = self._resolve_name(entity.file_path, self._parent(owner),
+                                          base.split('.'), depth + 1)
+            if resolved is not None and resolved != owner \
+                    and self.entities[resolved].entity_type == 'class':
+                found = self._method(resolved, name, depth + 1)
+                if found is not None:
+                    return found
+        return None
@@ -2,95 +2,267 @@
 Code Analyzer - Analyzes code structure and entities
 """
 
-import ast
+import multiprocessing
 import os
 import re
-from typing import Dict, List, Set, Tuple, Optional
-from .utils import CodeEntity, CodeRelationship, LanguageType, FileNode
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple, Optional
+from .call_graph import CallGraph
+from .extractors import analyzable_extensions, get_extractor
+from .import_graph import ImportGraph
+from .jac_parser import JAC_PARSER_MAX_BYTES, extract_jac, jaclang_available
+from .parse_cache import ParseCache, git_blob_sha
+from .python_visitor import extract_python
+from .utils import (
+    CallSite, CodeEntity, CodeRelationship, FileAnalysis, FileNode,
+    FileSource, ImportRecord, LanguageType, LineIndex,
+)
+
+# Bump whenever extraction output changes so cached results are not reused
+ANALYZER_VERSION = "5"
+
+# One pass over JAC source finds every archetype and ability declaration
+JAC_DECLARATION = re.compile(r'\b(node|walker|edge|obj|can|def)\s+(\w+)')
+JAC_ENTITY_TYPES = {
+    'node': 'node',
+    'walker': 'walker',
+    'edge': 'edge',
+    'obj': 'object',
+    'can': 'ability',
+    'def': 'ability',
+}
+
+# Below this many files a process pool costs more to start than it saves
+DEFAULT_PARALLEL_THRESHOLD = 64
+
+# Chunks handed out per worker, so one slow chunk cannot stall the pool
+CHUNKS_PER_WORKER = 4
+
+# Files per chunk when streaming, where total sizes are not known up front
+STREAM_CHUNK_FILES = 16
+
+
+_worker_analyzer: Optional['CodeAnalyzer'] = None
+
+
+_worker_source: Optional[FileSource] = None
+
+
+def _init_worker(cache_config: Optional[Tuple[str, int]], source: Optional[FileSource],
+                 use_jac_parser: bool = False) -> None:
+    """Create the per-process analyzer used by pool workers"""
+    global _worker_analyzer, _worker_source
+    cache = ParseCache(*cache_config) if cache_config else None
+    _worker_analyzer = CodeAnalyzer(cache=cache, use_jac_parser=use_jac_parser)
+    _worker_source = source
+
+
+def _analyze_chunk(chunk: List[Tuple[int, str]]) -> Tuple[List[Tuple[int, FileAnalysis]], int, int]:
+    """Analyze a chunk of files in a worker process.
+
+    Returns the per-file results plus the cache hits and misses they caused.
+    """
+    analyzer = _worker_analyzer or CodeAnalyzer()
+    hits, misses = analyzer.cache_hits, analyzer.cache_misses
+    results = [(index, analyzer.analyze_source(path, _worker_source)) for index, path in chunk]
+    # Worker results are merged by the parent; do not accumulate them here
+    analyzer.entities.clear()
+    analyzer.imports.clear()
+    analyzer.call_sites.clear()
+    if analyzer.cache:
+        analyzer.cache.flush()
+    return results, analyzer.cache_hits - hits, analyzer.cache_misses - misses
+
+
+def jac_backend(use_jac_parser: bool) -> str:
+    """Name the JAC extraction in use, as cache kind and in result versions"""
+    return 'jac-ast' if use_jac_parser and jaclang_available() else 'jac'
+
+
+def _pool_context() -> multiprocessing.context.BaseContext:
+    """Start pool workers without forking this process.
+
+    Pools are created from job and pipeline stage threads, and forking a
+    multi-threaded process can deadlock the child.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _balance_chunks(files: List[Tuple[str, int]], chunk_count: int) -> List[List[Tuple[int, str]]]:
+    """Split files into chunks of roughly equal total size (largest first)"""
+    chunks: List[List[Tuple[int, str]]] = [[] for _ in range(chunk_count)]
+    loads = [0] * chunk_count
+    order = sorted(range(len(files)), key=lambda i: files[i][1], reverse=True)
+    for index in order:
+        target = loads.index(min(loads))
+        chunks[target].append((index, files[index][0]))
+        loads[target] += max(files[index][1], 1)
+    return [chunk for chunk in chunks if chunk]
 
 
 class CodeAnalyzer:
     """Analyzes code files and extracts entities"""
 
-    def __init__(self):
+    def __init__(self, max_workers: Optional[int] = 1,
+                 parallel_threshold: int = DEFAULT_PARALLEL_THRESHOLD,
+                 cache: Optional[ParseCache] = None, use_jac_parser: bool = False):
         self.entities: Dict[str, CodeEntity] = {}
-        self.relationships: List[CodeRelationship] = []
+        self.imports: Dict[str, List[ImportRecord]] = {}
+        self.call_sites: Dict[str, List[CallSite]] = {}
+        self._call_graph: Optional[CallGraph] = None
         self.stats = {}
+        # 1 analyzes serially, None or 0 uses one worker per CPU
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.parallel_threshold = parallel_threshold
+        self.cache = cache
+        # Parse cache lookups made by this analyzer, including its pool workers
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Opt-in: the jaclang parser is far slower than the regex scan and parses one
+        # file at a time per process, so it is best paired with a ParseCache
+        self.use_jac_parser = use_jac_parser
 
-    def analyze_python_file(self, file_path: str) -> List[CodeEntity]:
+    def analyze_python_file(self, file_path: str, source: Optional[FileSource] = None) -> List[CodeEntity]:
         """Analyze a Python file and extract entities"""
-        entities = []
+        analysis = self._analyze_cached(file_path, 'python', self._extract_python_entities, source)
+        self._record_analysis(file_path, analysis)
+        return analysis.entities
+
+    def analyze_jac_file(self, file_path: str, source: Optional[FileSource] = None) -> List[CodeEntity]:
+        """Analyze a JAC file and extract entities"""
+        analysis = self._analyze_jac(file_path, source)
+        self._record_analysis(file_path, analysis)
+        return analysis.entities
+
+    def _analyze_jac(self, file_path: str, source: Optional[FileSource] = None) -> FileAnalysis:
+        """Analyze a JAC file with the jaclang parser if available, else with regexes"""
+        if jac_backend(self.use_jac_parser) == 'jac-ast':
+            return self._analyze_cached(file_path, 'jac-ast', self._extract_jac_ast_entities, source)
+        return self._analyze_cached(file_path, 'jac', self._extract_jac_entities, source)
+
+    def _analyze_cached(self, file_path: str, kind: str,
+                        extract: Callable[[str, str, FileAnalysis], None],
+                        source: Optional[FileSource] = None) -> FileAnalysis:
+        """Analyze a file, consulting the parse cache first.
+
+        With a source that knows blob SHAs, a cache hit never reads the file.
+        """
+        analysis = FileAnalysis()
+        data = None
+        blob_sha = source.blob_sha(file_path) if source else None
+        if blob_sha is None:
+            data = self._read_file(file_path, source)
+            if data is None:
+                return analysis
+            if self.cache is not None:
+                blob_sha = git_blob_sha(data)
+        
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(blob_sha, kind, ANALYZER_VERSION)
+            cached = self.cache.get(key, file_path)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+            self.cache_misses += 1
+        
+        if data is None:
+            data = self._read_file(file_path, source)
+            if data is None:
+                return analysis
+        
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            tree = ast.parse(content)
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    entity = CodeEntity(
-                        name=node.name,
-                        entity_type='function',
-                        file_path=file_path,
-                        line_number=node.lineno,
-                        end_line=node.end_lineno or node.lineno,
-                        language=LanguageType.PYTHON,
-                        docstring=ast.get_docstring(node) or "",
-                    )
-                    entities.append(entity)
-                    self.entities[f"{file_path}::{node.name}"] = entity
-                
-                elif isinstance(node, ast.ClassDef):
-                    entity = CodeEntity(
-                        name=node.name,
-                        entity_type='class',
-                        file_path=file_path,
-                        line_number=node.lineno,
-                        end_line=node.end_lineno or node.lineno,
-                        language=LanguageType.PYTHON,
-                        docstring=ast.get_docstring(node) or "",
-                    )
-                    entities.append(entity)
-                    self.entities[f"{file_path}::{node.name}"] = entity
+            extract(data.decode('utf-8', errors='ignore'), file_path, analysis)
         except Exception as e:
             print(f"Error analyzing {file_path}: {e}")
         
-        return entities
+        if key is not None:
+            self.cache.put(key, analysis)
+        return analysis
 
-    def analyze_jac_file(self, file_path: str) -> List[CodeEntity]:
-        """Analyze a JAC file and extract entities"""
-        entities = []
+    def _read_file(self, file_path: str, source: Optional[FileSource]) -> Optional[bytes]:
+        """Read file content from the source, or from disk without one"""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            # Simple regex-based parsing for JAC
-            node_pattern = r'node\s+(\w+)'
-            walker_pattern = r'walker\s+(\w+)'
-            
-            for match in re.finditer(node_pattern, content):
-                entity = CodeEntity(
-                    name=match.group(1),
-                    entity_type='node',
-                    file_path=file_path,
-                    line_number=content[:match.start()].count('\n') + 1,
-                    language=LanguageType.JAC,
-                )
-                entities.append(entity)
-            
-            for match in re.finditer(walker_pattern, content):
-                entity = CodeEntity(
-                    name=match.group(1),
-                    entity_type='walker',
-                    file_path=file_path,
-                    line_number=content[:match.start()].count('\n') + 1,
-                    language=LanguageType.JAC,
-                )
-                entities.append(entity)
+            if source is not None:
+                data = source.read(file_path)
+                if data is None:
+                    raise FileNotFoundError(f"{file_path} not found in source")
+                return data
+            with open(file_path, 'rb') as f:
+                return f.read()
         except Exception as e:
             print(f"Error analyzing {file_path}: {e}")
-        
-        return entities
+            return None
+
+    def _extract_python_entities(self, content: str, file_path: str,
+                                 analysis: FileAnalysis) -> None:
+        """Extract entities, imports and calls from Python source"""
+        extract_python(content, file_path, analysis)
+
+    def _extract_jac_entities(self, content: str, file_path: str,
+                              analysis: FileAnalysis) -> None:
+        """Extract archetypes and abilities from JAC source in one scan"""
+        lines = LineIndex(content)
+        for match in JAC_DECLARATION.finditer(content):
+            analysis.entities.append(CodeEntity(
+                name=match.group(2),
+                entity_type=JAC_ENTITY_TYPES[match.group(1)],
+                file_path=file_path,
+                line_number=lines.line_of(match.start()),
+                language=LanguageType.JAC,
+            ))
+
+    def _extract_jac_ast_entities(self, content: str, file_path: str,
+                                  analysis: FileAnalysis) -> None:
+        """Extract entities with the jaclang parser, using the regex scan as fallback"""
+        if len(content) > JAC_PARSER_MAX_BYTES or not extract_jac(content, file_path, analysis):
+            self._extract_jac_entities(content, file_path, analysis)
+
+    def analyze_file(self, file_path: str, source: Optional[FileSource] = None) -> List[CodeEntity]:
+        """Analyze a single code file based on its extension"""
+        return self.analyze_source(file_path, source).entities
+
+    def analyze_source(self, file_path: str, source: Optional[FileSource] = None) -> FileAnalysis:
+        """Analyze a single code file, returning its entities, imports and calls"""
+        analysis = self._extract_source(file_path, source)
+        if analysis is None:
+            return FileAnalysis()
+        self._record_analysis(file_path, analysis)
+        return analysis
+
+    def _extract_source(self, file_path: str,
+                        source: Optional[FileSource] = None) -> Optional[FileAnalysis]:
+        """Analyze a file without recording it; None if no extractor handles it"""
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension == '.py':
+            return self._analyze_cached(file_path, 'python', self._extract_python_entities, source)
+        if extension == '.jac':
+            return self._analyze_jac(file_path, source)
+        extractor = get_extractor(file_path)
+        if extractor is None:
+            return None
+        return self._analyze_cached(file_path, extractor.kind, extractor.extract, source)
+
+    def _record_analysis(self, file_path: str, analysis: FileAnalysis) -> None:
+        """Record a file's analysis in the analyzer-wide indexes"""
+        for entity in analysis.entities:
+            self.entities[f"{entity.file_path}::{entity.qualified_name or entity.name}"] = entity
+        self.imports[file_path] = analysis.imports
+        self.call_sites[file_path] = analysis.calls
+        self._call_graph = None
+
+    def clear(self) -> None:
+        """Forget every recorded analysis so the analyzer can be reused"""
+        self.entities = {}
+        self.imports = {}
+        self.call_sites = {}
+        self._call_graph = None
+        self.stats = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def analyze_directory(self, root_path: str) -> Dict[str, List[CodeEntity]]:
         """Analyze all code files in a directory"""
@@ -108,48 +280,174 @@ class CodeAnalyzer:
         
         return results
 
-    def analyze_repository(self, file_tree: Optional[FileNode]) -> Dict:
-        """Analyze entire repository"""
+    def analyze_repository(self, file_tree: Optional[FileNode],
+                           source: Optional[FileSource] = None) -> Dict:
+        """Analyze entire repository, reading files from source if given"""
         if not file_tree:
             return {}
         
-        file_paths = self._collect_code_files(file_tree)
+        code_files = self._collect_code_nodes(file_tree)
         all_entities = []
-        
-        for file_path in file_paths:
-            if file_path.endswith('.py'):
-                all_entities.extend(self.analyze_python_file(file_path))
-            elif file_path.endswith('.jac'):
-                all_entities.extend(self.analyze_jac_file(file_path))
+        for analysis in self.analyze_files([(node.path, node.size) for node in code_files], source):
+            all_entities.extend(analysis.entities)
         
         return {
             'entities': [e.to_dict() for e in all_entities],
             'entity_count': len(all_entities),
-            'file_count': len(file_paths),
+            'file_count': len(code_files),
+            'byte_count': sum(node.size for node in code_files),
         }
 
+    def analyze_files(self, files: List[Tuple[str, int]],
+                      source: Optional[FileSource] = None) -> List[FileAnalysis]:
+        """Analyze (path, size) pairs, returning each file's analysis in order"""
+        if self.max_workers > 1 and len(files) >= self.parallel_threshold:
+            per_file = self._analyze_parallel(files, source)
+            if per_file is not None:
+                for (path, _), analysis in zip(files, per_file):
+                    self._record_analysis(path, analysis)
+                return per_file
+        return [self.analyze_source(path, source) for path, _ in files]
+
+    def iter_analyses(self, files: Iterable[Tuple[str, int]], source: Optional[FileSource] = None,
+                      record: bool = True) -> Iterator[Tuple[str, FileAnalysis]]:
+        """Analyze (path, size) pairs as they arrive, yielding (path, analysis).
+
+        Files are pulled from the iterable only as results are consumed. With
+        record=False nothing is kept in the analyzer-wide indexes, so memory
+        does not grow with the number of files.
+        """
+        files = iter(files)
+        if self.max_workers > 1:
+            # Stay serial for small inputs, like analyze_files
+            head = list(islice(files, self.parallel_threshold))
+            if len(head) < self.parallel_threshold:
+                files = iter(head)
+            else:
+                yield from self._iter_parallel(chain(head, files), source, record)
+                return
+        for path, _ in files:
+            analysis = self._extract_source(path, source) or FileAnalysis()
+            if record:
+                self._record_analysis(path, analysis)
+            yield path, analysis
+
+    def _iter_parallel(self, files: Iterator[Tuple[str, int]], source: Optional[FileSource],
+                       record: bool) -> Iterator[Tuple[str, FileAnalysis]]:
+        """Stream files through a process pool with a bounded number of chunks in flight.
+
+        A chunk the pool cannot analyze is redone serially.
+        """
+        cache_config = (self.cache.db_path, self.cache.max_bytes) if self.cache else None
+        limit = self.max_workers * CHUNKS_PER_WORKER
+        in_flight = deque()
+        exhausted = False
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_pool_context(),
+                                 initializer=_init_worker,
+                                 initargs=(cache_config, source, self.use_jac_parser)) as pool:
+            while True:
+                while not exhausted and len(in_flight) < limit:
+                    chunk = [path for path, _ in islice(files, STREAM_CHUNK_FILES)]
+                    if not chunk:
+                        exhausted = True
+                        break
+                    try:
+                        future = pool.submit(_analyze_chunk, list(enumerate(chunk)))
+                    except Exception:
+                        future = None
+                    in_flight.append((chunk, future))
+                if not in_flight:
+                    break
+                chunk, future = in_flight.popleft()
+                analyses = None
+                if future is not None:
+                    try:
+                        chunk_result, hits, misses = future.result()
+                        analyses = [analysis for _, analysis in chunk_result]
+                        self._count_pool_lookups(hits, misses)
+                    except Exception as e:
+                        print(f"Parallel analysis failed for a chunk, retrying serially: {e}")
+                if analyses is None:
+                    analyses = [self._extract_source(path, source) or FileAnalysis()
+                                for path in chunk]
+                for path, analysis in zip(chunk, analyses):
+                    if record:
+                        self._record_analysis(path, analysis)
+                    yield path, analysis
+
+    def _analyze_parallel(self, files: List[Tuple[str, int]],
+                          source: Optional[FileSource] = None) -> Optional[List[FileAnalysis]]:
+        """Analyze files in a process pool, returning analyses in input order.
+
+        Returns None if the pool cannot be used, so the caller can fall back
+        to serial analysis.
+        """
+        workers = min(self.max_workers, len(files))
+        chunks = _balance_chunks(files, workers * CHUNKS_PER_WORKER)
+        results: List[FileAnalysis] = [FileAnalysis() for _ in files]
+        try:
+            cache_config = (self.cache.db_path, self.cache.max_bytes) if self.cache else None
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(),
+                                     initializer=_init_worker,
+                                     initargs=(cache_config, source, self.use_jac_parser)) as pool:
+                for chunk_result, hits, misses in pool.map(_analyze_chunk, chunks):
+                    for index, analysis in chunk_result:
+                        results[index] = analysis
+                    self._count_pool_lookups(hits, misses)
+        except Exception as e:
+            print(f"Parallel analysis unavailable, falling back to serial: {e}")
+            return None
+        return results
+
+    def _count_pool_lookups(self, hits: int, misses: int) -> None:
+        """Count cache lookups made by pool workers here and in the shared cache"""
+        self.cache_hits += hits
+        self.cache_misses += misses
+        if self.cache:
+            self.cache.record_lookups(hits, misses)
+
     def _collect_code_files(self, node: Optional[FileNode]) -> List[str]:
         """Collect all code files from tree"""
-        files = []
-        if not node:
-            return files
-        
-        if not node.is_dir and node.name.endswith(('.py', '.jac')):
-            files.append(node.path)
-        
-        for child in node.children:
-            files.extend(self._collect_code_files(child))
-        
-        return files
+        return [n.path for n in self._collect_code_nodes(node)]
+
+    def _collect_code_nodes(self, node: Optional[FileNode]) -> List[FileNode]:
+        """Collect all code file nodes from tree, in depth-first order"""
+        nodes = []
+        extensions = analyzable_extensions()
+        stack = [node] if node else []
+        while stack:
+            current = stack.pop()
+            if not current.is_dir and current.name.lower().endswith(extensions):
+                nodes.append(current)
+            stack.extend(reversed(current.children))
+        return nodes
+
+    def build_call_graph(self) -> CallGraph:
+        """Resolve the recorded call sites into a CSR call graph (cached)"""
+        if self._call_graph is None:
+            self._call_graph = CallGraph.build(self.entities, self.imports, self.call_sites)
+        return self._call_graph
+
+    def build_import_graph(self, root_path: Optional[str] = None) -> ImportGraph:
+        """Build the module import graph of the Python files under root_path"""
+        return ImportGraph.build(self.imports, root_path)
+
+    @property
+    def relationships(self) -> List[CodeRelationship]:
+        """Call relationships, materialized from the call graph on access"""
+        return list(self.build_call_graph().relationships())
 
     def get_call_graph(self) -> Dict[str, List[str]]:
         """Build a simplified call graph"""
-        return {}
+        return self.build_call_graph().to_dict()
 
     def get_ccg_stats(self) -> Dict:
         """Get Code Context Graph statistics"""
+        entity_types: Dict[str, int] = {}
+        for entity in self.entities.values():
+            entity_types[entity.entity_type] = entity_types.get(entity.entity_type, 0) + 1
         return {
             'total_entities': len(self.entities),
-            'total_relationships': len(self.relationships),
-            'entity_types': {},
+            'total_relationships': self.build_call_graph().edge_count,
+            'entity_types': entity_types,
         }
@@ -0,0 +1,252 @@
+"""
+Compact Tree - Struct-of-arrays file tree with a FileNode-compatible view
+"""
+
+import os
+from array import array
+from typing import Any, Dict, List, Optional
+from .utils import (
+    FileNode, IGNORE_PATTERNS, LanguageType, _language_for_name, should_ignore,
+)
+
+LANGUAGES = list(LanguageType)
+LANGUAGE_CODES = {language: code for code, language in enumerate(LANGUAGES)}
+
+NO_PARENT = -1
+
+
+class CompactFileTree:
+    """File tree stored as parallel arrays indexed by node number.
+
+    Node 0 is the root. Names are indices into a table of unique strings,
+    and paths are rebuilt from parent links on demand.
+    """
+
+    def __init__(self, root_path: str):
+        self.root_path = root_path
+        self.parents = array('i')
+        self.name_ids = array('I')
+        self.languages = array('B')
+        self.sizes = array('q')
+        self.depths = array('H')
+        self.is_dirs = array('B')
+        self.removed = array('B')
+        self.names: List[str] = []
+        self._name_index: Dict[str, int] = {}
+        self._child_offsets: Optional[array] = None
+        self._child_nodes: Optional[array] = None
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def add_node(self, parent: int, name: str, is_dir: bool,
+                 language: LanguageType = LanguageType.UNKNOWN,
+                 size: int = 0, depth: int = 0) -> int:
+        """Append a node and return its index"""
+        name_id = self._name_index.get(name)
+        if name_id is None:
+            name_id = self._name_index[name] = len(self.names)
+            self.names.append(name)
+        self.parents.append(parent)
+        self.name_ids.append(name_id)
+        self.languages.append(LANGUAGE_CODES[language])
+        self.sizes.append(size)
+        self.depths.append(depth)
+        self.is_dirs.append(1 if is_dir else 0)
+        self.removed.append(0)
+        self._child_offsets = None
+        return len(self.parents) - 1
+
+    def remove_node(self, index: int) -> None:
+        """Detach a node (and with it, its subtree) from the tree"""
+        self.removed[index] = 1
+        self._child_offsets = None
+
+    def _build_children(self) -> None:
+        """Build CSR child lists, keeping insertion order per parent"""
+        count = len(self.parents)
+        offsets = array('I', [0]) * (count + 1)
+        for index in range(1, count):
+            if not self.removed[index]:
+                offsets[self.parents[index] + 1] += 1
+        for index in range(count):
+            offsets[index + 1] += offsets[index]
+        nodes = array('I', [0]) * offsets[count]
+        fill = array('I', offsets[:count])
+        for index in range(1, count):
+            if not self.removed[index]:
+                parent = self.parents[index]
+                nodes[fill[parent]] = index
+                fill[parent] += 1
+        self._child_offsets = offsets
+        self._child_nodes = nodes
+
+    def child_indices(self, index: int) -> array:
+        """Get the indices of a node's children"""
+        if self._child_offsets is None:
+            self._build_children()
+        return self._child_nodes[self._child_offsets[index]:self._child_offsets[index + 1]]
+
+    def path_of(self, index: int) -> str:
+        """Rebuild the path of a node"""
+        parts = []
+        while index > 0:
+            parts.append(self.names[self.name_ids[index]])
+            index = self.parents[index]
+        if not parts:
+            return self.root_path
+        return os.path.join(self.root_path, *reversed(parts))
+
+    def root(self) -> Optional['CompactFileNode']:
+        """Get a view of the root node"""
+        if not self.parents or self.removed[0]:
+            return None
+        return CompactFileNode(self, 0)
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the arrays (excluding the name table)"""
+        arrays = [self.parents, self.name_ids, self.languages, self.sizes,
+                  self.depths, self.is_dirs, self.removed]
+        if self._child_offsets is not None:
+            arrays += [self._child_offsets, self._child_nodes]
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    @classmethod
+    def from_file_node(cls, node: Optional[FileNode]) -> 'CompactFileTree':
+        """Convert a FileNode tree"""
+        tree = cls(node.path if node else "")
+        if node is None:
+            return tree
+        stack = [(node, NO_PARENT)]
+        while stack:
+            current, parent = stack.pop()
+            index = tree.add_node(parent, current.name, current.is_dir, current.language,
+                                  current.size, current.depth)
+            stack.extend((child, index) for child in reversed(current.children))
+        return tree
+
+
+class CompactFileNode:
+    """Read-only FileNode view over one node of a CompactFileTree"""
+
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree: CompactFileTree, index: int):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def path(self) -> str:
+        return self.tree.path_of(self.index)
+
+    @property
+    def name(self) -> str:
+        return self.tree.names[self.tree.name_ids[self.index]]
+
+    @property
+    def is_dir(self) -> bool:
+        return bool(self.tree.is_dirs[self.index])
+
+    @property
+    def language(self) -> LanguageType:
+        return LANGUAGES[self.tree.languages[self.index]]
+
+    @property
+    def size(self) -> int:
+        return self.tree.sizes[self.index]
+
+    @property
+    def depth(self) -> int:
+        return self.tree.depths[self.index]
+
+    @property
+    def children(self) -> List['CompactFileNode']:
+        tree = self.tree
+        return [CompactFileNode(tree, i) for i in tree.child_indices(self.index)]
+
+    @property
+    def parent(self) -> Optional['CompactFileNode']:
+        parent = self.tree.parents[self.index]
+        return None if parent == NO_PARENT else CompactFileNode(self.tree, parent)
+
+    def add_child(self, child: Any) -> None:
+        """Compact trees are built by their builders and are read-only"""
+        raise TypeError("CompactFileNode is read-only")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'path': self.path,
+            'name': self.name,
+            'is_dir': self.is_dir,
+            'language': self.language.value,
+            'size': self.size,
+            'depth': self.depth,
+            'children': [c.to_dict() for c in self.children],
+        }
+
+    def __eq__(self, other: object) -> bool:
+        return (isinstance(other, CompactFileNode)
+                and other.tree is self.tree and other.index == self.index)
+
+    def __hash__(self) -> int:
+        return hash((id(self.tree), self.index))
+
+    def __repr__(self) -> str:
+        return f"CompactFileNode(path={self.path!r}, is_dir={self.is_dir})"
+
+
+def scan_compact_file_tree(root_path: str, max_depth: int = 10) -> Optional[CompactFileNode]:
+    """Build a compact tree directly with os.scandir, like scan_file_tree"""
+    if max_depth < 0 or should_ignore(root_path):
+        return None
+
+    tree = CompactFileTree(root_path)
+    name = os.path.basename(root_path) or root_path
+    try:
+        is_dir = os.path.isdir(root_path)
+    except Exception:
+        return None
+    if not is_dir:
+        try:
+            size = os.path.getsize(root_path)
+        except (OSError, IOError):
+            size = 0
+        tree.add_node(NO_PARENT, name, False, _language_for_name(name), size, 0)
+        return tree.root()
+
+    tree.add_node(NO_PARENT, name, True, LanguageType.UNKNOWN, 0, 0)
+    unknown = LanguageType.UNKNOWN
+    stack = [(0, root_path, 0)]
+    while stack:
+        index, path, depth = stack.pop()
+        child_depth = depth + 1
+        try:
+            with os.scandir(path) as entries:
+                if child_depth > max_depth:
+                    continue
+                for entry in entries:
+                    if entry.name in IGNORE_PATTERNS:
+                        continue
+                    try:
+                        entry_is_dir = entry.is_dir()
+                    except OSError:
+                        entry_is_dir = False
+                    if entry_is_dir:
+                        child = tree.add_node(index, entry.name, True, unknown, 0, child_depth)
+                        stack.append((child, entry.path, child_depth))
+                        continue
+                    try:
+                        size = entry.stat().st_size
+                    except OSError:
+                        size = 0
+                    tree.add_node(index, entry.name, False, _language_for_name(entry.name),
+                                  size, child_depth)
+        except PermissionError:
+            pass
+        except Exception:
+            if index == 0:
+                return None
+            tree.remove_node(index)
+
+    return tree.root()
@@ -2,9 +2,17 @@
 Doc Genie - Generates documentation from code analysis
 """
 
+import os
+import threading
 from typing import Dict, Optional, List
 from datetime import datetime
 
+# Bump whenever the generated Markdown changes so stored results are not reused
+DOC_GENERATOR_VERSION = "1"
+
+# Entities listed in the Key Entities section
+KEY_ENTITY_LIMIT = 10
+
 
 class DocGenie:
     """Generates markdown documentation"""
@@ -20,6 +28,7 @@ class DocGenie:
         doc_sections.append(self._generate_overview(analysis_data))
         doc_sections.append(self._generate_structure_section(analysis_data))
         doc_sections.append(self._generate_key_entities(analysis_data))
+        doc_sections.append(self._generate_dependencies(analysis_data))
         doc_sections.append(self._generate_statistics(analysis_data))
         
         self.doc_content = '\n\n'.join(doc_sections)
@@ -47,11 +56,36 @@ class DocGenie:
             return "## Key Entities\n\nNo entities found."
         
         content = "## Key Entities\n\n"
-        for entity in entities[:10]:  # Limit to 10
+        for entity in entities[:KEY_ENTITY_LIMIT]:
             content += f"- **{entity.get('name', 'Unknown')}** ({entity.get('type', 'unknown')}) - Line {entity.get('line_number', '?')}\n"
         
         return content
 
+    def _generate_dependencies(self, data: Dict) -> str:
+        """Generate module dependency section with import cycles and layers"""
+        graph = data.get('import_graph')
+        if not graph or not graph.get('module_count'):
+            return "## Module Dependencies\n\nNo Python modules found."
+        
+        content = "## Module Dependencies\n\n"
+        content += f"{graph['module_count']} modules, {graph['edge_count']} internal imports.\n\n"
+        
+        cycles = graph.get('cycles', [])
+        if cycles:
+            content += f"### Import Cycles ({len(cycles)})\n\n"
+            for cycle in cycles[:10]:  # Limit to 10
+                content += f"- {' <-> '.join(cycle)}\n"
+            content += "\n"
+        else:
+            content += "No import cycles.\n\n"
+        
+        content += "### Layers\n\n"
+        for depth, modules in enumerate(graph.get('layers', [])):
+            shown = ', '.join(modules[:8]) + (f", ... ({len(modules) - 8} more)" if len(modules) > 8 else "")
+            content += f"- **Layer {depth}**: {shown}\n"
+        
+        return content
+
     def _generate_statistics(self, data: Dict) -> str:
         """Generate statistics section"""
         entity_count = data.get('entity_count', 0)
@@ -65,10 +99,17 @@ class DocGenie:
 """
 
     def save_documentation(self, file_path: str) -> bool:
-        """Save documentation to file"""
+        """Atomically save documentation to file, so concurrent runs never interleave"""
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(self.doc_content)
+            tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(self.doc_content)
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
             return True
         except Exception as e:
             print(f"Error saving documentation: {e}")
@@ -0,0 +1,61 @@
+"""
+Extractors - Registry of entity extractors for languages beyond Python and JAC
+"""
+
+import os
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from .c_family import CPP, GO, JAVA, JAVASCRIPT, RUST, TYPESCRIPT, extract_c_family
+from .utils import ANALYZABLE_EXTENSIONS, FileAnalysis
+
+
+@dataclass(frozen=True)
+class Extractor:
+    """Fills a FileAnalysis from source text.
+
+    kind namespaces the extractor's results in the parse cache, so change it
+    when the output of extract changes.
+    """
+    kind: str
+    extract: Callable[[str, str, FileAnalysis], None]
+
+
+_extractors: Dict[str, Extractor] = {}
+
+
+def register_extractor(extensions: Iterable[str], extractor: Extractor) -> None:
+    """Use extractor for files with any of the given extensions.
+
+    Register at import time: process-pool workers only see extractors
+    registered by modules they import.
+    """
+    for extension in extensions:
+        _extractors[extension.lower()] = extractor
+
+
+def get_extractor(file_path: str) -> Optional[Extractor]:
+    """Get the extractor registered for a file's extension"""
+    return _extractors.get(os.path.splitext(file_path)[1].lower())
+
+
+def registered_extensions() -> Tuple[str, ...]:
+    """Get every extension with a registered extractor"""
+    return tuple(_extractors)
+
+
+def analyzable_extensions() -> Tuple[str, ...]:
+    """Get the built-in analyzable extensions plus any registered ones"""
+    return tuple(set(ANALYZABLE_EXTENSIONS) | set(_extractors))
+
+
+for _syntax, _extensions in (
+    (JAVASCRIPT, ('.js', '.jsx', '.mjs', '.cjs')),
+    (TYPESCRIPT, ('.ts', '.tsx')),
+    (JAVA, ('.java',)),
+    (GO, ('.go',)),
+    (RUST, ('.rs',)),
+    (CPP, ('.cpp', '.cc', '.cxx', '.h', '.hh', '.hpp')),
+):
+    register_extractor(_extensions, Extractor(_syntax.language.value,
+                                              partial(extract_c_family, _syntax)))
@@ -0,0 +1,231 @@
+"""
+Git Objects - Checkout-free access to repository trees and blobs
+"""
+
+import os
+import subprocess
+import threading
+from typing import Dict, Iterator, Optional, Tuple
+from .utils import FileNode, get_language_from_extension, should_ignore
+
+
+class GitBlobReader:
+    """Reads blobs through one long-lived `git cat-file --batch` process"""
+
+    def __init__(self, git_dir: str):
+        self.git_dir = git_dir
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen:
+        """Start the cat-file process on first use"""
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                ["git", "--git-dir", self.git_dir, "cat-file", "--batch"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self._proc
+
+    def read(self, sha: str) -> Optional[bytes]:
+        """Read a blob's content, or None if it does not exist"""
+        with self._lock:
+            proc = self._start()
+            proc.stdin.write(sha.encode('utf-8', errors='surrogateescape') + b"\n")
+            proc.stdin.flush()
+            header = proc.stdout.readline().split()
+            if len(header) != 3:
+                # "<name> missing" or "ambiguous" carries no content
+                return None
+            size = int(header[2])
+            data = proc.stdout.read(size)
+            proc.stdout.read(1)  # trailing newline
+            # Other object types are consumed too, or the next header would be misread
+            return data if header[1] == b"blob" else None
+
+    def close(self) -> None:
+        """Stop the cat-file process"""
+        with self._lock:
+            if self._proc is not None:
+                self._proc.stdin.close()
+                self._proc.wait()
+                self._proc.stdout.close()
+                self._proc = None
+
+
+class GitTreeSource:
+    """Serves file contents of a tree straight from the git object store.
+
+    Paths are the virtual paths of the FileNode tree built by
+    build_file_tree_from_git. The reader process is not pickled, so pool
+    workers start their own on first read.
+
+    With a root_path, paths missing from blob_index are read as rev:path,
+    so a copy taken while the index is still being filled keeps working.
+    """
+
+    def __init__(self, git_dir: str, blob_index: Dict[str, str],
+                 root_path: Optional[str] = None, rev: str = "HEAD"):
+        self.git_dir = git_dir
+        self.blob_index = blob_index
+        self.root_path = root_path
+        self.rev = rev
+        self._reader: Optional[GitBlobReader] = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict:
+        return {'git_dir': self.git_dir, 'blob_index': self.blob_index,
+                'root_path': self.root_path, 'rev': self.rev}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(state['git_dir'], state['blob_index'], state.get('root_path'),
+                      state.get('rev', "HEAD"))
+
+    def blob_sha(self, path: str) -> Optional[str]:
+        """Get the blob SHA for a path"""
+        return self.blob_index.get(path)
+
+    def read(self, path: str) -> Optional[bytes]:
+        """Read the content of a path"""
+        sha = self.blob_index.get(path)
+        if sha is None:
+            if self.root_path is None or not path.startswith(os.path.join(self.root_path, '')):
+                return None
+            sha = f"{self.rev}:{os.path.relpath(path, self.root_path).replace(os.sep, '/')}"
+        with self._lock:
+            if self._reader is None:
+                self._reader = GitBlobReader(self.git_dir)
+            reader = self._reader
+        return reader.read(sha)
+
+    def close(self) -> None:
+        """Stop the underlying reader"""
+        with self._lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+
+def build_file_tree_from_git(git_dir: str, root_path: str, rev: str = "HEAD",
+                             max_depth: int = 10) -> Tuple[Optional[FileNode], Dict[str, str]]:
+    """Build a file tree from `git ls-tree` without checking anything out.
+
+    Nodes get virtual paths below root_path, matching what build_file_tree
+    would produce for a checkout there. Returns the tree and a map from
+    file path to blob SHA.
+    """
+    result = subprocess.run(
+        ["git", "--git-dir", git_dir, "ls-tree", "-r", "-l", "-z", rev],
+        capture_output=True,
+    )
+    if result.returncode != 0 or should_ignore(root_path):
+        return None, {}
+
+    root = FileNode(path=root_path, name=os.path.basename(root_path) or root_path,
+                    is_dir=True, depth=0)
+    dirs: Dict[str, FileNode] = {'': root}
+    blob_index: Dict[str, str] = {}
+
+    for record in result.stdout.decode('utf-8', errors='surrogateescape').split('\0'):
+        if not record:
+            continue
+        info, rel_path = record.split('\t', 1)
+        _, obj_type, sha, size = info.split()
+        parts = rel_path.split('/')
+        if should_ignore(os.path.join(*parts)):
+            continue
+
+        parent = root
+        for depth, part in enumerate(parts[:-1], start=1):
+            if depth > max_depth:
+                break
+            key = '/'.join(parts[:depth])
+            node = dirs.get(key)
+            if node is None:
+                node = FileNode(path=os.path.join(root_path, *parts[:depth]), name=part,
+                                is_dir=True, depth=depth)
+                parent.add_child(node)
+                dirs[key] = node
+            parent = node
+        if len(parts) > max_depth:
+            continue
+
+        path = os.path.join(root_path, *parts)
+        if obj_type == 'commit':
+            # Submodules show up as empty directories in a checkout
+            parent.add_child(FileNode(path=path, name=parts[-1], is_dir=True, depth=len(parts)))
+            continue
+        parent.add_child(FileNode(
+            path=path,
+            name=parts[-1],
+            is_dir=False,
+            language=get_language_from_extension(parts[-1]),
+            size=int(size) if size != '-' else 0,
+            depth=len(parts),
+        ))
+        blob_index[path] = sha
+
+    return root, blob_index
+
+
+def iter_git_files(git_dir: str, root_path: str, rev: str = "HEAD",
+                   max_depth: int = 10) -> Iterator[Tuple[FileNode, str]]:
+    """Yield (file node, blob SHA) pairs while `git ls-tree` is still listing.
+
+    Nodes match the files of build_file_tree_from_git, in the same order.
+    """
+    if should_ignore(root_path):
+        return
+    proc = subprocess.Popen(
+        ["git", "--git-dir", git_dir, "ls-tree", "-r", "-l", "-z", rev],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        buffer = b""
+        while True:
+            data = proc.stdout.read1(65536)
+            if not data:
+                break
+            records = (buffer + data).split(b"\0")
+            buffer = records.pop()
+            for record in records:
+                info, rel_path = record.decode('utf-8', errors='surrogateescape').split('\t', 1)
+                _, obj_type, sha, size = info.split()
+                parts = rel_path.split('/')
+                if obj_type != 'blob' or len(parts) > max_depth \
+                        or should_ignore(os.path.join(*parts)):
+                    continue
+                yield FileNode(
+                    path=os.path.join(root_path, *parts),
+                    name=parts[-1],
+                    is_dir=False,
+                    language=get_language_from_extension(parts[-1]),
+                    size=int(size) if size != '-' else 0,
+                    depth=len(parts),
+                ), sha
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+
+
+def resolve_head_commit(repo_url: str, timeout: int = 30) -> Optional[str]:
+    """Resolve the commit a clone of repo_url would check out, without cloning.
+
+    Local repositories are read directly; remotes are asked with `git ls-remote`.
+    """
+    local_path = repo_url[len('file://'):] if repo_url.startswith('file://') else repo_url
+    if os.path.isdir(local_path):
+        command = ["git", "-C", local_path, "rev-parse", "HEAD"]
+    else:
+        command = ["git", "ls-remote", "--", repo_url, "HEAD"]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0 or not result.stdout.strip():
+        return None
+    return result.stdout.split()[0]
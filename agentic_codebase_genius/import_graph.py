@@ -0,0 +1,252 @@
+"""
+Import Graph - Module dependency graph with strongly connected components
+"""
+
+import os
+from array import array
+from typing import Dict, Iterable, List, Optional, Set
+from .utils import ImportRecord
+
+
+class ModuleIndex:
+    """Maps absolute and relative module names to analyzed Python files"""
+
+    def __init__(self, files: Iterable[str]):
+        self.files: Set[str] = {f for f in files if f.endswith('.py')}
+        # Every dotted suffix of a module path; None marks an ambiguous suffix
+        self.modules: Dict[str, Optional[str]] = {}
+        for file_path in self.files:
+            parts = [p for p in os.path.splitext(file_path)[0].split(os.sep) if p]
+            if parts and parts[-1] == '__init__':
+                parts.pop()
+            for start in range(len(parts)):
+                name = '.'.join(parts[start:])
+                if self.modules.get(name, file_path) != file_path:
+                    self.modules[name] = None
+                else:
+                    self.modules[name] = file_path
+
+    def find(self, file_path: str, module: str, level: int) -> Optional[str]:
+        """Map a module imported from file_path to an analyzed file"""
+        if level == 0:
+            return self.modules.get(module)
+        base = os.path.dirname(file_path)
+        for _ in range(level - 1):
+            base = os.path.dirname(base)
+        path = os.path.join(base, *module.split('.')) if module else base
+        for candidate in (path + '.py', os.path.join(path, '__init__.py')):
+            if candidate in self.files:
+                return candidate
+        return None
+
+    def find_longest(self, file_path: str, module: str, level: int) -> Optional[str]:
+        """Map 'a.b.c' to the deepest of a.b.c, a.b and a that was analyzed"""
+        parts = module.split('.')
+        for end in range(len(parts), 0, -1):
+            found = self.find(file_path, '.'.join(parts[:end]), level)
+            if found is not None:
+                return found
+        return None
+
+
+def module_name(file_path: str, root_path: str) -> str:
+    """Dotted module name of a file relative to the repository root"""
+    rel_path = os.path.splitext(os.path.relpath(file_path, root_path))[0]
+    parts = [p for p in rel_path.split(os.sep) if p and p != '.']
+    if parts and parts[-1] == '__init__':
+        parts.pop()
+    return '.'.join(parts) or os.path.basename(os.path.normpath(root_path))
+
+
+class ImportGraph:
+    """Module -> imported module graph stored as compressed sparse rows.
+
+    Node i is modules[i] (defined in files[i]); the modules it imports are
+    targets[offsets[i]:offsets[i + 1]]. Imports that do not resolve to an
+    analyzed file are kept per module, by top-level name, in external.
+    """
+
+    def __init__(self, modules: List[str], files: List[str], offsets: array, targets: array,
+                 external: Dict[str, List[str]]):
+        self.modules = modules
+        self.files = files
+        self.offsets = offsets
+        self.targets = targets
+        self.external = external
+        self._index = {name: i for i, name in enumerate(modules)}
+        self._components: Optional[List[List[int]]] = None
+        self._reverse: Optional[tuple] = None
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def dependencies(self, module: str) -> List[str]:
+        """Get the modules a module imports"""
+        node = self._index.get(module)
+        if node is None:
+            return []
+        return [self.modules[t] for t in self.targets[self.offsets[node]:self.offsets[node + 1]]]
+
+    def dependents(self, module: str) -> List[str]:
+        """Get the modules that import a module"""
+        node = self._index.get(module)
+        if node is None:
+            return []
+        if self._reverse is None:
+            self._reverse = self._build_reverse()
+        offsets, sources = self._reverse
+        return [self.modules[s] for s in sources[offsets[node]:offsets[node + 1]]]
+
+    def _build_reverse(self) -> tuple:
+        """Build the transposed CSR arrays for dependent lookups"""
+        count = len(self.modules)
+        offsets = array('I', [0]) * (count + 1)
+        for target in self.targets:
+            offsets[target + 1] += 1
+        for node in range(count):
+            offsets[node + 1] += offsets[node]
+        sources = array('I', [0]) * len(self.targets)
+        fill = array('I', offsets[:count])
+        for node in range(count):
+            for target in self.targets[self.offsets[node]:self.offsets[node + 1]]:
+                sources[fill[target]] = node
+                fill[target] += 1
+        return offsets, sources
+
+    def strongly_connected_components(self) -> List[List[int]]:
+        """Tarjan's algorithm with an explicit stack, dependencies first"""
+        if self._components is not None:
+            return self._components
+        offsets, targets = self.offsets, self.targets
+        count = len(self.modules)
+        index = [-1] * count
+        low = [0] * count
+        on_stack = bytearray(count)
+        stack: List[int] = []
+        components: List[List[int]] = []
+        counter = 0
+        for start in range(count):
+            if index[start] != -1:
+                continue
+            index[start] = low[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack[start] = 1
+            work = [[start, offsets[start]]]
+            while work:
+                frame = work[-1]
+                node, edge = frame
+                if edge < offsets[node + 1]:
+                    frame[1] = edge + 1
+                    target = targets[edge]
+                    if index[target] == -1:
+                        index[target] = low[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack[target] = 1
+                        work.append([target, offsets[target]])
+                    elif on_stack[target] and index[target] < low[node]:
+                        low[node] = index[target]
+                    continue
+                work.pop()
+                if work and low[node] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[node]
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        self._components = components
+        return components
+
+    def cycles(self) -> List[List[str]]:
+        """Get each group of mutually importing modules, largest first"""
+        groups = [sorted(self.modules[m] for m in component)
+                  for component in self.strongly_connected_components() if len(component) > 1]
+        return sorted(groups, key=lambda group: (-len(group), group))
+
+    def layers(self) -> List[List[str]]:
+        """Group modules by dependency depth; layer 0 imports no internal module.
+
+        Modules in an import cycle share the layer of their component.
+        """
+        components = self.strongly_connected_components()
+        component_of = [0] * len(self.modules)
+        for number, component in enumerate(components):
+            for member in component:
+                component_of[member] = number
+        offsets, targets = self.offsets, self.targets
+        depth = [0] * len(components)
+        # Tarjan emits a component only after every component it reaches
+        for number, component in enumerate(components):
+            for member in component:
+                for target in targets[offsets[member]:offsets[member + 1]]:
+                    other = component_of[target]
+                    if other != number and depth[other] + 1 > depth[number]:
+                        depth[number] = depth[other] + 1
+        layers: List[List[str]] = [[] for _ in range(max(depth, default=-1) + 1)]
+        for number, component in enumerate(components):
+            layers[depth[number]].extend(self.modules[m] for m in component)
+        return [sorted(layer) for layer in layers]
+
+    def to_dict(self) -> Dict:
+        """Convert to dictionary"""
+        return {
+            'module_count': len(self.modules),
+            'edge_count': self.edge_count,
+            'dependencies': {name: self.dependencies(name) for name in self.modules},
+            'external': self.external,
+            'cycles': self.cycles(),
+            'layers': self.layers(),
+        }
+
+    @classmethod
+    def build(cls, imports: Dict[str, List[ImportRecord]],
+              root_path: Optional[str] = None) -> 'ImportGraph':
+        """Build the graph of the analyzed Python files under root_path"""
+        files = sorted(f for f in imports if f.endswith('.py'))
+        if root_path:
+            prefix = os.path.join(root_path, '')
+            files = [f for f in files if f.startswith(prefix)]
+        elif files:
+            # The outermost directory that is not itself a package
+            root_path = os.path.commonpath([os.path.dirname(f) for f in files])
+            while os.path.join(root_path, '__init__.py') in imports:
+                root_path = os.path.dirname(root_path)
+        index = ModuleIndex(files)
+        node_of = {file_path: node for node, file_path in enumerate(files)}
+
+        offsets = array('I', [0])
+        targets = array('I')
+        external: Dict[str, List[str]] = {}
+        for file_path in files:
+            seen: Set[int] = set()
+            outside: Set[str] = set()
+            for record in imports[file_path]:
+                found = None
+                if record.name is None:
+                    found = index.find_longest(file_path, record.module, 0)
+                else:
+                    if record.name != '*':
+                        submodule = '.'.join(filter(None, [record.module, record.name]))
+                        found = index.find(file_path, submodule, record.level)
+                    if found is None:
+                        found = index.find(file_path, record.module, record.level)
+                if found is not None:
+                    target = node_of[found]
+                    if found != file_path and target not in seen:
+                        seen.add(target)
+                        targets.append(target)
+                elif record.level == 0 and record.module:
+                    outside.add(record.module.split('.')[0])
+            offsets.append(len(targets))
+            if outside:
+                external[module_name(file_path, root_path)] = sorted(outside)
+
+        modules = [module_name(f, root_path) for f in files]
+        return cls(modules, files, offsets, targets, external)
@@ -0,0 +1,123 @@
+"""
+Incremental Analysis - Re-analyzes only the files changed since the last run
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional, Tuple
+from .code_analyzer import ANALYZER_VERSION, CodeAnalyzer, jac_backend
+from .utils import FileAnalysis, FileNode, FileSource, get_cache_dir, normalize_repo_url
+
+
+class AnalysisStateStore:
+    """Persists the last analyzed commit and entity set per repository"""
+
+    def __init__(self, state_dir: Optional[str] = None):
+        self.state_dir = state_dir or os.path.join(get_cache_dir(), "analysis_state")
+
+    def _state_path(self, repo_url: str) -> str:
+        """Get the state file for a repository"""
+        digest = hashlib.sha1(normalize_repo_url(repo_url).encode('utf-8')).hexdigest()
+        return os.path.join(self.state_dir, f"{digest}.json")
+
+    def load(self, repo_url: str) -> Optional[Dict]:
+        """Load the stored state for a repository, if any"""
+        try:
+            with open(self._state_path(repo_url), 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('analyzer_version') != ANALYZER_VERSION:
+            return None
+        return state
+
+    def save(self, repo_url: str, state: Dict) -> None:
+        """Atomically replace the stored state for a repository"""
+        os.makedirs(self.state_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(tmp_path, self._state_path(repo_url))
+
+    def delete(self, repo_url: str) -> None:
+        """Forget the stored state for a repository"""
+        try:
+            os.remove(self._state_path(repo_url))
+        except OSError:
+            pass
+
+
+def analyze_incremental(analyzer: CodeAnalyzer, file_tree: Optional[FileNode], repo_root: str,
+                        blob_shas: Dict[str, str], head_commit: Optional[str],
+                        previous: Optional[Dict],
+                        source: Optional[FileSource] = None) -> Tuple[Dict, Dict]:
+    """Analyze a repository, reusing the analyses of files unchanged since previous.
+
+    Files are compared by git blob SHA, so the previous commit does not need
+    to be present in the (shallow) clone. Returns the analysis result, shaped
+    like CodeAnalyzer.analyze_repository, and the new state to store.
+    """
+    if not file_tree:
+        return {}, {}
+
+    backend = jac_backend(analyzer.use_jac_parser)
+    # Stored analyses from the other JAC backend cannot be reused
+    same_backend = previous and previous.get('jac_backend') == backend
+    previous_files = previous.get('files', {}) if same_backend else {}
+    code_files = analyzer._collect_code_nodes(file_tree)
+
+    per_file: List[Optional[FileAnalysis]] = []
+    changed: List[Tuple[int, str, int]] = []
+    added, modified = [], []
+    seen = set()
+    for node in code_files:
+        rel_path = os.path.relpath(node.path, repo_root)
+        seen.add(rel_path)
+        blob = blob_shas.get(rel_path)
+        stored = previous_files.get(rel_path)
+        if blob and stored and stored['blob'] == blob:
+            analysis = FileAnalysis.from_dict(stored['analysis'], node.path)
+            analyzer._record_analysis(node.path, analysis)
+            per_file.append(analysis)
+        else:
+            (modified if stored else added).append(rel_path)
+            changed.append((len(per_file), node.path, node.size))
+            per_file.append(None)
+    deleted = sorted(set(previous_files) - seen)
+
+    results = analyzer.analyze_files([(path, size) for _, path, size in changed], source)
+    for (index, _, _), analysis in zip(changed, results):
+        per_file[index] = analysis
+
+    all_entities = []
+    files_state = {}
+    for node, analysis in zip(code_files, per_file):
+        all_entities.extend(analysis.entities)
+        rel_path = os.path.relpath(node.path, repo_root)
+        blob = blob_shas.get(rel_path)
+        if blob:
+            files_state[rel_path] = {'blob': blob, 'analysis': analysis.to_dict()}
+
+    result = {
+        'entities': [e.to_dict() for e in all_entities],
+        'entity_count': len(all_entities),
+        'file_count': len(code_files),
+        'byte_count': sum(node.size for node in code_files),
+        'incremental': {
+            'base_commit': previous.get('commit') if previous else None,
+            'head_commit': head_commit,
+            'added': added,
+            'modified': modified,
+            'deleted': deleted,
+            'reused': len(code_files) - len(changed),
+        },
+    }
+    state = {
+        'analyzer_version': ANALYZER_VERSION,
+        'jac_backend': backend,
+        'commit': head_commit,
+        'files': files_state,
+    }
+    return result, state
@@ -0,0 +1,145 @@
+"""
+Jac Parser - Entity extraction with the jaclang compiler's own parser
+"""
+
+import threading
+from collections.abc import Sequence
+from typing import Dict, List, Optional
+from .utils import CodeEntity, FileAnalysis, LanguageType
+
+# Larger files go straight to the regex scan; the parser runs at ~50 KB/s
+JAC_PARSER_MAX_BYTES = 512 * 1024
+
+ARCHETYPE_TYPES = {
+    'KW_NODE': 'node',
+    'KW_WALKER': 'walker',
+    'KW_EDGE': 'edge',
+    'KW_OBJECT': 'object',
+    'KW_CLASS': 'class',
+}
+
+_uni = None
+_JacParser = None
+_program = None
+_loaded: Optional[bool] = None
+# jaclang's parser keeps per-parse state on the class and the program
+_lock = threading.Lock()
+
+
+def jaclang_available() -> bool:
+    """Import jaclang on first use and report whether it is installed"""
+    global _uni, _JacParser, _program, _loaded
+    if _loaded is None:
+        with _lock:
+            if _loaded is None:
+                try:
+                    import jaclang.compiler.unitree as uni
+                    from jaclang.compiler.parser import JacParser
+                    from jaclang.compiler.program import JacProgram
+                    _uni, _JacParser, _program = uni, JacParser, JacProgram()
+                    _loaded = True
+                except Exception:
+                    _loaded = False
+    return _loaded
+
+
+def extract_jac(content: str, file_path: str, analysis: FileAnalysis) -> bool:
+    """Fill analysis from the jaclang AST.
+
+    Returns False, leaving analysis untouched, when jaclang is missing or
+    the source does not parse.
+    """
+    if not jaclang_available():
+        return False
+    with _lock:
+        try:
+            parser = _JacParser(root_ir=_uni.Source(content, file_path), prog=_program)
+        finally:
+            # The shared program collects alerts from every parse
+            _program.errors_had.clear()
+            _program.warnings_had.clear()
+    module = parser.ir_out
+    if parser.errors_had or module is None or module.has_syntax_errors:
+        return False
+    entities: List[CodeEntity] = []
+    _JacEntityCollector(content, file_path, entities).collect(module.body, None)
+    analysis.entities.extend(entities)
+    return True
+
+
+class _JacEntityCollector:
+    """Turns archetypes, abilities, has-fields and enums into entities"""
+
+    def __init__(self, content: str, file_path: str, entities: List[CodeEntity]):
+        self.lines = content.split('\n')
+        self.file_path = file_path
+        self.entities = entities
+        self.seen: Dict[str, int] = {}
+
+    def collect(self, body: Sequence, parent: Optional[str]) -> None:
+        """Collect the declarations in a module or archetype body"""
+        uni = _uni
+        for item in body:
+            if isinstance(item, uni.Archetype):
+                entity_type = ARCHETYPE_TYPES.get(item.arch_type.name, 'object')
+                qualified = self._add(item, item.name.value, entity_type, parent,
+                                      self._header(item))
+                if isinstance(item.body, Sequence):
+                    self.collect(item.body, qualified)
+            elif isinstance(item, uni.Enum):
+                self._add(item, item.name.value, 'enum', parent, self._header(item))
+            elif isinstance(item, uni.Ability):
+                name = item.name_ref.sym_name
+                if name.startswith('__ability_'):
+                    continue  # anonymous 'with entry' blocks
+                modifiers = [flag for flag, enabled in (
+                    ('async', item.is_async), ('static', item.is_static),
+                    ('abstract', item.is_abstract), ('override', item.is_override),
+                ) if enabled]
+                self._add(item, name, 'ability', parent, self._header(item), modifiers)
+            elif isinstance(item, uni.ArchHas):
+                modifiers = ['static'] if item.is_static else []
+                for var in item.vars:
+                    type_tag = var.type_tag.tag.unparse() if var.type_tag else ""
+                    self._add(var, var.name.value, 'field', parent,
+                              f"has {var.name.value}: {type_tag}", modifiers)
+
+    def _add(self, node, name: str, entity_type: str, parent: Optional[str],
+             signature: str, modifiers: Optional[List[str]] = None) -> str:
+        """Record a declaration and return its unique qualified name"""
+        qualified = f"{parent}.{name}" if parent else name
+        count = self.seen.get(qualified, 0) + 1
+        self.seen[qualified] = count
+        if count > 1:
+            qualified = f"{qualified}#{count}"
+        doc = getattr(node, 'doc', None)
+        self.entities.append(CodeEntity(
+            name=name,
+            entity_type=entity_type,
+            file_path=self.file_path,
+            line_number=node.loc.first_line,
+            end_line=node.loc.last_line,
+            language=LanguageType.JAC,
+            docstring=doc.lit_value if doc is not None else "",
+            signature=signature,
+            modifiers=tuple(modifiers or ()),
+            parent_entity=parent,
+            qualified_name=qualified,
+        ))
+        return qualified
+
+    def _header(self, node) -> str:
+        """Declaration header as written, e.g. 'walker Greeter :Base:'"""
+        first = node.loc.first_line - 1
+        if not 0 <= first < len(self.lines):
+            return ""
+        line = self.lines[first]
+        # Skip a leading docstring or decorator line
+        for offset in range(first, min(node.loc.last_line, len(self.lines))):
+            text = self.lines[offset].strip()
+            if text and not text.startswith(('"', "'", '@')):
+                line = text
+                break
+        for stop in ('{', ';'):
+            line = line.split(stop, 1)[0]
+        return line.strip()
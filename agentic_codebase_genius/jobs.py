@@ -0,0 +1,329 @@
+"""
+Jobs - Persistent job queue and worker pool for repository processing
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError
+from enum import Enum
+from typing import Callable, Dict, List, Optional, Set
+from .metrics import MetricsRegistry, RunMetrics
+from .profiling import ProfileConfig
+from .singleflight import SingleFlight, flight_key
+from .supervisor import CodeGeniusSupervisor
+from .utils import get_cache_dir
+
+DEFAULT_WORKERS = 2
+
+
+class JobStatus(Enum):
+    """Lifecycle states of a job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised at a stage boundary when a running job was cancelled"""
+
+
+class JobStore:
+    """SQLite-backed record of every submitted job"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.path.join(get_cache_dir(), "jobs.sqlite")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, repo_url TEXT NOT NULL, status TEXT NOT NULL, "
+            "stage TEXT, stages TEXT NOT NULL, message TEXT, output_file TEXT, "
+            "created REAL NOT NULL, started REAL, finished REAL, metrics TEXT, profile INTEGER)"
+        )
+        # Databases from older versions lack the later columns
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, column_type in (('metrics', 'TEXT'), ('profile', 'INTEGER')):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, created)")
+        self._conn.commit()
+
+    def add(self, repo_url: str, profile: Optional[bool] = None) -> str:
+        """Record a new queued job and return its ID"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, repo_url, status, stages, created, profile) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, repo_url, JobStatus.QUEUED.value, "[]", time.time(), profile),
+            )
+            self._conn.commit()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Get a job as a dictionary"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, status: Optional[JobStatus] = None) -> List[Dict]:
+        """List jobs, oldest first, optionally only those in one status"""
+        with self._lock:
+            if status:
+                rows = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created", (status.value,)
+                ).fetchall()
+            else:
+                rows = self._conn.execute("SELECT * FROM jobs ORDER BY created").fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def claim_next(self) -> Optional[Dict]:
+        """Mark the oldest queued job as running and return it"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created LIMIT 1",
+                (JobStatus.QUEUED.value,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, started = ? WHERE id = ?",
+                (JobStatus.RUNNING.value, time.time(), row['id']),
+            )
+            self._conn.commit()
+        return self.get(row['id'])
+
+    def start_stage(self, job_id: str, stage: str) -> None:
+        """Record that a running job entered a stage"""
+        with self._lock:
+            row = self._conn.execute("SELECT stages FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            stages = json.loads(row['stages'])
+            stages.append([stage, time.time()])
+            self._conn.execute(
+                "UPDATE jobs SET stage = ?, stages = ? WHERE id = ?",
+                (stage, json.dumps(stages), job_id),
+            )
+            self._conn.commit()
+
+    def finish(self, job_id: str, status: JobStatus, message: str,
+               output_file: Optional[str] = None, metrics: Optional[Dict] = None) -> None:
+        """Record the outcome of a job, with the metrics of its run if measured"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, message = ?, output_file = ?, finished = ?, "
+                "metrics = ? WHERE id = ?",
+                (status.value, message, output_file, time.time(),
+                 json.dumps(metrics) if metrics else None, job_id),
+            )
+            self._conn.commit()
+
+    def cancel_queued(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, message = ?, finished = ? "
+                "WHERE id = ? AND status = ?",
+                (JobStatus.CANCELLED.value, "Cancelled before start", time.time(),
+                 job_id, JobStatus.QUEUED.value),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def requeue_interrupted(self) -> int:
+        """Put jobs left running by a previous process back in the queue"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, stage = NULL, stages = '[]', started = NULL "
+                "WHERE status = ?",
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        """Convert a database row to a job dictionary"""
+        job = dict(row)
+        job['stages'] = [{'name': name, 'started': started}
+                         for name, started in json.loads(job['stages'])]
+        job['metrics'] = json.loads(job['metrics']) if job['metrics'] else None
+        job['profile'] = None if job['profile'] is None else bool(job['profile'])
+        return job
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._conn.close()
+
+
+class JobManager:
+    """Runs submitted repositories on a pool of worker threads.
+
+    Jobs are persisted in a JobStore before they are queued, so a new
+    manager on the same database picks up work that was queued, or left
+    running, when the previous one stopped. Workers share one supervisor
+    unless supervisor_factory supplies one per job.
+
+    Jobs for a repository that is already being processed attach to that
+    run instead of starting another, and all of them get its result. When
+    the supervisor has a metrics registry, each job also keeps the metrics
+    of its run.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, db_path: Optional[str] = None,
+                 output_dir: str = "./docs",
+                 supervisor_factory: Optional[Callable[[], CodeGeniusSupervisor]] = None,
+                 metrics: Optional[MetricsRegistry] = None,
+                 profiling: Optional[ProfileConfig] = None):
+        if workers < 1:
+            raise ValueError("A job manager needs at least one worker")
+        self.store = JobStore(db_path)
+        if supervisor_factory is None:
+            supervisor = CodeGeniusSupervisor(output_dir, metrics=metrics, profiling=profiling)
+            supervisor_factory = lambda: supervisor
+        self.supervisor_factory = supervisor_factory
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self.flights = SingleFlight()
+        # Cancel events of running jobs, and the jobs attached to each flight
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._attached: Dict[tuple, Set[str]] = {}
+        self.store.requeue_interrupted()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"codebase-genius-job-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, repo_url: str, profile: Optional[bool] = None) -> str:
+        """Queue a repository for processing and return the job ID.
+
+        profile=True profiles the job's stages next to its documentation;
+        by default the supervisor's profiling sample rate decides.
+        """
+        job_id = self.store.add(repo_url, profile)
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Get the status, stage progress and result of a job"""
+        return self.store.get(job_id)
+
+    def list_jobs(self, status: Optional[JobStatus] = None) -> List[Dict]:
+        """List jobs, oldest first"""
+        return self.store.list(status)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job.
+
+        Queued jobs are cancelled at once. A running job detaches from its
+        run at once; the run itself stops at its next stage boundary once no
+        job is attached to it. Returns False if the job is unknown or finished.
+        """
+        if self.store.cancel_queued(job_id):
+            return True
+        with self._wakeup:
+            cancel = self._cancel_events.get(job_id)
+        if cancel is None:
+            return False
+        cancel.set()
+        return True
+
+    def wait(self, job_id: str, timeout: Optional[float] = None,
+             poll_interval: float = 0.05) -> Optional[Dict]:
+        """Poll until a job finishes or the timeout passes, returning the job"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        finished = {status.value for status in FINISHED_STATUSES}
+        while True:
+            job = self.store.get(job_id)
+            if job is None or job['status'] in finished:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(poll_interval)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop taking new jobs; queued jobs stay queued for the next manager"""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+            self.store.close()
+
+    def _work(self) -> None:
+        """Worker loop: claim the oldest queued job and run it"""
+        while True:
+            with self._wakeup:
+                if self._stopping:
+                    return
+                job = self.store.claim_next()
+                if job is None:
+                    self._wakeup.wait()
+                    continue
+                cancel = self._cancel_events[job['id']] = threading.Event()
+            self._run(job, cancel)
+
+    def _run(self, job: Dict, cancel: threading.Event) -> None:
+        """Run one claimed job, or attach it to the run already processing its repository"""
+        job_id = job['id']
+        key = flight_key(job['repo_url'])
+        with self._wakeup:
+            self._attached.setdefault(key, set()).add(job_id)
+
+        def process(cancelled: threading.Event):
+            def on_stage(stage: str) -> None:
+                with self._wakeup:
+                    attached = [attached_id for attached_id in self._attached.get(key, ())
+                                if not self._cancel_events[attached_id].is_set()]
+                if cancelled.is_set() or not attached:
+                    raise JobCancelled(job['repo_url'])
+                for attached_id in attached:
+                    self.store.start_stage(attached_id, stage)
+
+            supervisor = self.supervisor_factory()
+            # Profiled jobs are measured too, so their profile files are reported
+            measured = supervisor.metrics is not None or job['profile']
+            run_metrics = RunMetrics(job['repo_url']) if measured else None
+            result = supervisor.process_repository(job['repo_url'], on_stage, run_metrics,
+                                                   job['profile'])
+            return result + (run_metrics.to_dict() if run_metrics else None,)
+
+        cancelled = False
+        try:
+            success, message, output_file, metrics = self.flights.do(key, process, cancel=cancel)
+        except CancelledError:
+            # Also raised by futures cancelled elsewhere, e.g. on pool shutdown
+            cancelled = True
+            success, message, output_file, metrics = False, "Cancelled while running", None, None
+        except Exception as e:
+            success, message, output_file = False, f"Error processing repository: {str(e)}", None
+            metrics = None
+        finally:
+            with self._wakeup:
+                del self._cancel_events[job_id]
+                attached = self._attached[key]
+                attached.discard(job_id)
+                if not attached:
+                    del self._attached[key]
+        if cancelled or cancel.is_set():
+            self.store.finish(job_id, JobStatus.CANCELLED, "Cancelled while running")
+        elif success:
+            self.store.finish(job_id, JobStatus.SUCCEEDED, message, output_file, metrics)
+        else:
+            self.store.finish(job_id, JobStatus.FAILED, message, metrics=metrics)
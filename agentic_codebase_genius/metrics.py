@@ -0,0 +1,219 @@
+"""
+Metrics - Per-stage timing, resource use and throughput of pipeline runs
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - non-POSIX hosts report no peak RSS
+    resource = None
+
+# Stages whose wall time throughput rates are measured against
+ANALYSIS_STAGES = ('map', 'analyze')
+
+PROMETHEUS_PREFIX = "codebase_genius"
+
+
+def _cpu_seconds() -> float:
+    """CPU time of this process and its reaped children (pool workers, git)"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far"""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 if os.uname().sysname == 'Darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _rate(count: int, seconds: float) -> float:
+    """Items per second, 0 when nothing was timed"""
+    return count / seconds if seconds > 0 else 0.0
+
+
+class RunMetrics:
+    """Measurements of one process_repository call.
+
+    CPU time and peak RSS are process-wide, so runs that overlap on other
+    threads are included in each other's numbers.
+    """
+
+    def __init__(self, repo_url: str):
+        self.repo_url = repo_url
+        self.started = time.time()
+        self.success: Optional[bool] = None
+        self.stages: List[Dict] = []
+        self.file_count = 0
+        self.byte_count = 0
+        self.entity_count = 0
+        self.parse_cache_hits = 0
+        self.parse_cache_misses = 0
+        self.result_store_hit: Optional[bool] = None
+        self.profile_files: List[str] = []
+        # Stages left out of CPU profiling because another run was being profiled
+        self.cpu_profile_skipped: List[str] = []
+        self._wall_start = time.perf_counter()
+        self._cpu_start = _cpu_seconds()
+        self._stage_start: Optional[tuple] = None
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+
+    def start_stage(self, name: str) -> None:
+        """Close the current stage, if any, and start timing the next"""
+        self._close_stage()
+        self._stage_start = (name, time.perf_counter(), _cpu_seconds())
+
+    def _close_stage(self) -> None:
+        """Record the stage being timed"""
+        if self._stage_start is None:
+            return
+        name, wall_start, cpu_start = self._stage_start
+        self.stages.append({
+            'name': name,
+            'wall_seconds': time.perf_counter() - wall_start,
+            'cpu_seconds': _cpu_seconds() - cpu_start,
+            'peak_rss_bytes': peak_rss_bytes(),
+        })
+        self._stage_start = None
+
+    def record_counts(self, data: Dict) -> None:
+        """Take file, byte and entity counts from the combined analysis data"""
+        self.file_count = data.get('file_count', 0)
+        self.byte_count = data.get('byte_count', 0)
+        self.entity_count = data.get('entity_count', 0)
+
+    def finish(self, success: bool) -> None:
+        """Close the last stage and the run"""
+        self._close_stage()
+        self.success = success
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.cpu_seconds = _cpu_seconds() - self._cpu_start
+
+    def analysis_seconds(self) -> float:
+        """Wall time spent mapping and analyzing"""
+        return sum(stage['wall_seconds'] for stage in self.stages
+                   if stage['name'] in ANALYSIS_STAGES)
+
+    def to_dict(self) -> Dict:
+        """Convert to a JSON-serializable dictionary"""
+        seconds = self.analysis_seconds()
+        lookups = self.parse_cache_hits + self.parse_cache_misses
+        return {
+            'repo_url': self.repo_url,
+            'started': self.started,
+            'success': self.success,
+            'wall_seconds': self.wall_seconds,
+            'cpu_seconds': self.cpu_seconds,
+            'peak_rss_bytes': peak_rss_bytes(),
+            'stages': self.stages,
+            'files': self.file_count,
+            'bytes': self.byte_count,
+            'entities': self.entity_count,
+            'files_per_second': _rate(self.file_count, seconds),
+            'bytes_per_second': _rate(self.byte_count, seconds),
+            'entities_per_second': _rate(self.entity_count, seconds),
+            'cache': {
+                'parse_cache_hits': self.parse_cache_hits,
+                'parse_cache_misses': self.parse_cache_misses,
+                'parse_cache_hit_ratio': self.parse_cache_hits / lookups if lookups else 0.0,
+                'result_store_hit': self.result_store_hit,
+            },
+            'profile_files': self.profile_files,
+            'cpu_profile_skipped': self.cpu_profile_skipped,
+        }
+
+
+class MetricsRegistry:
+    """Totals over every recorded run, exported as Prometheus text and JSON lines"""
+
+    def __init__(self, log_path: Optional[str] = None):
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self.runs = {'success': 0, 'failure': 0}
+        self.stage_runs: Dict[str, int] = {}
+        self.stage_wall: Dict[str, float] = {}
+        self.stage_cpu: Dict[str, float] = {}
+        self.files = 0
+        self.bytes = 0
+        self.entities = 0
+        self.parse_cache_hits = 0
+        self.parse_cache_misses = 0
+        self.result_store_hits = 0
+        self.result_store_lookups = 0
+
+    def record(self, run: RunMetrics) -> Dict:
+        """Add a finished run to the totals and the log, returning its dictionary"""
+        data = run.to_dict()
+        with self._lock:
+            self.runs['success' if run.success else 'failure'] += 1
+            for stage in run.stages:
+                name = stage['name']
+                self.stage_runs[name] = self.stage_runs.get(name, 0) + 1
+                self.stage_wall[name] = self.stage_wall.get(name, 0.0) + stage['wall_seconds']
+                self.stage_cpu[name] = self.stage_cpu.get(name, 0.0) + stage['cpu_seconds']
+            self.files += run.file_count
+            self.bytes += run.byte_count
+            self.entities += run.entity_count
+            self.parse_cache_hits += run.parse_cache_hits
+            self.parse_cache_misses += run.parse_cache_misses
+            if run.result_store_hit is not None:
+                self.result_store_lookups += 1
+                self.result_store_hits += run.result_store_hit
+            if self.log_path:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(data, separators=(',', ':')) + '\n')
+        return data
+
+    def to_prometheus(self) -> str:
+        """Render the totals in the Prometheus text exposition format"""
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: Dict[str, float]) -> None:
+            full_name = f"{PROMETHEUS_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for labels, value in samples.items():
+                lines.append(f"{full_name}{labels} {value}")
+
+        def by_stage(values: Dict) -> Dict[str, float]:
+            return {f'{{stage="{name}"}}': value for name, value in sorted(values.items())}
+
+        with self._lock:
+            metric("runs_total", "counter", "Repository runs by outcome",
+                   {f'{{outcome="{outcome}"}}': count for outcome, count in self.runs.items()})
+            metric("stage_runs_total", "counter", "Times each stage ran",
+                   by_stage(self.stage_runs))
+            metric("stage_wall_seconds_total", "counter", "Wall time spent in each stage",
+                   by_stage(self.stage_wall))
+            metric("stage_cpu_seconds_total", "counter", "Process CPU time spent in each stage",
+                   by_stage(self.stage_cpu))
+            metric("analyzed_files_total", "counter", "Code files analyzed", {'': self.files})
+            metric("analyzed_bytes_total", "counter", "Bytes of code analyzed", {'': self.bytes})
+            metric("entities_total", "counter", "Code entities extracted", {'': self.entities})
+            metric("parse_cache_hits_total", "counter", "Parse cache hits",
+                   {'': self.parse_cache_hits})
+            metric("parse_cache_misses_total", "counter", "Parse cache misses",
+                   {'': self.parse_cache_misses})
+            metric("result_store_hits_total", "counter", "Runs served from the result store",
+                   {'': self.result_store_hits})
+            metric("result_store_lookups_total", "counter", "Result store lookups",
+                   {'': self.result_store_lookups})
+        rss = peak_rss_bytes()
+        if rss is not None:
+            metric("peak_rss_bytes", "gauge", "Peak resident set size of the process", {'': rss})
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str) -> None:
+        """Atomically write a Prometheus text snapshot, e.g. for the node exporter"""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
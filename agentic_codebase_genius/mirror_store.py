@@ -0,0 +1,231 @@
+"""
+Mirror Store - Persistent bare-mirror clones shared across repository jobs
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from .utils import get_cache_dir, normalize_repo_url
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts only get in-process locking
+    fcntl = None
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024 * 1024
+
+
+def _directory_size(path: str) -> int:
+    """Sum the sizes of all files below a directory"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class MirrorStore:
+    """Manages bare mirrors keyed by normalized repository URL"""
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_mirrors: Optional[int] = None, timeout: int = 600):
+        self.root = root or os.path.join(get_cache_dir(), "mirrors")
+        self.max_bytes = max_bytes
+        self.max_mirrors = max_mirrors
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._active: Dict[str, int] = {}
+        os.makedirs(self.root, exist_ok=True)
+
+    def _key(self, repo_url: str) -> str:
+        """Get the storage key for a repository"""
+        return hashlib.sha1(normalize_repo_url(repo_url).encode('utf-8')).hexdigest()
+
+    def mirror_path(self, repo_url: str) -> str:
+        """Get the bare mirror directory for a repository"""
+        return os.path.join(self.root, f"{self._key(repo_url)}.git")
+
+    def _meta_path(self, key: str) -> str:
+        """Get the metadata file for a mirror"""
+        return os.path.join(self.root, f"{key}.json")
+
+    @contextmanager
+    def _locked(self, key: str) -> Iterator[None]:
+        """Serialize work on one mirror across threads and processes"""
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.root, f"{key}.lock"), 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _git(self, *args: str) -> subprocess.CompletedProcess:
+        """Run a git command with the store's timeout"""
+        return subprocess.run(["git", *args], capture_output=True, text=True,
+                              timeout=self.timeout)
+
+    def ensure_mirror(self, repo_url: str) -> Tuple[bool, str]:
+        """Create or update the mirror for a repository"""
+        key = self._key(repo_url)
+        with self._locked(key):
+            success, result = self._update(key, repo_url)
+        if success:
+            self.enforce_quota(keep=key)
+        return success, result
+
+    def acquire_mirror(self, repo_url: str) -> Tuple[bool, str]:
+        """Update the mirror and hold it, safe from eviction, until release_mirror"""
+        key = self._key(repo_url)
+        with self._locked(key):
+            success, result = self._update(key, repo_url)
+            if success:
+                self._add_active(key, 1)
+        if success:
+            self.enforce_quota(keep=key)
+        return success, result
+
+    def release_mirror(self, repo_url: str) -> None:
+        """Drop a hold taken with acquire_mirror"""
+        self._add_active(self._key(repo_url), -1)
+
+    def _add_active(self, key: str, delta: int) -> None:
+        """Count users of a mirror in this process"""
+        with self._lock:
+            self._active[key] = max(self._active.get(key, 0) + delta, 0)
+
+    def _update(self, key: str, repo_url: str) -> Tuple[bool, str]:
+        """Clone or fetch a mirror; the caller holds its lock"""
+        path = self.mirror_path(repo_url)
+        if os.path.isdir(path):
+            result = self._git("--git-dir", path, "fetch", "--prune", "--quiet", "origin")
+            if result.returncode != 0:
+                return False, f"Git fetch failed: {result.stderr}"
+        else:
+            staging = f"{path}.partial"
+            shutil.rmtree(staging, ignore_errors=True)
+            result = self._git("clone", "--mirror", "--quiet", "--", repo_url, staging)
+            if result.returncode != 0:
+                shutil.rmtree(staging, ignore_errors=True)
+                return False, f"Git clone failed: {result.stderr}"
+            os.rename(staging, path)
+        self._write_meta(key, repo_url, path)
+        return True, path
+
+    def _write_meta(self, key: str, repo_url: str, path: str) -> None:
+        """Record usage time and size of a mirror"""
+        meta = {
+            'repo_url': normalize_repo_url(repo_url),
+            'last_used': time.time(),
+            'size': _directory_size(path),
+        }
+        with open(self._meta_path(key), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    def add_worktree(self, repo_url: str, dest: str, ref: str = "HEAD") -> Tuple[bool, str]:
+        """Fetch the mirror and check out ref into dest as a detached worktree"""
+        key = self._key(repo_url)
+        # Fetch and attach under one lock so the mirror cannot be evicted in between
+        with self._locked(key):
+            success, result = self._update(key, repo_url)
+            if not success:
+                return False, result
+            result = self._git("--git-dir", self.mirror_path(repo_url), "worktree", "add",
+                               "--detach", "--quiet", dest, ref)
+            if result.returncode != 0:
+                return False, f"Git worktree failed: {result.stderr}"
+            self._add_active(key, 1)
+        self.enforce_quota(keep=key)
+        return True, dest
+
+    def remove_worktree(self, repo_url: str, dest: str) -> None:
+        """Detach a worktree from its mirror and delete it"""
+        key = self._key(repo_url)
+        path = self.mirror_path(repo_url)
+        with self._locked(key):
+            self._git("--git-dir", path, "worktree", "remove", "--force", dest)
+            shutil.rmtree(dest, ignore_errors=True)
+            self._git("--git-dir", path, "worktree", "prune")
+            self._add_active(key, -1)
+
+    def _has_worktrees(self, key: str) -> bool:
+        """Check whether any process still has a worktree on a mirror"""
+        worktrees = os.path.join(self.root, f"{key}.git", "worktrees")
+        return os.path.isdir(worktrees) and bool(os.listdir(worktrees))
+
+    def _in_use(self, key: str) -> bool:
+        """Check whether a mirror has worktrees in this or another process"""
+        with self._lock:
+            active = self._active.get(key)
+        return bool(active) or self._has_worktrees(key)
+
+    def _read_meta(self, key: str) -> Optional[Dict]:
+        """Read a mirror's metadata, tagged with its key; None if unreadable"""
+        try:
+            with open(self._meta_path(key), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        meta['key'] = key
+        return meta
+
+    def list_mirrors(self) -> List[Dict]:
+        """List mirrors with their metadata, least recently used first"""
+        mirrors = []
+        for name in os.listdir(self.root):
+            if not name.endswith('.json'):
+                continue
+            meta = self._read_meta(name[:-len('.json')])
+            if meta is not None:
+                mirrors.append(meta)
+        return sorted(mirrors, key=lambda m: m.get('last_used', 0))
+
+    def enforce_quota(self, keep: Optional[str] = None) -> List[str]:
+        """Evict least recently used mirrors until within quota.
+
+        Mirrors with live worktrees and the mirror named by keep are never
+        evicted. Returns the evicted repository URLs.
+        """
+        return self._evict(self.list_mirrors(), keep)
+
+    def _evict(self, mirrors: List[Dict], keep: Optional[str]) -> List[str]:
+        """Evict from a listing, least recently used first, skipping mirrors used since"""
+        total = sum(m.get('size', 0) for m in mirrors)
+        count = len(mirrors)
+        evicted = []
+        for meta in mirrors:
+            over_size = total > self.max_bytes
+            over_count = self.max_mirrors is not None and count > self.max_mirrors
+            if not (over_size or over_count):
+                break
+            key = meta['key']
+            if key == keep or self._in_use(key):
+                continue
+            with self._locked(key):
+                # A job may have fetched or attached to the mirror since it was listed
+                if self._in_use(key) or self._read_meta(key) != meta:
+                    continue
+                shutil.rmtree(os.path.join(self.root, f"{key}.git"), ignore_errors=True)
+                try:
+                    os.remove(self._meta_path(key))
+                except OSError:
+                    pass
+            total -= meta.get('size', 0)
+            count -= 1
+            evicted.append(meta.get('repo_url'))
+        return evicted
@@ -0,0 +1,155 @@
+"""
+Parse Cache - Content-addressed on-disk cache of per-file analysis results
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from .utils import FileAnalysis, get_cache_dir
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Access times are written back in batches so cache hits stay read-only
+TOUCH_BATCH_SIZE = 256
+
+
+def git_blob_sha(data: bytes) -> str:
+    """Compute the git blob SHA-1 of file content"""
+    header = f"blob {len(data)}\0".encode()
+    return hashlib.sha1(header + data).hexdigest()
+
+
+class ParseCache:
+    """SQLite-backed cache of file analyses keyed by file content"""
+
+    def __init__(self, db_path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db_path = db_path or os.path.join(get_cache_dir(), "parse_cache.sqlite")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, payload BLOB NOT NULL, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+        self._conn.commit()
+        self._total_bytes = self._stored_bytes()
+
+    @staticmethod
+    def make_key(blob_sha: str, kind: str, version: str) -> str:
+        """Build a cache key from a blob SHA, analyzer kind and version"""
+        return f"{version}:{kind}:{blob_sha}"
+
+    def get(self, key: str, file_path: str) -> Optional[FileAnalysis]:
+        """Look up a cached analysis, rebinding its entities to file_path"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= TOUCH_BATCH_SIZE:
+                self._flush_touched()
+        return FileAnalysis.from_dict(json.loads(row[0]), file_path)
+
+    def put(self, key: str, analysis: FileAnalysis) -> None:
+        """Store an analysis for a key, evicting old entries if over budget"""
+        payload = json.dumps(analysis.to_dict(), separators=(',', ':')).encode('utf-8')
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, payload, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, payload, len(payload), time.time()),
+            )
+            self._conn.commit()
+            # Upper bound (replaced rows are not subtracted); trued up before evicting
+            self._total_bytes += len(payload)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def record_lookups(self, hits: int, misses: int) -> None:
+        """Add lookups made through another connection, such as a pool worker's"""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def flush(self) -> None:
+        """Write pending access times to disk"""
+        with self._lock:
+            self._flush_touched()
+
+    def _flush_touched(self) -> None:
+        """Write batched access times back to the database"""
+        if not self._touched:
+            return
+        self._conn.executemany(
+            "UPDATE entries SET last_access = ? WHERE key = ?",
+            [(ts, key) for key, ts in self._touched.items()],
+        )
+        self._conn.commit()
+        self._touched.clear()
+
+    def _stored_bytes(self) -> int:
+        """Sum the payload sizes currently stored"""
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under max_bytes"""
+        total = self._total_bytes = self._stored_bytes()
+        if total <= self.max_bytes:
+            return
+        self._flush_touched()
+        # Trim to 90% so a full cache does not evict on every insert
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall()
+        victims = []
+        for key, size in rows:
+            if total <= target:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self._conn.commit()
+        self._total_bytes = total
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'entries': count,
+            'bytes': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Remove all cached entries"""
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def close(self) -> None:
+        """Flush pending access times and close the database"""
+        with self._lock:
+            self._flush_touched()
+            self._conn.close()
@@ -0,0 +1,181 @@
+"""
+Pipeline - Streaming repository processing from file discovery to doc data
+"""
+
+import queue
+import threading
+from typing import Dict, Iterable, Iterator, List, Tuple, TypeVar
+from .code_analyzer import CodeAnalyzer
+from .doc_genie import KEY_ENTITY_LIMIT
+from .extractors import analyzable_extensions
+from .import_graph import ImportGraph
+from .repo_mapper import ENTRY_POINT_FILES, RepoMapper
+from .utils import FileAnalysis, FileNode, ImportRecord, LanguageType
+
+# Execution modes understood by the supervisor
+EXECUTION_MODES = ('batch', 'streaming', 'pipelined')
+
+ENTRY_POINT_LIMIT = 5
+
+# Items buffered between two pipelined stages before the producer blocks
+STAGE_QUEUE_SIZE = 256
+
+# How often a blocked producer checks whether its consumer went away
+_PUT_POLL_SECONDS = 0.1
+
+_DONE = object()
+
+T = TypeVar('T')
+
+
+class RepositoryAggregate:
+    """Running totals that stand in for the file tree and the entity list.
+
+    Memory grows with what the documentation shows (a few entities, entry
+    points, counters) plus the Python import records the dependency graph
+    needs, not with the number of files or entities.
+    """
+
+    def __init__(self):
+        self.language_counts: Dict[LanguageType, int] = {}
+        self.entry_points: List[str] = []
+        self.file_count = 0
+        self.byte_count = 0
+        self.entity_count = 0
+        self.key_entities: List[Dict] = []
+        self.imports: Dict[str, List[ImportRecord]] = {}
+
+    def add_file(self, node: FileNode) -> None:
+        """Count a discovered file"""
+        if node.language != LanguageType.UNKNOWN:
+            self.language_counts[node.language] = self.language_counts.get(node.language, 0) + 1
+        if node.name in ENTRY_POINT_FILES and len(self.entry_points) < ENTRY_POINT_LIMIT:
+            self.entry_points.append(node.path)
+
+    def add_analysis(self, file_path: str, analysis: FileAnalysis) -> None:
+        """Fold one analyzed code file into the totals"""
+        self.file_count += 1
+        self.entity_count += len(analysis.entities)
+        for entity in analysis.entities[:KEY_ENTITY_LIMIT - len(self.key_entities)]:
+            self.key_entities.append(entity.to_dict())
+        if file_path.endswith('.py'):
+            self.imports[file_path] = analysis.imports
+
+    def primary_language(self) -> LanguageType:
+        """Most common language, ties going to the one seen first"""
+        if not self.language_counts:
+            return LanguageType.UNKNOWN
+        return max(self.language_counts.items(), key=lambda item: item[1])[0]
+
+    def to_dict(self) -> Dict:
+        """Convert to the fields DocGenie reads"""
+        return {
+            'primary_language': self.primary_language().value,
+            'entry_points': self.entry_points,
+            'entities': self.key_entities,
+            'entity_count': self.entity_count,
+            'file_count': self.file_count,
+            'byte_count': self.byte_count,
+        }
+
+
+def _code_files(nodes: Iterator[FileNode], aggregate: RepositoryAggregate) -> Iterator[Tuple[str, int]]:
+    """Count every file and pass on the analyzable ones as (path, size)"""
+    extensions = analyzable_extensions()
+    for node in nodes:
+        aggregate.add_file(node)
+        if node.name.lower().endswith(extensions):
+            aggregate.byte_count += node.size
+            yield node.path, node.size
+
+
+def _document_data(repo_mapper: RepoMapper, aggregate: RepositoryAggregate) -> Dict:
+    """Combine the aggregate with the README and the import graph"""
+    data = aggregate.to_dict()
+    data['repo_path'] = repo_mapper.repo_path
+    data['readme'] = repo_mapper.summarize_readme(repo_mapper.read_readme())
+    if repo_mapper.repo_path:
+        data['import_graph'] = ImportGraph.build(aggregate.imports, repo_mapper.repo_path).to_dict()
+    return data
+
+
+def run_streaming(repo_mapper: RepoMapper, analyzer: CodeAnalyzer) -> Dict:
+    """Map, analyze and aggregate a cloned repository as one lazy chain.
+
+    Each file is analyzed as soon as it is listed and folded into a
+    RepositoryAggregate, so no tree or entity list is held. Returns the
+    data DocGenie needs, like the batch pipeline minus 'file_tree'.
+    """
+    aggregate = RepositoryAggregate()
+    nodes = repo_mapper.iter_files()
+    files = _code_files(nodes, aggregate)
+    for file_path, analysis in analyzer.iter_analyses(files, repo_mapper.source, record=False):
+        aggregate.add_analysis(file_path, analysis)
+    return _document_data(repo_mapper, aggregate)
+
+
+def run_pipelined(repo_mapper: RepoMapper, analyzer: CodeAnalyzer,
+                  queue_size: int = STAGE_QUEUE_SIZE) -> Dict:
+    """Like run_streaming, but with the stages overlapped on threads.
+
+    The tree walk and the analysis each run on their own thread, handing
+    results on through bounded queues, while aggregation runs here. A
+    stage that gets ahead blocks on its full queue, so memory stays
+    bounded when analysis falls behind the walk. Analysis only leaves the
+    GIL when the analyzer has more than one worker.
+    """
+    aggregate = RepositoryAggregate()
+    nodes = threaded(repo_mapper.iter_files(), queue_size, "codebase-genius-walk")
+    files = _code_files(nodes, aggregate)
+    results = threaded(analyzer.iter_analyses(files, repo_mapper.source, record=False),
+                       queue_size, "codebase-genius-analyze")
+    for file_path, analysis in results:
+        aggregate.add_analysis(file_path, analysis)
+    return _document_data(repo_mapper, aggregate)
+
+
+def threaded(items: Iterable[T], queue_size: int, name: str = "codebase-genius-stage") -> Iterator[T]:
+    """Produce items on a background thread and yield them through a bounded queue.
+
+    Errors raised by the producer are re-raised here. Closing the returned
+    generator stops the producer and closes its iterator.
+    """
+    handoff: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put(entry: tuple) -> bool:
+        while not stop.is_set():
+            try:
+                handoff.put(entry, timeout=_PUT_POLL_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce() -> None:
+        iterator = iter(items)
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((_DONE, None))
+        except BaseException as e:
+            put((_DONE, e))
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = handoff.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,204 @@
+"""
+Profiling - Opt-in per-stage cProfile and tracemalloc dumps for pipeline runs
+"""
+
+import cProfile
+import os
+import pstats
+import random
+import threading
+import tracemalloc
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Call paths below this many microseconds are left out of collapsed stacks
+MIN_COLLAPSED_MICROSECONDS = 1
+
+# cProfile covers the whole interpreter on Python 3.12+, so stages are profiled one at a time
+_cpu_profile_lock = threading.Lock()
+
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_started = False
+
+
+@dataclass(frozen=True)
+class ProfileConfig:
+    """What to profile, and for which fraction of runs"""
+    cpu: bool = True
+    memory: bool = False
+    sample_rate: float = 1.0
+    top_allocations: int = 25
+
+    def sample(self) -> bool:
+        """Decide whether to profile one run"""
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+
+def _acquire_tracing() -> None:
+    """Start tracemalloc unless it is already tracing"""
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+        _tracing_users += 1
+
+
+def _release_tracing() -> None:
+    """Stop tracemalloc once the last profiler that started it is done"""
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+
+
+def _frame_label(func: Tuple[str, int, str]) -> str:
+    """Label a pstats function key for a collapsed stack"""
+    file_name, line, name = func
+    if file_name == '~':
+        return name
+    return f"{name}@{os.path.basename(file_name)}:{line}"
+
+
+def collapsed_stacks(stats: pstats.Stats) -> Dict[str, int]:
+    """Rebuild call paths from a profile's caller graph, in microseconds of self time.
+
+    cProfile keeps only caller/callee pairs, so time is split along each
+    path in proportion to the cumulative time of its edges. Recursive calls
+    are folded into their first frame.
+    """
+    raw = stats.stats
+    children: Dict[tuple, List[Tuple[tuple, float]]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((func, edge[3]))
+    labels = {func: _frame_label(func) for func in raw}
+
+    stacks: Dict[str, int] = {}
+    pending = [((func,), raw[func][3]) for func, entry in raw.items() if not entry[4]]
+    while pending:
+        path, weight = pending.pop()
+        func = path[-1]
+        total_time, cumulative = raw[func][2], raw[func][3]
+        if cumulative <= 0:
+            continue
+        own = int(weight * total_time / cumulative * 1e6)
+        if own:
+            key = ';'.join(labels[frame] for frame in path)
+            stacks[key] = stacks.get(key, 0) + own
+        for child, edge_time in children.get(func, ()):
+            child_weight = weight * edge_time / cumulative
+            if child not in path and child_weight * 1e6 >= MIN_COLLAPSED_MICROSECONDS:
+                pending.append((path + (child,), child_weight))
+    return stacks
+
+
+class StageProfiler:
+    """Profiles one run stage by stage, writing files named after prefix.
+
+    Only one stage in the process is CPU-profiled at a time; a stage that
+    starts while another run's stage holds the profiler is listed in
+    cpu_skipped_stages instead. Up to Python 3.11 cProfile only sees the
+    thread that runs the stages, so work on pipelined stage threads shows
+    up as waiting time. From 3.12 it sees every thread, so a profile also
+    includes whatever other runs did meanwhile. Pool processes are never
+    included. tracemalloc is process-wide while any profiler uses it.
+    """
+
+    def __init__(self, config: ProfileConfig, output_dir: str, prefix: str):
+        self.config = config
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.files: List[str] = []
+        self.cpu_skipped_stages: List[str] = []
+        self._stage: Optional[str] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        if config.memory:
+            _acquire_tracing()
+
+    def start_stage(self, name: str) -> None:
+        """Write out the current stage, if any, and start profiling the next"""
+        self._close_stage()
+        self._stage = name
+        if self.config.memory:
+            tracemalloc.reset_peak()
+            self._snapshot = self._take_snapshot()
+        if self.config.cpu:
+            self._profile = self._start_cpu_profile()
+            if self._profile is None:
+                self.cpu_skipped_stages.append(name)
+
+    def finish(self) -> List[str]:
+        """Write out the last stage and return every file written"""
+        self._close_stage()
+        if self.config.memory:
+            _release_tracing()
+        return self.files
+
+    @staticmethod
+    def _start_cpu_profile() -> Optional[cProfile.Profile]:
+        """Start a cProfile session, or return None if another is running"""
+        if not _cpu_profile_lock.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # A profiler outside this module is active
+            _cpu_profile_lock.release()
+            return None
+        return profile
+
+    def _path(self, stage: str, suffix: str) -> str:
+        """Build the output path for one stage's file"""
+        return os.path.join(self.output_dir, f"{self.prefix}.{stage}.{suffix}")
+
+    def _close_stage(self) -> None:
+        """Stop profiling the current stage and write its files"""
+        if self._stage is None:
+            return
+        stage, self._stage = self._stage, None
+        profile, self._profile = self._profile, None
+        if profile is not None:
+            profile.disable()
+            _cpu_profile_lock.release()
+        os.makedirs(self.output_dir, exist_ok=True)
+        if profile is not None:
+            stats_path = self._path(stage, "pstats")
+            profile.dump_stats(stats_path)
+            self.files.append(stats_path)
+            collapsed_path = self._path(stage, "collapsed")
+            stacks = collapsed_stacks(pstats.Stats(profile))
+            with open(collapsed_path, 'w', encoding='utf-8') as f:
+                for stack, microseconds in sorted(stacks.items()):
+                    f.write(f"{stack} {microseconds}\n")
+            self.files.append(collapsed_path)
+        if self._snapshot is not None:
+            self.files.append(self._write_allocations(stage, self._snapshot))
+            self._snapshot = None
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        """Snapshot traced memory, leaving out tracemalloc's own allocations"""
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def _write_allocations(self, stage: str, before: tracemalloc.Snapshot) -> str:
+        """Write the lines that allocated the most memory during a stage"""
+        _, peak = tracemalloc.get_traced_memory()
+        differences = self._take_snapshot().compare_to(before, 'lineno')
+        path = self._path(stage, "allocations.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"Stage {stage}: traced memory peaked at {peak / 1024:.1f} KiB\n\n")
+            for rank, stat in enumerate(differences[:self.config.top_allocations], 1):
+                frame = stat.traceback[0]
+                f.write(f"#{rank} {frame.filename}:{frame.lineno}: "
+                        f"{stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks), "
+                        f"{stat.size / 1024:.1f} KiB held\n")
+        return path
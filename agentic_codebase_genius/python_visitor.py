@@ -0,0 +1,144 @@
+"""
+Python Visitor - Single-pass, scope-aware extraction from Python ASTs
+"""
+
+import ast
+from typing import Dict, List, Optional, Tuple
+from .utils import CallSite, CodeEntity, FileAnalysis, ImportRecord, LanguageType
+
+
+def dotted_name(node: ast.AST) -> Optional[str]:
+    """Render a Name/Attribute chain such as 'os.path.join', else None"""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return '.'.join(reversed(parts))
+
+
+class PythonScopeVisitor(ast.NodeVisitor):
+    """Collects entities, imports and call sites in one traversal.
+
+    Qualified names follow Python's __qualname__ ('Outer.method',
+    'func.<locals>.helper'); repeated definitions get a '#n' suffix so
+    every entity in a file has a unique name.
+    """
+
+    def __init__(self, file_path: str, analysis: FileAnalysis):
+        self.file_path = file_path
+        self.analysis = analysis
+        # (qualified name, kind) of each enclosing class or function
+        self.scopes: List[Tuple[str, str]] = []
+        self.seen: Dict[str, int] = {}
+
+    def _qualify(self, name: str) -> str:
+        """Build a unique qualified name for a definition in the current scope"""
+        if not self.scopes:
+            qualified = name
+        else:
+            parent, kind = self.scopes[-1]
+            qualified = f"{parent}.{name}" if kind == 'class' else f"{parent}.<locals>.{name}"
+        count = self.seen.get(qualified, 0) + 1
+        self.seen[qualified] = count
+        return qualified if count == 1 else f"{qualified}#{count}"
+
+    def _add_entity(self, node: ast.AST, entity_type: str, signature: str,
+                    modifiers: List[str]) -> str:
+        """Record a definition and return its qualified name"""
+        qualified = self._qualify(node.name)
+        self.analysis.entities.append(CodeEntity(
+            name=node.name,
+            entity_type=entity_type,
+            file_path=self.file_path,
+            line_number=node.lineno,
+            end_line=node.end_lineno or node.lineno,
+            language=LanguageType.PYTHON,
+            docstring=ast.get_docstring(node) or "",
+            signature=signature,
+            modifiers=tuple(modifiers),
+            parent_entity=self.scopes[-1][0] if self.scopes else None,
+            qualified_name=qualified,
+        ))
+        return qualified
+
+    def _visit_all(self, nodes: List[ast.AST]) -> None:
+        """Visit a list of nodes in the current scope"""
+        for node in nodes:
+            self.visit(node)
+
+    def _decorators(self, node: ast.AST) -> List[str]:
+        """Names of decorators, e.g. 'staticmethod' or 'app.route'"""
+        names = []
+        for decorator in node.decorator_list:
+            target = decorator.func if isinstance(decorator, ast.Call) else decorator
+            names.append(dotted_name(target) or ast.unparse(target))
+        return names
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._visit_all(node.decorator_list)
+        self._visit_all(node.bases)
+        self._visit_all(node.keywords)
+        bases = [ast.unparse(b) for b in node.bases + node.keywords]
+        signature = f"class {node.name}({', '.join(bases)})" if bases else f"class {node.name}"
+        qualified = self._add_entity(node, 'class', signature, self._decorators(node))
+        self.scopes.append((qualified, 'class'))
+        self._visit_all(node.body)
+        self.scopes.pop()
+
+    def _visit_function(self, node: ast.AST, is_async: bool) -> None:
+        self._visit_all(node.decorator_list)
+        self.visit(node.args)
+        if node.returns:
+            self.visit(node.returns)
+        in_class = bool(self.scopes) and self.scopes[-1][1] == 'class'
+        modifiers = (['async'] if is_async else []) + self._decorators(node)
+        signature = f"{'async ' if is_async else ''}def {node.name}({ast.unparse(node.args)})"
+        if node.returns:
+            signature += f" -> {ast.unparse(node.returns)}"
+        qualified = self._add_entity(node, 'method' if in_class else 'function',
+                                     signature, modifiers)
+        self.scopes.append((qualified, 'function'))
+        self._visit_all(node.body)
+        self.scopes.pop()
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._visit_function(node, is_async=False)
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
+        self._visit_function(node, is_async=True)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self.analysis.imports.append(ImportRecord(
+                module=alias.name,
+                name=None,
+                alias=alias.asname or alias.name.split('.')[0],
+                level=0,
+                line_number=node.lineno,
+            ))
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        for alias in node.names:
+            self.analysis.imports.append(ImportRecord(
+                module=node.module or "",
+                name=alias.name,
+                alias=alias.asname or alias.name,
+                level=node.level or 0,
+                line_number=node.lineno,
+            ))
+
+    def visit_Call(self, node: ast.Call) -> None:
+        callee = dotted_name(node.func)
+        if callee:
+            caller = self.scopes[-1][0] if self.scopes else ""
+            self.analysis.calls.append(CallSite(caller=caller, callee=callee,
+                                                line_number=node.lineno))
+        self.generic_visit(node)
+
+
+def extract_python(content: str, file_path: str, analysis: FileAnalysis) -> None:
+    """Parse Python source and fill analysis with its entities, imports and calls"""
+    PythonScopeVisitor(file_path, analysis).visit(ast.parse(content))
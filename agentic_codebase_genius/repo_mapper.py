@@ -5,55 +5,257 @@ Repository Mapper - Clones and analyzes repository structure
 import os
 import tempfile
 import subprocess
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 try:
-    from utils import FileNode, build_file_tree, LanguageType
+    from utils import FileNode, iter_files, scan_file_tree, scan_file_tree_parallel, LanguageType, ANALYZABLE_EXTENSIONS, IGNORE_PATTERNS
+    from mirror_store import MirrorStore
+    from git_objects import GitTreeSource, build_file_tree_from_git, iter_git_files
+    from compact_tree import CompactFileTree, scan_compact_file_tree
 except ImportError:
-    from .utils import FileNode, build_file_tree, LanguageType
+    from .utils import FileNode, iter_files, scan_file_tree, scan_file_tree_parallel, LanguageType, ANALYZABLE_EXTENSIONS, IGNORE_PATTERNS
+    from .mirror_store import MirrorStore
+    from .git_objects import GitTreeSource, build_file_tree_from_git, iter_git_files
+    from .compact_tree import CompactFileTree, scan_compact_file_tree
+
+README_NAMES = ["README.md", "README.txt", "README"]
+
+ENTRY_POINT_FILES = ("main.py", "index.js", "app.py", "server.py", "start.js")
+
+# Lets local file:// remotes serve partial clones the way hosted remotes do
+FILTER_UPLOAD_PACK = "git -c uploadpack.allowFilter=true upload-pack"
+
+
+def sparse_checkout_patterns() -> List[str]:
+    """Build non-cone sparse-checkout patterns for analyzable files"""
+    patterns = [f"/{name}" for name in README_NAMES]
+    patterns += [f"*{ext}" for ext in ANALYZABLE_EXTENSIONS]
+    patterns += [f"!**/{name}/**" for name in sorted(IGNORE_PATTERNS)]
+    return patterns
+
+
+def check_clone_options(mirror_store: Optional[MirrorStore], checkout: bool, sparse: bool,
+                        max_file_size: Optional[int]) -> None:
+    """Reject option combinations that clone_repository cannot honor"""
+    if sparse and mirror_store is not None:
+        raise ValueError("Sparse clones cannot use a mirror store")
+    if sparse and not checkout:
+        raise ValueError("Sparse clones need a checkout")
+    if max_file_size is not None and not sparse:
+        raise ValueError("max_file_size is only applied to sparse clones")
 
 
 class RepoMapper:
     """Maps and analyzes repository structure"""
 
-    def __init__(self):
+    def __init__(self, mirror_store: Optional[MirrorStore] = None, checkout: bool = True,
+                 sparse: bool = False, max_file_size: Optional[int] = None,
+                 walk_workers: int = 0, compact_tree: bool = False):
+        check_clone_options(mirror_store, checkout, sparse, max_file_size)
         self.temp_dir = None
         self.repo_path = None
         self.file_tree = None
+        self.mirror_store = mirror_store
+        self.repo_url = None
+        self.worktree = None
+        # Without a checkout, repo_path is a virtual root and files come from git_dir
+        self.checkout = checkout
+        self.git_dir = None
+        # Without a checkout, the commit every tree and blob lookup is pinned to
+        self.rev = "HEAD"
+        self.mirror_held = False
+        self.source: Optional[GitTreeSource] = None
+        # Sparse mode clones blobless and checks out only analyzable files
+        self.sparse = sparse
+        self.max_file_size = max_file_size
+        self.skipped_files: List[str] = []
+        # Threads listing directories concurrently; 0 walks on one thread
+        self.walk_workers = walk_workers
+        # Store the tree as parallel arrays behind FileNode-compatible views
+        self.compact_tree = compact_tree
 
     def clone_repository(self, repo_url: str) -> Tuple[bool, str]:
         """Clone a Git repository"""
         try:
             self.temp_dir = tempfile.mkdtemp(prefix="codebase_genius_")
+            self.repo_url = repo_url
+            if self.sparse:
+                return self._sparse_clone(repo_url)
+            if self.mirror_store and self.checkout:
+                return self._checkout_from_mirror(repo_url)
+            if self.mirror_store:
+                # Held until cleanup so quota enforcement cannot evict it mid-run
+                success, result = self.mirror_store.acquire_mirror(repo_url)
+                if not success:
+                    return False, result
+                self.mirror_held = True
+                self.git_dir = result
+                self.repo_path = self.temp_dir
+                return self._pin_head()
+            clone_args = [] if self.checkout else ["--bare"]
             result = subprocess.run(
-                ["git", "clone", "--depth", "1", repo_url, self.temp_dir],
+                ["git", "clone", *clone_args, "--depth", "1", "--", repo_url, self.temp_dir],
                 capture_output=True,
                 text=True,
                 timeout=60,
             )
             if result.returncode == 0:
                 self.repo_path = self.temp_dir
+                if not self.checkout:
+                    self.git_dir = self.temp_dir
+                    return self._pin_head()
                 return True, self.temp_dir
             else:
                 return False, f"Git clone failed: {result.stderr}"
         except Exception as e:
             return False, f"Clone error: {str(e)}"
 
+    def _pin_head(self) -> Tuple[bool, str]:
+        """Resolve HEAD once, so later fetches into a shared mirror cannot move it"""
+        result = subprocess.run(self._git_command("rev-parse", "HEAD"),
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            return False, f"Git rev-parse failed: {result.stderr}"
+        self.rev = result.stdout.strip()
+        return True, self.temp_dir
+
+    def _checkout_from_mirror(self, repo_url: str) -> Tuple[bool, str]:
+        """Check out a worktree from the persistent mirror of a repository"""
+        success, result = self.mirror_store.add_worktree(repo_url, self.temp_dir)
+        if not success:
+            return False, result
+        self.worktree = self.temp_dir
+        self.repo_path = self.temp_dir
+        return True, self.temp_dir
+
+    def _sparse_clone(self, repo_url: str) -> Tuple[bool, str]:
+        """Blobless clone that checks out only analyzable files.
+
+        Blobs are fetched lazily at checkout, so only files matching the
+        sparse patterns are downloaded. Files above max_file_size are then
+        removed from the working tree so they are never mapped or analyzed.
+        """
+        upload_pack = ["-u", FILTER_UPLOAD_PACK] if repo_url.startswith("file://") else []
+        steps = [
+            ["git", "clone", *upload_pack, "--filter=blob:none", "--no-checkout",
+             "--depth", "1", "--", repo_url, self.temp_dir],
+            ["git", "-C", self.temp_dir, "sparse-checkout", "set", "--no-cone",
+             *sparse_checkout_patterns()],
+            ["git", "-C", self.temp_dir, "checkout", "--quiet"],
+        ]
+        if upload_pack:
+            steps.insert(1, ["git", "-C", self.temp_dir, "config",
+                             "remote.origin.uploadpack", FILTER_UPLOAD_PACK])
+        for command in steps:
+            result = subprocess.run(command, capture_output=True, text=True, timeout=60)
+            if result.returncode != 0:
+                return False, f"Git sparse clone failed: {result.stderr}"
+        self.repo_path = self.temp_dir
+        if self.max_file_size is not None:
+            self._drop_oversized_files()
+        return True, self.temp_dir
+
+    def _drop_oversized_files(self) -> None:
+        """Remove checked-out files larger than max_file_size"""
+        self.skipped_files = []
+        for root, dirs, files in os.walk(self.repo_path):
+            dirs[:] = [d for d in dirs if d != '.git']
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getsize(path) > self.max_file_size:
+                        os.remove(path)
+                        self.skipped_files.append(os.path.relpath(path, self.repo_path))
+                except OSError:
+                    pass
+
+    def _git_command(self, *args: str) -> List[str]:
+        """Build a git command against the clone or the object store"""
+        if self.git_dir:
+            return ["git", "--git-dir", self.git_dir, *args]
+        return ["git", "-C", self.repo_path, *args]
+
+    def get_head_commit(self) -> Optional[str]:
+        """Get the commit SHA checked out in the repository"""
+        if not self.repo_path:
+            return None
+        result = subprocess.run(
+            self._git_command("rev-parse", self.rev),
+            capture_output=True,
+            text=True,
+        )
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    def list_blob_shas(self) -> Dict[str, str]:
+        """Map repository-relative paths at HEAD to their git blob SHAs"""
+        if not self.repo_path:
+            return {}
+        result = subprocess.run(
+            self._git_command("ls-tree", "-r", "-z", self.rev),
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return {}
+        blobs = {}
+        for record in result.stdout.split('\0'):
+            if not record:
+                continue
+            info, path = record.split('\t', 1)
+            _, obj_type, sha = info.split()
+            if obj_type == 'blob':
+                blobs[path] = sha
+        return blobs
+
     def build_tree(self) -> Optional[FileNode]:
         """Build file tree from repository"""
         if not self.repo_path:
             return None
-        self.file_tree = build_file_tree(self.repo_path, max_depth=10)
+        if self.git_dir:
+            self.file_tree, blob_index = build_file_tree_from_git(
+                self.git_dir, self.repo_path, self.rev, max_depth=10)
+            self.source = GitTreeSource(self.git_dir, blob_index, rev=self.rev)
+        elif self.walk_workers > 0:
+            self.file_tree = scan_file_tree_parallel(self.repo_path, max_depth=10,
+                                                     max_workers=self.walk_workers)
+        elif self.compact_tree:
+            self.file_tree = scan_compact_file_tree(self.repo_path, max_depth=10)
+        else:
+            self.file_tree = scan_file_tree(self.repo_path, max_depth=10)
+        if self.compact_tree and isinstance(self.file_tree, FileNode):
+            self.file_tree = CompactFileTree.from_file_node(self.file_tree).root()
         return self.file_tree
 
+    def iter_files(self) -> Iterator[FileNode]:
+        """Stream the repository's file nodes without building a tree.
+
+        Without a checkout this sets up self.source before returning; its
+        blob index fills in as files are listed.
+        """
+        if not self.repo_path:
+            return iter(())
+        if self.git_dir:
+            self.source = GitTreeSource(self.git_dir, {}, self.repo_path, self.rev)
+            return self._iter_git_files(self.source.blob_index)
+        return iter_files(self.repo_path, max_depth=10)
+
+    def _iter_git_files(self, blob_index: Dict[str, str]) -> Iterator[FileNode]:
+        """Yield nodes from the object store, indexing their blobs"""
+        for node, sha in iter_git_files(self.git_dir, self.repo_path, self.rev, max_depth=10):
+            blob_index[node.path] = sha
+            yield node
+
     def read_readme(self) -> Optional[str]:
         """Read README file from repository"""
         if not self.repo_path:
             return None
         
-        readme_names = ["README.md", "README.txt", "README"]
-        for name in readme_names:
+        for name in README_NAMES:
             path = os.path.join(self.repo_path, name)
-            if os.path.isfile(path):
+            if self.source:
+                data = self.source.read(path)
+                if data is not None:
+                    return data.decode('utf-8', errors='ignore')
+            elif os.path.isfile(path):
                 try:
                     with open(path, 'r', encoding='utf-8', errors='ignore') as f:
                         return f.read()
@@ -78,10 +280,12 @@ class RepoMapper:
         if not self.repo_path:
             return entry_points
         
-        common_entry_files = ["main.py", "index.js", "app.py", "server.py", "start.js"]
+        if self.source:
+            paths = sorted(self.source.blob_index)
+            return [p for p in paths if os.path.basename(p) in ENTRY_POINT_FILES][:5]
         for root, dirs, files in os.walk(self.repo_path):
             for file in files:
-                if file in common_entry_files:
+                if file in ENTRY_POINT_FILES:
                     entry_points.append(os.path.join(root, file))
         
         return entry_points[:5]
@@ -123,6 +327,15 @@ class RepoMapper:
 
     def cleanup(self) -> None:
         """Clean up temporary files"""
+        if self.source:
+            self.source.close()
+            self.source = None
+        if self.worktree and self.mirror_store:
+            self.mirror_store.remove_worktree(self.repo_url, self.worktree)
+            self.worktree = None
+        if self.mirror_held:
+            self.mirror_store.release_mirror(self.repo_url)
+            self.mirror_held = False
         if self.temp_dir and os.path.exists(self.temp_dir):
             import shutil
             try:
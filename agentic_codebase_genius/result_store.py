@@ -0,0 +1,154 @@
+"""
+Result Store - Per-commit cache of complete analyses and rendered documentation
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from .utils import get_cache_dir, normalize_repo_url
+
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+class ResultStore:
+    """SQLite-backed store of pipeline results keyed by repository commit.
+
+    Entries expire ttl_seconds after they were stored; beyond max_bytes the
+    least recently used entries are evicted.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS):
+        self.db_path = db_path or os.path.join(get_cache_dir(), "results.sqlite")
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, repo_url TEXT NOT NULL, commit_sha TEXT NOT NULL, "
+            "version TEXT NOT NULL, payload BLOB NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_access REAL NOT NULL, hits INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_lru ON results (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(repo_url: str, commit: str, version: str) -> str:
+        """Build a key from a repository URL, commit SHA and pipeline version"""
+        digest = hashlib.sha1(normalize_repo_url(repo_url).encode('utf-8')).hexdigest()
+        return f"{version}:{digest}:{commit}"
+
+    def get(self, repo_url: str, commit: str, version: str) -> Optional[Dict]:
+        """Look up a stored result with 'analysis' and 'markdown' keys"""
+        key = self.make_key(repo_url, commit, version)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._expired(row[1], now):
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE results SET hits = hits + 1, last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, repo_url: str, commit: str, version: str,
+            analysis: Dict, markdown: str) -> None:
+        """Store the analysis and documentation of one commit"""
+        key = self.make_key(repo_url, commit, version)
+        payload = json.dumps({'analysis': analysis, 'markdown': markdown},
+                             separators=(',', ':')).encode('utf-8')
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results "
+                "(key, repo_url, commit_sha, version, payload, size, created, last_access, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, normalize_repo_url(repo_url), commit, version, payload, len(payload),
+                 now, now),
+            )
+            self._conn.commit()
+            self._evict(now)
+
+    def _expired(self, created: float, now: float) -> bool:
+        """Check whether an entry stored at created has outlived the TTL"""
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM results WHERE created < ?", (now - self.ttl_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total > self.max_bytes:
+            victims = []
+            for key, size in self._conn.execute(
+                    "SELECT key, size FROM results ORDER BY last_access").fetchall():
+                if total <= self.max_bytes:
+                    break
+                victims.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM results WHERE key = ?", victims)
+        self._conn.commit()
+
+    def purge_expired(self) -> None:
+        """Remove expired entries and enforce the size budget"""
+        with self._lock:
+            self._evict(time.time())
+
+    def entry_stats(self) -> List[Dict]:
+        """Per-entry statistics, most used first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT repo_url, commit_sha, version, size, created, last_access, hits "
+                "FROM results ORDER BY hits DESC, last_access DESC"
+            ).fetchall()
+        return [
+            {'repo_url': repo_url, 'commit': commit, 'version': version, 'bytes': size,
+             'created': created, 'last_access': last_access, 'hits': hits}
+            for repo_url, commit, version, size, created, last_access, hits in rows
+        ]
+
+    def get_stats(self) -> Dict:
+        """Get store statistics"""
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'entries': count,
+            'bytes': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Remove all stored results"""
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._conn.close()
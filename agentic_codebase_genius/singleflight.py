@@ -0,0 +1,116 @@
+"""
+Single Flight - Coalesces concurrent identical requests onto one execution
+"""
+
+import threading
+import time
+from concurrent.futures import CancelledError
+from typing import Callable, Dict, Hashable, Optional, Tuple, TypeVar
+from .utils import normalize_repo_url
+
+# How often a waiter with a cancel event checks it
+DEFAULT_POLL_SECONDS = 0.05
+
+T = TypeVar('T')
+
+
+def flight_key(repo_url: str, ref: str = "HEAD") -> Tuple[str, str]:
+    """Key repository requests so equivalent URL spellings coalesce"""
+    return normalize_repo_url(repo_url), ref
+
+
+class _Flight:
+    """One in-flight execution and the callers waiting on it"""
+
+    __slots__ = ('done', 'cancelled', 'waiters', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.cancelled = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Runs at most one execution per key; concurrent callers share its result.
+
+    The execution runs on its own thread, so each caller can stop waiting on
+    its own: on timeout it gets TimeoutError, and when its cancel event is
+    set it gets CancelledError. The execution keeps going for the remaining
+    callers; once none are left, the cancelled event handed to func is set
+    and later callers start a fresh execution.
+    """
+
+    def __init__(self, poll_interval: float = DEFAULT_POLL_SECONDS):
+        self.poll_interval = poll_interval
+        self.started = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, func: Callable[[threading.Event], T],
+           timeout: Optional[float] = None, cancel: Optional[threading.Event] = None) -> T:
+        """Run func(cancelled) for key, or wait for the run already in flight"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.started += 1
+            else:
+                self.coalesced += 1
+            flight.waiters += 1
+        if leader:
+            threading.Thread(target=self._run, args=(key, flight, func),
+                             name="codebase-genius-flight", daemon=True).start()
+        try:
+            self._wait(flight, timeout, cancel)
+        except BaseException:
+            self._leave(key, flight)
+            raise
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def in_flight(self) -> int:
+        """Number of keys with an execution new callers would join"""
+        with self._lock:
+            return len(self._flights)
+
+    def _run(self, key: Hashable, flight: _Flight, func: Callable[[threading.Event], T]) -> None:
+        """Execute func and publish its result to every waiter"""
+        try:
+            flight.result = func(flight.cancelled)
+        except BaseException as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    def _wait(self, flight: _Flight, timeout: Optional[float],
+              cancel: Optional[threading.Event]) -> None:
+        """Block until the flight finishes, the timeout passes or cancel is set"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not flight.done.is_set():
+            if cancel is not None and cancel.is_set():
+                raise CancelledError()
+            wait = self.poll_interval if cancel is not None else None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Gave up after {timeout} seconds")
+                wait = remaining if wait is None else min(wait, remaining)
+            flight.done.wait(wait)
+
+    def _leave(self, key: Hashable, flight: _Flight) -> None:
+        """Detach a waiter, cancelling the execution if it was the last one"""
+        with self._lock:
+            flight.waiters -= 1
+            if flight.waiters or flight.done.is_set():
+                return
+            flight.cancelled.set()
+            if self._flights.get(key) is flight:
+                del self._flights[key]
@@ -3,65 +3,259 @@ Supervisor - Orchestrates the documentation pipeline
 """
 
 import os
-import tempfile
-from typing import Dict, Tuple, Optional
-from .repo_mapper import RepoMapper
-from .code_analyzer import CodeAnalyzer
-from .doc_genie import DocGenie
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Tuple, Optional
+from .repo_mapper import RepoMapper, check_clone_options
+from .mirror_store import MirrorStore
+from .code_analyzer import ANALYZER_VERSION, CodeAnalyzer, jac_backend
+from .doc_genie import DOC_GENERATOR_VERSION, DocGenie
+from .git_objects import resolve_head_commit
+from .incremental import AnalysisStateStore, analyze_incremental
+from .metrics import MetricsRegistry, RunMetrics
+from .parse_cache import ParseCache
+from .pipeline import EXECUTION_MODES, run_pipelined, run_streaming
+from .profiling import ProfileConfig, StageProfiler
+from .result_store import ResultStore
+
+
+class JobContext:
+    """State owned by one process_repository call: the clone and its analysis"""
+
+    def __init__(self, repo_url: str, repo_mapper: RepoMapper,
+                 code_analyzer: CodeAnalyzer, doc_genie: DocGenie):
+        self.repo_url = repo_url
+        self.repo_name = repo_url.split('/')[-1].replace('.git', '')
+        self.repo_mapper = repo_mapper
+        self.code_analyzer = code_analyzer
+        self.doc_genie = doc_genie
+
+    def close(self) -> None:
+        """Remove the clone and drop everything collected for the run"""
+        self.repo_mapper.cleanup()
+        self.code_analyzer.clear()
 
 
 class CodeGeniusSupervisor:
-    """Orchestrates the entire documentation generation workflow"""
+    """Orchestrates the entire documentation generation workflow.
+
+    The supervisor only holds configuration and caches that are safe to
+    share (mirror store, parse cache, analysis state), so process_repository
+    may run on several threads at once. Each call works in its own JobContext.
+    """
 
-    def __init__(self, output_dir: str = "./docs"):
+    def __init__(self, output_dir: str = "./docs", incremental: bool = False,
+                 state_dir: Optional[str] = None, mirror_store: Optional[MirrorStore] = None,
+                 checkout: bool = True, sparse: bool = False,
+                 max_file_size: Optional[int] = None, walk_workers: int = 0,
+                 compact_tree: bool = False, execution_mode: str = "batch",
+                 cache: Optional[ParseCache] = None,
+                 result_store: Optional[ResultStore] = None,
+                 metrics: Optional[MetricsRegistry] = None,
+                 profiling: Optional[ProfileConfig] = None,
+                 analysis_workers: Optional[int] = 1, use_jac_parser: bool = False):
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {execution_mode}")
+        if incremental and execution_mode != "batch":
+            raise ValueError("Incremental analysis needs the batch execution mode")
+        check_clone_options(mirror_store, checkout, sparse, max_file_size)
         self.output_dir = output_dir
-        self.repo_mapper = RepoMapper()
-        self.code_analyzer = CodeAnalyzer()
-        self.doc_genie = DocGenie()
+        self.mirror_store = mirror_store
+        self.mapper_options = dict(checkout=checkout, sparse=sparse, max_file_size=max_file_size,
+                                   walk_workers=walk_workers, compact_tree=compact_tree)
+        # analysis_workers > 1, or None/0 for one per CPU, analyzes in a process pool
+        self.analyzer_options = dict(max_workers=analysis_workers, use_jac_parser=use_jac_parser)
+        self.cache = cache
         self.current_doc = None
+        self._lock = threading.Lock()
+        self.incremental = incremental
+        self.state_store = AnalysisStateStore(state_dir) if incremental else None
+        # 'streaming' analyzes files as they are listed instead of mapping first;
+        # 'pipelined' also runs the walk, analysis and aggregation concurrently
+        self.execution_mode = execution_mode
+        # Finished results per commit; the version covers whatever changes the output
+        self.result_store = result_store
+        self.result_version = (f"{ANALYZER_VERSION}:{DOC_GENERATOR_VERSION}:"
+                               f"{jac_backend(use_jac_parser)}:{max_file_size or ''}")
+        # Runs are only measured when a registry is set or run_metrics is passed
+        self.metrics = metrics
+        # Sampled runs are profiled stage by stage into output_dir
+        self.profiling = profiling
+
+    def process_repository(self, repo_url: str,
+                           on_stage: Optional[Callable[[str], None]] = None,
+                           run_metrics: Optional[RunMetrics] = None,
+                           profile: Optional[bool] = None
+                           ) -> Tuple[bool, str, Optional[str]]:
+        """Process a repository end-to-end, calling on_stage as each stage starts.
 
-    def process_repository(self, repo_url: str) -> Tuple[bool, str, Optional[str]]:
-        """Process a repository end-to-end"""
+        Stages are measured into run_metrics, which is created here when the
+        supervisor has a metrics registry, and recorded in that registry.
+        profile=True or False forces profiling on or off; by default runs
+        are sampled at the supervisor's profiling sample rate.
+        """
+        if run_metrics is None and self.metrics is not None:
+            run_metrics = RunMetrics(repo_url)
+        context = self.create_context(repo_url)
+        profiler = self._create_profiler(context, profile)
+        result: Tuple[bool, str, Optional[str]] = (False, "Processing did not finish", None)
         try:
-            # Stage 1: Clone and map
-            success, result = self.repo_mapper.clone_repository(repo_url)
-            if not success:
-                return False, f"Failed to clone repository: {result}", None
-            
-            # Build file tree
-            file_tree = self.repo_mapper.build_tree()
-            repo_summary = self.repo_mapper.get_repository_summary()
-            
-            # Stage 2: Analyze code
-            analysis_result = self.code_analyzer.analyze_repository(file_tree)
-            
-            # Stage 3: Generate documentation
-            combined_data = {**repo_summary, **analysis_result}
-            combined_data['repo_name'] = repo_url.split('/')[-1].replace('.git', '')
-            
-            doc_content = self.doc_genie.generate_documentation(combined_data)
-            
-            # Stage 4: Save output
-            os.makedirs(self.output_dir, exist_ok=True)
-            repo_name = combined_data['repo_name']
-            output_file = os.path.join(self.output_dir, f"{repo_name}_documentation.md")
-            
-            if self.doc_genie.save_documentation(output_file):
-                self.current_doc = output_file
-                return True, "Documentation generated successfully", output_file
-            else:
-                return False, "Failed to save documentation", None
-        
+            result = self._process(context, on_stage or (lambda stage: None), run_metrics, profiler)
         except Exception as e:
-            return False, f"Error processing repository: {str(e)}", None
+            result = (False, f"Error processing repository: {str(e)}", None)
         finally:
-            self.repo_mapper.cleanup()
+            if run_metrics:
+                # Counted per run, as other runs share the parse cache
+                run_metrics.parse_cache_hits = context.code_analyzer.cache_hits
+                run_metrics.parse_cache_misses = context.code_analyzer.cache_misses
+            context.close()
+            if profiler:
+                try:
+                    files = profiler.finish()
+                except Exception as e:
+                    files = []
+                    print(f"Error writing profile: {e}")
+                if run_metrics:
+                    run_metrics.profile_files = files
+                    run_metrics.cpu_profile_skipped = profiler.cpu_skipped_stages
+            if run_metrics:
+                run_metrics.finish(result[0])
+                if self.metrics:
+                    self.metrics.record(run_metrics)
+        return result
+
+    def _create_profiler(self, context: JobContext,
+                         profile: Optional[bool]) -> Optional[StageProfiler]:
+        """Create a profiler for the run if it is forced on or sampled"""
+        if profile is None:
+            profile = self.profiling is not None and self.profiling.sample()
+        if not profile:
+            return None
+        run_id = f"{time.strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        return StageProfiler(self.profiling or ProfileConfig(), self.output_dir,
+                             f"{context.repo_name}_profile_{run_id}")
+
+    def _process(self, context: JobContext, on_stage: Callable[[str], None],
+                 run_metrics: Optional[RunMetrics],
+                 profiler: Optional[StageProfiler]) -> Tuple[bool, str, Optional[str]]:
+        """Run the pipeline stages for one context"""
+        repo_url = context.repo_url
+
+        def measure(name: str) -> None:
+            if run_metrics:
+                run_metrics.start_stage(name)
+            if profiler:
+                profiler.start_stage(name)
+
+        def stage(name: str, measured_as: Optional[str] = None) -> None:
+            on_stage(name)
+            measure(measured_as or name)
+
+        # Stage 0: Serve a stored result for the current commit
+        if self.result_store:
+            stage("resolve")
+            commit = resolve_head_commit(repo_url)
+            stored = commit and self.result_store.get(repo_url, commit, self.result_version)
+            if run_metrics:
+                run_metrics.result_store_hit = bool(stored)
+            if stored:
+                stage("save")
+                context.doc_genie.doc_content = stored['markdown']
+                return self._save(context, "Documentation served from result store")
+
+        # Stage 1: Clone and map
+        stage("clone")
+        success, result = context.repo_mapper.clone_repository(repo_url)
+        if not success:
+            return False, f"Failed to clone repository: {result}", None
+        
+        # Stage 2: Analyze code
+        if self.execution_mode == "streaming":
+            stage("analyze")
+            combined_data = run_streaming(context.repo_mapper, context.code_analyzer)
+        elif self.execution_mode == "pipelined":
+            stage("analyze")
+            combined_data = run_pipelined(context.repo_mapper, context.code_analyzer)
+        else:
+            # Batch mode maps the whole tree first, so that is measured on its own
+            stage("analyze", measured_as="map")
+            combined_data = self._map_and_analyze(context, measure)
+        if run_metrics:
+            run_metrics.record_counts(combined_data)
+        
+        # Stage 3: Generate documentation
+        stage("document")
+        combined_data['repo_name'] = context.repo_name
+        
+        doc_content = context.doc_genie.generate_documentation(combined_data)
+        if self.result_store:
+            # Keyed by the commit actually cloned, in case HEAD moved since resolving
+            commit = context.repo_mapper.get_head_commit()
+            if commit:
+                self.result_store.put(repo_url, commit, self.result_version,
+                                      combined_data, doc_content)
+        
+        # Stage 4: Save output
+        stage("save")
+        return self._save(context, "Documentation generated successfully")
+
+    def _save(self, context: JobContext, message: str) -> Tuple[bool, str, Optional[str]]:
+        """Write the context's documentation to the output directory"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        output_file = os.path.join(self.output_dir, f"{context.repo_name}_documentation.md")
+        if context.doc_genie.save_documentation(output_file):
+            with self._lock:
+                self.current_doc = output_file
+            return True, message, output_file
+        return False, "Failed to save documentation", None
+
+    def create_context(self, repo_url: str) -> JobContext:
+        """Create the per-run mapper, analyzer and doc generator"""
+        return JobContext(repo_url,
+                          RepoMapper(self.mirror_store, **self.mapper_options),
+                          CodeAnalyzer(cache=self.cache, **self.analyzer_options),
+                          DocGenie())
+
+    def _map_and_analyze(self, context: JobContext,
+                         measure: Callable[[str], None] = lambda stage: None) -> Dict:
+        """Build the whole file tree, then analyze every code file in it"""
+        file_tree = context.repo_mapper.build_tree()
+        repo_summary = context.repo_mapper.get_repository_summary()
+        measure("analyze")
+        if self.state_store:
+            analysis_result = self._analyze_incremental(context, file_tree)
+        else:
+            analysis_result = context.code_analyzer.analyze_repository(
+                file_tree, context.repo_mapper.source)
+        if file_tree:
+            analysis_result['import_graph'] = context.code_analyzer.build_import_graph(
+                file_tree.path).to_dict()
+        return {**repo_summary, **analysis_result}
+
+    def _analyze_incremental(self, context: JobContext, file_tree) -> Dict:
+        """Analyze only files changed since the last stored run"""
+        analysis_result, state = analyze_incremental(
+            context.code_analyzer,
+            file_tree,
+            context.repo_mapper.repo_path,
+            context.repo_mapper.list_blob_shas(),
+            context.repo_mapper.get_head_commit(),
+            self.state_store.load(context.repo_url),
+            context.repo_mapper.source,
+        )
+        if state.get('commit'):
+            state['repo_url'] = context.repo_url
+            self.state_store.save(context.repo_url, state)
+        return analysis_result
 
     def get_documentation(self) -> Optional[str]:
-        """Get current documentation content"""
-        if self.current_doc and os.path.exists(self.current_doc):
+        """Get the documentation saved by the most recent successful run"""
+        with self._lock:
+            current_doc = self.current_doc
+        if current_doc and os.path.exists(current_doc):
             try:
-                with open(self.current_doc, 'r', encoding='utf-8') as f:
+                with open(current_doc, 'r', encoding='utf-8') as f:
                     return f.read()
             except Exception:
                 return None
@@ -2,15 +2,46 @@
 Test suite for Codebase Genius
 """
 
+import cProfile
+import gc
+import glob
+import json
+import re
 import sys
 import os
-sys.path.insert(0, os.path.dirname(__file__))
+import pstats
+import random
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils import FileNode, LanguageType, build_file_tree
-from repo_mapper import RepoMapper
-from code_analyzer import CodeAnalyzer
-from doc_genie import DocGenie
-from supervisor import CodeGeniusSupervisor
+from agentic_codebase_genius.utils import (
+    FileNode, ImportRecord, LanguageType, LineIndex, build_file_tree, get_language_from_extension,
+    scan_file_tree, scan_file_tree_parallel,
+)
+from agentic_codebase_genius.repo_mapper import RepoMapper
+from agentic_codebase_genius.code_analyzer import CodeAnalyzer
+from agentic_codebase_genius.doc_genie import DocGenie
+from agentic_codebase_genius.parse_cache import ParseCache
+from agentic_codebase_genius.incremental import analyze_incremental
+from agentic_codebase_genius.mirror_store import MirrorStore
+from agentic_codebase_genius.compact_tree import CompactFileTree, scan_compact_file_tree
+from agentic_codebase_genius.import_graph import ImportGraph
+from agentic_codebase_genius import extractors
+from agentic_codebase_genius.extractors import Extractor, get_extractor, register_extractor
+from agentic_codebase_genius.git_objects import GitBlobReader, resolve_head_commit
+from agentic_codebase_genius.jac_parser import jaclang_available
+from agentic_codebase_genius.jobs import JobManager, JobStatus, JobStore
+from agentic_codebase_genius.metrics import MetricsRegistry, RunMetrics
+from agentic_codebase_genius.pipeline import threaded
+from agentic_codebase_genius.profiling import ProfileConfig, StageProfiler, collapsed_stacks
+from agentic_codebase_genius.result_store import ResultStore
+from agentic_codebase_genius.singleflight import SingleFlight, flight_key
+from concurrent.futures import CancelledError
+from agentic_codebase_genius.supervisor import CodeGeniusSupervisor
 
 
 def test_file_tree():
@@ -21,15 +52,1081 @@ def test_file_tree():
     print(f"✓ File tree created: {tree.name}")
 
 
+def test_scan_file_tree():
+    """Test the scandir builder produces the same tree as build_file_tree"""
+    print("Testing scandir file tree...")
+    with tempfile.TemporaryDirectory() as root:
+        _write_sample_repo(root)
+        os.makedirs(os.path.join(root, "node_modules", "dep"))
+        deep = os.path.join(root, *[f"level{i}" for i in range(6)])
+        os.makedirs(deep)
+        with open(os.path.join(deep, ".hidden.py"), 'w') as f:
+            f.write("x = 1\n")
+        for max_depth in (10, 3, 0):
+            expected = build_file_tree(root, max_depth=max_depth)
+            assert scan_file_tree(root, max_depth=max_depth).to_dict() == expected.to_dict()
+    print("✓ scan_file_tree matched build_file_tree")
+
+
+def _sorted_tree(data):
+    """Sort a FileNode.to_dict() result by name at every level"""
+    data['children'] = sorted((_sorted_tree(c) for c in data['children']),
+                              key=lambda c: c['name'])
+    return data
+
+
+def test_parallel_file_tree():
+    """Test the concurrent walker builds a sorted, complete tree"""
+    print("Testing parallel file tree...")
+    with tempfile.TemporaryDirectory() as root:
+        _write_sample_repo(root, file_count=30)
+        os.makedirs(os.path.join(root, "pkg0", "node_modules"))
+        expected = _sorted_tree(scan_file_tree(root, max_depth=1).to_dict())
+        assert scan_file_tree_parallel(root, max_depth=1, max_workers=4).to_dict() == expected
+        expected = _sorted_tree(scan_file_tree(root).to_dict())
+        tree = scan_file_tree_parallel(root, max_workers=4)
+        assert tree.to_dict() == expected
+        assert all(c.parent is tree for c in tree.children)
+    print("✓ Parallel walker matched the sorted scandir tree")
+
+
+def test_compact_file_tree():
+    """Test the array-backed tree is a drop-in FileNode replacement"""
+    print("Testing compact file tree...")
+    with tempfile.TemporaryDirectory() as root:
+        _write_sample_repo(root)
+        os.makedirs(os.path.join(root, "build", "out"))
+        tree = scan_file_tree(root)
+        compact = scan_compact_file_tree(root)
+        assert compact.to_dict() == tree.to_dict()
+        assert CompactFileTree.from_file_node(tree).root().to_dict() == tree.to_dict()
+        assert CodeAnalyzer().analyze_repository(compact) == CodeAnalyzer().analyze_repository(tree)
+        assert compact.children[0].parent == compact
+
+        mapper = RepoMapper(compact_tree=True)
+        mapper.repo_path = root
+        mapper.build_tree()
+        assert mapper.identify_primary_language() == LanguageType.PYTHON
+        assert mapper.get_repository_summary()['file_tree'] == tree.to_dict()
+    print(f"✓ Compact tree matched FileNode tree ({len(compact.tree)} nodes)")
+
+
 def test_code_analyzer():
     """Test code analyzer"""
     print("Testing code analyzer...")
     analyzer = CodeAnalyzer()
     current_file = __file__
     entities = analyzer.analyze_python_file(current_file)
+
+    # Extensions are matched case-insensitively, as when collecting files
+    with tempfile.TemporaryDirectory() as root:
+        for name, content in (("Upper.PY", "def shout():\n    pass\n"),
+                              ("Graph.JAC", "walker Visit {\n}\n")):
+            with open(os.path.join(root, name), 'w') as f:
+                f.write(content)
+        data = CodeAnalyzer().analyze_repository(scan_file_tree(root))
+        assert data['file_count'] == 2
+        assert sorted(e['name'] for e in data['entities']) == ['Visit', 'shout']
     print(f"✓ Analyzer found {len(entities)} entities in test file")
 
 
+def test_jac_extraction():
+    """Test the single-scan JAC extractor and its line numbers"""
+    print("Testing JAC extraction...")
+    source = ("node Person {\n    has name: str;\n}\n\nedge Knows {}\n"
+              "obj Config {\n    def load() -> None;\n}\n"
+              "walker Greeter {\n    can greet with Person entry;\n}\n"
+              "# a subnode Fake is not a declaration\n")
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "graph.jac")
+        with open(path, 'w') as f:
+            f.write(source)
+        entities = CodeAnalyzer(use_jac_parser=False).analyze_jac_file(path)
+    found = [(e.name, e.entity_type, e.line_number) for e in entities]
+    assert found == [('Person', 'node', 1), ('Knows', 'edge', 5), ('Config', 'object', 6),
+                     ('load', 'ability', 7), ('Greeter', 'walker', 9), ('greet', 'ability', 10)]
+    lines = LineIndex("a\nbc\n\nd")
+    assert [lines.line_of(i) for i in range(7)] == [1, 1, 2, 2, 2, 3, 4]
+    print(f"✓ JAC extractor found {len(found)} declarations")
+
+
+def test_jac_parser():
+    """Test jaclang-based JAC extraction and its regex fallback"""
+    print("Testing jaclang parser backend...")
+    if not jaclang_available():
+        print("✓ jaclang not installed, regex extraction is used")
+        return
+    source = ('"""Greeting graph."""\n'
+              "# node Fake is only a comment\n"
+              "node Person {\n"
+              "    has name: str, age: int = 0;\n"
+              "    can greet with Greeter entry {\n"
+              '        print("walker Fake2");\n'
+              "    }\n"
+              "}\n"
+              "edge Knows { has since: int; }\n"
+              "walker Greeter {\n"
+              "    can start with `root entry { visit [-->]; }\n"
+              "}\n")
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "graph.jac")
+        with open(path, 'w') as f:
+            f.write(source)
+        broken = os.path.join(root, "broken.jac")
+        with open(broken, 'w') as f:
+            f.write("node Person {\nwalker Greeter {\n")
+        cache = ParseCache(os.path.join(root, "cache.sqlite"))
+        entities = CodeAnalyzer(cache=cache, use_jac_parser=True).analyze_jac_file(path)
+        cached = CodeAnalyzer(cache=cache, use_jac_parser=True).analyze_jac_file(path)
+        fallback = CodeAnalyzer(use_jac_parser=True).analyze_jac_file(broken)
+        cache.close()
+    found = [(e.qualified_name, e.entity_type, e.line_number, e.end_line) for e in entities]
+    assert found == [('Person', 'node', 3, 8), ('Person.name', 'field', 4, 4),
+                     ('Person.age', 'field', 4, 4), ('Person.greet', 'ability', 5, 7),
+                     ('Knows', 'edge', 9, 9), ('Knows.since', 'field', 9, 9),
+                     ('Greeter', 'walker', 10, 12), ('Greeter.start', 'ability', 11, 11)]
+    assert entities[1].signature == "has name: str"
+    assert entities[3].signature == "can greet with Greeter entry"
+    assert [e.to_dict() for e in cached] == [e.to_dict() for e in entities]
+    assert [(e.name, e.entity_type) for e in fallback] == [('Person', 'node'), ('Greeter', 'walker')]
+    print(f"✓ jaclang parser extracted {len(found)} declarations")
+
+
+def test_python_visitor():
+    """Test scope-aware extraction of entities, imports and calls"""
+    print("Testing Python visitor...")
+    source = (
+        "import os.path\n"
+        "from .models import Base as B\n"
+        "from ..shared import *\n"
+        "class Service(B):\n"
+        "    @staticmethod\n"
+        "    async def fetch(url: str) -> bytes:\n"
+        "        def parse(data):\n"
+        "            return data.strip()\n"
+        "        return parse(os.path.join(url))\n"
+        "def helper():\n"
+        "    pass\n"
+        "def helper():\n"
+        "    Service.fetch('x')\n"
+    )
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "service.py")
+        with open(path, 'w') as f:
+            f.write(source)
+        analyzer = CodeAnalyzer()
+        analysis = analyzer.analyze_source(path)
+    entities = {e.qualified_name: e for e in analysis.entities}
+    assert list(entities) == ['Service', 'Service.fetch', 'Service.fetch.<locals>.parse',
+                              'helper', 'helper#2']
+    fetch = entities['Service.fetch']
+    assert fetch.entity_type == 'method' and fetch.parent_entity == 'Service'
+    assert fetch.modifiers == ('async', 'staticmethod')
+    assert fetch.signature == "async def fetch(url: str) -> bytes"
+    assert entities['Service'].signature == "class Service(B)"
+    assert entities['Service.fetch.<locals>.parse'].entity_type == 'function'
+    assert len(analyzer.entities) == 5
+    imports = [(i.module, i.name, i.alias, i.level) for i in analysis.imports]
+    assert imports == [('os.path', None, 'os', 0), ('models', 'Base', 'B', 1),
+                       ('shared', '*', '*', 2)]
+    calls = {(c.caller, c.callee) for c in analysis.calls}
+    assert calls == {('Service.fetch', 'parse'), ('Service.fetch', 'os.path.join'),
+                     ('Service.fetch.<locals>.parse', 'data.strip'), ('helper#2', 'Service.fetch')}
+    print(f"✓ Visitor found {len(entities)} entities, {len(imports)} imports, {len(calls)} calls")
+
+
+def test_multi_language_extraction():
+    """Test tokenizer-based extraction for the C-family languages"""
+    print("Testing multi-language extraction...")
+    files = {
+        "app.ts": (
+            "interface Repo { find(id: string): User; }\n"
+            "export class Service implements Repo {\n"
+            "  find(id: string): User { return this.cache.get(`${id} {`); }\n"
+            "}\n"
+            "const handler = async (req) => { app.get('/', () => {}); };\n"
+        ),
+        "Main.java": (
+            "public class Main {\n"
+            "    /** Entry point. */\n"
+            "    public static void main(String[] args) {\n"
+            "        String s = \"void fake() {\";\n"
+            "    }\n"
+            "}\n"
+        ),
+        "server.go": (
+            "type Server struct {\n    addr string\n}\n"
+            "func (s *Server) Start() error {\n    go func() {}()\n    return nil\n}\n"
+        ),
+        "lib.rs": (
+            "pub struct Point { x: f64 }\n"
+            "impl fmt::Display for Point {\n"
+            "    fn fmt(&self, f: &mut Formatter) -> Result { Ok(()) }\n"
+            "}\n"
+        ),
+        "shape.cpp": (
+            "#define BODY() {\n"
+            "namespace geo {\n"
+            "class Shape {\n"
+            "public:\n"
+            "    virtual double area() const;\n"
+            "};\n"
+            "double Shape::area() const { return 0; } // void fake() {}\n"
+            "}\n"
+        ),
+    }
+    with tempfile.TemporaryDirectory() as root:
+        for name, content in files.items():
+            with open(os.path.join(root, name), 'w') as f:
+                f.write(content)
+        analyzer = CodeAnalyzer()
+        found = {}
+        for name in files:
+            analysis = analyzer.analyze_source(os.path.join(root, name))
+            found[name] = {e.qualified_name: e for e in analysis.entities}
+
+    assert list(found["app.ts"]) == ['Repo', 'Repo.find', 'Service', 'Service.find', 'handler']
+    assert found["app.ts"]['Service'].modifiers == ('export',)
+    assert found["app.ts"]['Service.find'].entity_type == 'method'
+    assert (found["app.ts"]['Service'].line_number, found["app.ts"]['Service'].end_line) == (2, 4)
+    assert list(found["Main.java"]) == ['Main', 'Main.main']
+    main_method = found["Main.java"]['Main.main']
+    assert main_method.docstring == "Entry point."
+    assert main_method.signature == "public static void main(String[] args)"
+    assert (main_method.line_number, main_method.end_line) == (3, 5)
+    assert list(found["server.go"]) == ['Server', 'Server.Start']
+    assert found["server.go"]['Server.Start'].end_line == 7
+    assert list(found["lib.rs"]) == ['Point', 'impl Display for Point', 'Point.fmt']
+    assert found["lib.rs"]['Point.fmt'].parent_entity == 'impl Display for Point'
+    assert list(found["shape.cpp"]) == ['geo', 'geo.Shape', 'geo.Shape.area', 'geo.Shape.area#2']
+    assert found["shape.cpp"]['geo.Shape.area#2'].parent_entity == 'geo.Shape'
+    assert all(e.language == get_language_from_extension(name)
+               for name, entities in found.items() for e in entities.values())
+
+    register_extractor(['.txt'], Extractor('lines', lambda content, path, analysis: None))
+    try:
+        assert get_extractor("notes.TXT").kind == 'lines'
+    finally:
+        extractors._extractors.pop('.txt')
+    print(f"✓ Extracted {sum(map(len, found.values()))} entities from {len(files)} languages")
+
+
+def test_call_graph():
+    """Test call resolution through imports, aliases, self and base classes"""
+    print("Testing call graph...")
+    files = {
+        "app/__init__.py": "from .core import Engine\n",
+        "app/core.py": (
+            "class Base:\n"
+            "    def start(self):\n"
+            "        return self.stop()\n"
+            "    def stop(self):\n"
+            "        pass\n"
+            "class Engine(Base):\n"
+            "    def run(self):\n"
+            "        self.start()\n"
+            "        len([])\n"
+        ),
+        "app/cli.py": (
+            "import app.core as core_mod\n"
+            "from app import Engine\n"
+            "from . import core\n"
+            "def main():\n"
+            "    def inner():\n"
+            "        return Engine()\n"
+            "    inner().run()\n"
+            "    core_mod.Engine().run()\n"
+            "    core.Base.stop(None)\n"
+        ),
+    }
+    with tempfile.TemporaryDirectory() as root:
+        for rel_path, text in files.items():
+            os.makedirs(os.path.dirname(os.path.join(root, rel_path)), exist_ok=True)
+            with open(os.path.join(root, rel_path), 'w') as f:
+                f.write(text)
+        analyzer = CodeAnalyzer()
+        analyzer.analyze_repository(build_file_tree(root))
+        graph = analyzer.build_call_graph()
+        core = os.path.join(root, "app", "core.py")
+        cli = os.path.join(root, "app", "cli.py")
+        assert graph.callees(f"{core}::Engine.run") == [f"{core}::Base.start"]
+        assert graph.callees(f"{core}::Base.start") == [f"{core}::Base.stop"]
+        assert sorted(graph.callees(f"{cli}::main")) == sorted([
+            f"{cli}::main.<locals>.inner", f"{core}::Engine", f"{core}::Base.stop"])
+        assert graph.callees(f"{cli}::main.<locals>.inner") == [f"{core}::Engine"]
+        assert sorted(graph.callers(f"{core}::Base.stop")) == sorted([f"{core}::Base.start",
+                                                                      f"{cli}::main"])
+        assert analyzer.get_call_graph() == graph.to_dict()
+        stats = analyzer.get_ccg_stats()
+        assert stats['total_relationships'] == graph.edge_count == 6
+        assert stats['entity_types'] == {'class': 2, 'method': 3, 'function': 2}
+        relationship = next(r for r in analyzer.relationships if r.source_entity == 'Engine.run')
+        assert (relationship.target_entity, relationship.source_file, relationship.line_number) \
+            == ('Base.start', core, 8)
+    print(f"✓ Call graph resolved {graph.edge_count} edges")
+
+
+def test_import_graph():
+    """Test module dependencies, cycles and layers"""
+    print("Testing import graph...")
+    files = {
+        "app/__init__.py": "",
+        "app/models.py": "from . import views\nimport json\n",
+        "app/views.py": "from .models import Model\nfrom app.util import helper\n",
+        "app/util.py": "import os.path\n",
+        "main.py": "import app.views\nfrom app import models\nimport requests\n",
+    }
+    with tempfile.TemporaryDirectory() as root:
+        for rel_path, text in files.items():
+            os.makedirs(os.path.dirname(os.path.join(root, rel_path)), exist_ok=True)
+            with open(os.path.join(root, rel_path), 'w') as f:
+                f.write(text)
+        analyzer = CodeAnalyzer()
+        analyzer.analyze_repository(build_file_tree(root))
+        graph = analyzer.build_import_graph(root)
+    assert graph.dependencies('app.views') == ['app.models', 'app.util']
+    assert sorted(graph.dependencies('main')) == ['app.models', 'app.views']
+    assert graph.dependents('app.util') == ['app.views']
+    for module in graph.modules:
+        assert graph.dependents(module) == [source for source in graph.modules
+                                            if module in graph.dependencies(source)]
+    assert graph.external == {'app.models': ['json'], 'app.util': ['os'], 'main': ['requests']}
+    assert graph.cycles() == [['app.models', 'app.views']]
+    assert graph.layers() == [['app', 'app.util'], ['app.models', 'app.views'], ['main']]
+    doc = DocGenie().generate_documentation({'import_graph': graph.to_dict()})
+    assert "app.models <-> app.views" in doc
+
+    # A long import chain must not hit the recursion limit
+    chain = {f"/repo/m{i}.py": [ImportRecord(f"m{i + 1}", None, f"m{i + 1}")]
+             for i in range(20000)}
+    chain["/repo/m20000.py"] = [ImportRecord("m0", None, "m0")]
+    big = ImportGraph.build(chain, "/repo")
+    assert len(big.cycles()) == 1 and len(big.cycles()[0]) == 20001
+    print(f"✓ Import graph found {len(graph.cycles())} cycle in {len(graph.modules)} modules")
+
+
+def _write_sample_repo(root, file_count=12):
+    """Write a small mixed Python/JAC repository for tests"""
+    for i in range(file_count):
+        package = os.path.join(root, f"pkg{i % 3}")
+        os.makedirs(package, exist_ok=True)
+        with open(os.path.join(package, f"mod{i}.py"), 'w') as f:
+            f.write(f"class Model{i}:\n    def run(self):\n        return {i}\n\n"
+                    f"def helper_{i}():\n    return Model{i}().run()\n" * (i + 1))
+    with open(os.path.join(root, "graph.jac"), 'w') as f:
+        f.write("node Person {}\nwalker Greeter {}\n")
+
+
+def _git(repo, *args):
+    """Run a git command in a test repository"""
+    subprocess.run(["git", "-C", repo, *args], check=True, capture_output=True)
+
+
+def _make_git_repo(root, file_count=12):
+    """Create a committed sample repository and return its file:// URL"""
+    _write_sample_repo(root, file_count)
+    _git(root, "init", "-q")
+    _git(root, "-c", "user.name=test", "-c", "user.email=test@example.com",
+         "add", "-A")
+    _git(root, "-c", "user.name=test", "-c", "user.email=test@example.com",
+         "commit", "-q", "-m", "initial")
+    return "file://" + root
+
+
+def _commit_all(repo, message):
+    """Commit every change in a test repository"""
+    _git(repo, "add", "-A")
+    _git(repo, "-c", "user.name=test", "-c", "user.email=test@example.com",
+         "commit", "-q", "-m", message)
+
+
+def test_parallel_analysis():
+    """Test parallel analysis matches the serial path"""
+    print("Testing parallel analysis...")
+    with tempfile.TemporaryDirectory() as root:
+        _write_sample_repo(root)
+        tree = build_file_tree(root)
+        serial = CodeAnalyzer().analyze_repository(tree)
+        parallel_analyzer = CodeAnalyzer(max_workers=2, parallel_threshold=1)
+        parallel = parallel_analyzer.analyze_repository(tree)
+        assert serial == parallel
+        assert serial['entity_count'] > 0
+        assert len(parallel_analyzer.entities) > 0
+    print(f"✓ Parallel analysis matched serial ({serial['entity_count']} entities)")
+
+
+def test_parse_cache():
+    """Test cached analysis returns identical entities without re-parsing"""
+    print("Testing parse cache...")
+    with tempfile.TemporaryDirectory() as root:
+        _write_sample_repo(os.path.join(root, "repo"))
+        tree = build_file_tree(os.path.join(root, "repo"))
+        cache = ParseCache(os.path.join(root, "cache.sqlite"))
+        first = CodeAnalyzer(cache=cache).analyze_repository(tree)
+        second = CodeAnalyzer(cache=cache).analyze_repository(tree)
+        assert first == second
+        stats = cache.get_stats()
+        assert stats['hits'] == first['file_count']
+        assert stats['misses'] == first['file_count']
+        pooled = CodeAnalyzer(cache=cache, max_workers=2, parallel_threshold=1)
+        assert pooled.analyze_repository(tree) == first
+        assert (pooled.cache_hits, pooled.cache_misses) == (first['file_count'], 0)
+        assert cache.get_stats()['hits'] == 2 * first['file_count']
+
+        small = ParseCache(os.path.join(root, "small.sqlite"), max_bytes=2048)
+        CodeAnalyzer(cache=small).analyze_repository(tree)
+        assert 0 < small.get_stats()['bytes'] <= 2048
+        cache.close()
+        small.close()
+    print(f"✓ Parse cache served {stats['hits']} files from cache")
+
+
+def test_incremental_analysis():
+    """Test incremental runs only re-analyze changed files"""
+    print("Testing incremental analysis...")
+    with tempfile.TemporaryDirectory() as root:
+        repo = os.path.join(root, "repo")
+        url = _make_git_repo(repo)
+        supervisor = CodeGeniusSupervisor(os.path.join(root, "docs"), incremental=True,
+                                          state_dir=os.path.join(root, "state"))
+        success, _, _ = supervisor.process_repository(url)
+        assert success
+
+        with open(os.path.join(repo, "pkg0", "mod0.py"), 'a') as f:
+            f.write("\ndef added_later():\n    pass\n")
+        os.remove(os.path.join(repo, "pkg1", "mod1.py"))
+        _commit_all(repo, "change")
+
+        mapper = RepoMapper()
+        assert mapper.clone_repository(url)[0]
+        tree = mapper.build_tree()
+        result, _ = analyze_incremental(
+            CodeAnalyzer(), tree, mapper.repo_path, mapper.list_blob_shas(),
+            mapper.get_head_commit(), supervisor.state_store.load(url),
+        )
+        full = CodeAnalyzer().analyze_repository(tree)
+        mapper.cleanup()
+        changes = result.pop('incremental')
+        assert result == full
+        assert changes['modified'] == ['pkg0/mod0.py']
+        assert changes['deleted'] == ['pkg1/mod1.py']
+        assert changes['reused'] == full['file_count'] - 1
+
+        success, _, _ = supervisor.process_repository(url)
+        assert success
+        state = supervisor.state_store.load(url)
+        assert 'pkg1/mod1.py' not in state['files']
+    print(f"✓ Incremental analysis reused {changes['reused']} unchanged files")
+
+
+def test_mirror_store():
+    """Test mirrors are reused, fetched incrementally and evicted"""
+    print("Testing mirror store...")
+    with tempfile.TemporaryDirectory() as root:
+        repo = os.path.join(root, "repo")
+        url = _make_git_repo(repo, file_count=3)
+        store = MirrorStore(os.path.join(root, "mirrors"), max_mirrors=1)
+
+        mapper = RepoMapper(mirror_store=store)
+        assert mapper.clone_repository(url)[0]
+        first_commit = mapper.get_head_commit()
+        mapper.cleanup()
+        assert not os.path.exists(mapper.temp_dir)
+
+        with open(os.path.join(repo, "new_module.py"), 'w') as f:
+            f.write("def fresh():\n    pass\n")
+        _commit_all(repo, "add module")
+
+        mapper = RepoMapper(mirror_store=store)
+        assert mapper.clone_repository(url)[0]
+        assert mapper.get_head_commit() != first_commit
+        assert os.path.isfile(os.path.join(mapper.repo_path, "new_module.py"))
+        mapper.cleanup()
+        assert len(store.list_mirrors()) == 1
+
+        # A mirror fetched or attached to after eviction listed it is kept
+        store.max_mirrors = 0
+        stale = store.list_mirrors()
+        time.sleep(0.01)
+        assert store.ensure_mirror(url)[0]
+        assert store._evict(stale, keep=None) == []
+        mapper = RepoMapper(mirror_store=store)
+        assert mapper.clone_repository(url)[0]
+        assert store._evict(store.list_mirrors(), keep=None) == []
+        mapper.cleanup()
+
+        # Without a checkout the run holds the mirror and stays on the commit it started with
+        mapper = RepoMapper(mirror_store=store, checkout=False)
+        assert mapper.clone_repository(url)[0]
+        pinned = mapper.get_head_commit()
+        with open(os.path.join(repo, "later.py"), 'w') as f:
+            f.write("def later():\n    pass\n")
+        _commit_all(repo, "later")
+        assert store.ensure_mirror(url)[0]
+        assert store._evict(store.list_mirrors(), keep=None) == []
+        tree = mapper.build_tree()
+        assert mapper.get_head_commit() == pinned
+        assert not any(path.endswith("later.py") for path in mapper.list_blob_shas())
+        assert mapper.source.read(os.path.join(mapper.repo_path, "new_module.py")) is not None
+        assert not any(node.name == "later.py" for node in tree.children)
+        mapper.cleanup()
+        assert not store._in_use(store._key(url))
+        store.max_mirrors = 1
+        assert len(store.list_mirrors()) == 1
+
+        other = _make_git_repo(os.path.join(root, "other"), file_count=2)
+        assert store.ensure_mirror(other)[0]
+        mirrors = store.list_mirrors()
+        assert [m['repo_url'] for m in mirrors] == ["file://" + os.path.join(root, "other")]
+    print("✓ Mirror store fetched updates and evicted the oldest mirror")
+
+
+def test_checkout_free_analysis():
+    """Test analysis straight from the object store matches a checkout"""
+    print("Testing checkout-free analysis...")
+    with tempfile.TemporaryDirectory() as root:
+        url = _make_git_repo(os.path.join(root, "repo"))
+        with open(os.path.join(root, "repo", "README.md"), 'w') as f:
+            f.write("# Sample\n")
+        _commit_all(os.path.join(root, "repo"), "readme")
+
+        results = []
+        for checkout in (True, False):
+            mapper = RepoMapper(checkout=checkout)
+            assert mapper.clone_repository(url)[0]
+            tree = mapper.build_tree()
+            analysis = CodeAnalyzer().analyze_repository(tree, mapper.source)
+            for entity in analysis['entities']:
+                entity['file_path'] = os.path.relpath(entity['file_path'], mapper.repo_path)
+            analysis['entities'].sort(key=lambda e: (e['file_path'], e['line_number'], e['name']))
+            results.append((analysis, mapper.read_readme()))
+            if not checkout:
+                assert not os.path.exists(os.path.join(mapper.repo_path, "pkg0"))
+                # Trees and missing objects do not desync the cat-file stream
+                reader = GitBlobReader(mapper.git_dir)
+                assert reader.read("HEAD:pkg0") is None and reader.read("HEAD:absent") is None
+                assert reader.read("HEAD:README.md") == b"# Sample\n"
+                reader.close()
+            mapper.cleanup()
+        assert results[0] == results[1]
+    print(f"✓ Checkout-free analysis matched ({results[1][0]['entity_count']} entities)")
+
+
+def test_sparse_clone():
+    """Test sparse clones skip binary blobs and oversized files"""
+    print("Testing sparse clone...")
+    with tempfile.TemporaryDirectory() as root:
+        repo = os.path.join(root, "repo")
+        _write_sample_repo(repo)
+        os.makedirs(os.path.join(repo, "assets"))
+        with open(os.path.join(repo, "assets", "dataset.bin"), 'wb') as f:
+            f.write(os.urandom(4 * 1024 * 1024))
+        with open(os.path.join(repo, "generated.py"), 'w') as f:
+            f.write("VALUE = 1\n" * 10000)
+        url = _make_git_repo(repo, file_count=12)
+
+        full = RepoMapper()
+        assert full.clone_repository(url)[0]
+        expected = CodeAnalyzer().analyze_repository(full.build_tree())
+        full.cleanup()
+
+        mapper = RepoMapper(sparse=True, max_file_size=64 * 1024)
+        assert mapper.clone_repository(url)[0]
+        assert not os.path.exists(os.path.join(mapper.repo_path, "assets"))
+        assert mapper.skipped_files == ["generated.py"]
+        git_bytes = sum(os.path.getsize(os.path.join(r, f))
+                        for r, _, files in os.walk(os.path.join(mapper.repo_path, ".git"))
+                        for f in files)
+        assert git_bytes < 1024 * 1024
+        result = CodeAnalyzer().analyze_repository(mapper.build_tree())
+        mapper.cleanup()
+        assert result['file_count'] == expected['file_count'] - 1
+        assert result['entity_count'] == expected['entity_count']
+
+        conflicting = [dict(sparse=True, mirror_store=MirrorStore(os.path.join(root, "mirrors"))),
+                       dict(sparse=True, checkout=False), dict(max_file_size=1024)]
+        for options in conflicting:
+            for factory in (RepoMapper, CodeGeniusSupervisor):
+                try:
+                    factory(**options)
+                    assert False, f"{factory.__name__} accepted {options}"
+                except ValueError:
+                    pass
+    print(f"✓ Sparse clone fetched {git_bytes // 1024} KiB of git data")
+
+
+def _without_timestamps(text):
+    """Drop the lines of generated documentation that change on every run"""
+    return [line for line in text.splitlines()
+            if not line.startswith(("Generated:", "- **Last Updated**"))]
+
+
+def test_streaming_pipeline():
+    """Test streaming mode documents a repository exactly like batch mode"""
+    print("Testing streaming pipeline...")
+
+    with tempfile.TemporaryDirectory() as root:
+        repo = os.path.join(root, "repo")
+        url = _make_git_repo(repo, file_count=20)
+        docs = {}
+        for mode in ("batch", "streaming", "pipelined"):
+            for checkout in (True, False):
+                supervisor = CodeGeniusSupervisor(output_dir=os.path.join(root, mode, str(checkout)),
+                                                  checkout=checkout, execution_mode=mode)
+                success, message, output_file = supervisor.process_repository(url)
+                assert success, message
+                with open(output_file, encoding='utf-8') as f:
+                    docs[mode, checkout] = _without_timestamps(f.read())
+        assert docs["streaming", True] == docs["batch", True]
+        assert docs["streaming", False] == docs["batch", False]
+        assert docs["pipelined", True] == docs["batch", True]
+        assert docs["pipelined", False] == docs["batch", False]
+
+        # The pipelined analysis stage can hand files to a process pool
+        for checkout in (True, False):
+            supervisor = CodeGeniusSupervisor(output_dir=os.path.join(root, "pool", str(checkout)),
+                                              checkout=checkout, execution_mode="pipelined",
+                                              analysis_workers=2)
+            supervisor.analyzer_options['parallel_threshold'] = 1
+            success, message, output_file = supervisor.process_repository(url)
+            assert success, message
+            with open(output_file, encoding='utf-8') as f:
+                assert _without_timestamps(f.read()) == docs["batch", checkout]
+
+        # Files are pulled one at a time, as results are consumed
+        pulled = []
+
+        def files():
+            for path in sorted(glob.glob(os.path.join(repo, "**", "*.py"), recursive=True)):
+                pulled.append(path)
+                yield path, os.path.getsize(path)
+
+        analyzer = CodeAnalyzer()
+        stream = analyzer.iter_analyses(files(), record=False)
+        first_path, _ = next(stream)
+        assert pulled == [first_path]
+        assert sum(1 for _ in stream) == len(pulled) - 1 and not analyzer.entities
+
+    try:
+        CodeGeniusSupervisor(incremental=True, execution_mode="streaming")
+        assert False, "incremental streaming should be rejected"
+    except ValueError:
+        pass
+    print(f"✓ Streaming output matched batch ({len(docs['batch', True])} lines)")
+
+
+def test_pipeline_backpressure():
+    """Test pipelined stages block on full queues and pass on errors"""
+    print("Testing pipeline backpressure...")
+    produced = []
+
+    def numbers(count):
+        for number in range(count):
+            produced.append(number)
+            yield number
+
+    stage = threaded(numbers(1000), queue_size=4)
+    assert next(stage) == 0
+    time.sleep(0.2)
+    # One item consumed, four queued and at most one blocked in put
+    assert len(produced) <= 6
+    stage.close()
+    assert len(produced) < 1000
+
+    def failing():
+        yield 1
+        raise RuntimeError("walk failed")
+
+    results = []
+    try:
+        for item in threaded(failing(), queue_size=2):
+            results.append(item)
+        assert False, "producer errors should propagate"
+    except RuntimeError as e:
+        assert str(e) == "walk failed" and results == [1]
+    print(f"✓ Producer stopped after {len(produced)} items with a queue of 4")
+
+
+def test_job_queue():
+    """Test background jobs run, cancel and survive a restart"""
+    print("Testing job queue...")
+    with tempfile.TemporaryDirectory() as root:
+        url = _make_git_repo(os.path.join(root, "repo"))
+        db_path = os.path.join(root, "jobs.sqlite")
+        output_dir = os.path.join(root, "docs")
+
+        manager = JobManager(workers=2, db_path=db_path, output_dir=output_dir)
+        good = manager.submit(url)
+        bad = manager.submit(os.path.join(root, "missing"))
+        job = manager.wait(good, timeout=60)
+        assert job['status'] == JobStatus.SUCCEEDED.value, job['message']
+        assert [stage['name'] for stage in job['stages']] == ["clone", "analyze", "document", "save"]
+        assert os.path.exists(job['output_file'])
+        assert manager.wait(bad, timeout=60)['status'] == JobStatus.FAILED.value
+        assert not manager.cancel(good)
+        manager.shutdown()
+
+        # One worker held at the start of a job, with a second job queued behind it
+        gate = threading.Event()
+
+        def held_supervisor():
+            gate.wait(30)
+            return CodeGeniusSupervisor(output_dir)
+
+        manager = JobManager(workers=1, db_path=db_path, supervisor_factory=held_supervisor)
+        running = manager.submit(url)
+        queued = manager.submit(url)
+        while manager.get_job(running)['status'] != JobStatus.RUNNING.value:
+            time.sleep(0.01)
+        assert manager.cancel(queued)
+        assert manager.get_job(queued)['status'] == JobStatus.CANCELLED.value
+        assert manager.cancel(running)
+        gate.set()
+        job = manager.wait(running, timeout=60)
+        assert job["status"] == JobStatus.CANCELLED.value and not job["stages"], job
+        manager.shutdown()
+
+        # A run cancelled from elsewhere, such as a shut-down pool, ends the job cleanly
+        def cancelled_supervisor():
+            raise CancelledError()
+
+        manager = JobManager(workers=1, db_path=db_path, supervisor_factory=cancelled_supervisor)
+        job = manager.wait(manager.submit(url), timeout=60)
+        assert job["status"] == JobStatus.CANCELLED.value, job
+        manager.shutdown()
+
+        # Work queued, or left running, by a stopped process is picked up
+        store = JobStore(db_path)
+        interrupted = store.add(url)
+        assert store.claim_next()['id'] == interrupted
+        pending = store.add(url)
+        store.close()
+        manager = JobManager(workers=2, db_path=db_path, output_dir=output_dir)
+        for job_id in (interrupted, pending):
+            assert manager.wait(job_id, timeout=60)['status'] == JobStatus.SUCCEEDED.value
+        assert len(manager.list_jobs()) == 7
+        manager.shutdown()
+    print("✓ Jobs ran, cancelled and resumed after restart")
+
+
+def test_concurrent_jobs():
+    """Stress test one supervisor with many concurrent runs"""
+    print("Testing concurrent jobs...")
+
+    def run_all(supervisor, urls):
+        results = [None] * len(urls)
+
+        def run(i):
+            results[i] = supervisor.process_repository(urls[i])
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(len(urls))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def document(output_file):
+        with open(output_file, encoding='utf-8') as f:
+            return _without_timestamps(f.read())
+
+    with tempfile.TemporaryDirectory() as root:
+        urls = [_make_git_repo(os.path.join(root, f"repo{i}"), file_count=4 + 4 * i)
+                for i in range(3)]
+        supervisor = CodeGeniusSupervisor(output_dir=os.path.join(root, "docs"))
+        expected = {}
+        for url in urls:
+            success, message, output_file = supervisor.process_repository(url)
+            assert success, message
+            expected[output_file] = document(output_file)
+        clones_before = set(glob.glob(os.path.join(tempfile.gettempdir(), "codebase_genius_*")))
+
+        run_all(supervisor, urls)  # warm up lazily created state
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        for _ in range(3):
+            results = run_all(supervisor, urls * 4)
+            for success, message, output_file in results:
+                assert success, message
+                assert document(output_file) == expected[output_file]
+        gc.collect()
+        growth = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+
+        assert growth < 256 * 1024, f"memory grew by {growth} bytes"
+        assert set(glob.glob(os.path.join(tempfile.gettempdir(), "codebase_genius_*"))) == clones_before
+        latest = _without_timestamps(supervisor.get_documentation())
+        assert any(latest == lines for lines in expected.values())
+    print(f"✓ 36 concurrent runs isolated, memory grew {growth} bytes")
+
+
+def test_result_store():
+    """Test repeat requests for a commit are served from the result store"""
+    print("Testing result store...")
+    with tempfile.TemporaryDirectory() as root:
+        repo = os.path.join(root, "repo")
+        url = _make_git_repo(repo)
+        store = ResultStore(os.path.join(root, "results.sqlite"))
+        supervisor = CodeGeniusSupervisor(output_dir=os.path.join(root, "docs"), result_store=store)
+
+        def run():
+            stages = []
+            success, message, output_file = supervisor.process_repository(url, stages.append)
+            assert success, message
+            with open(output_file, encoding='utf-8') as f:
+                return stages, f.read()
+
+        stages, first = run()
+        assert stages == ["resolve", "clone", "analyze", "document", "save"]
+        stages, second = run()
+        assert stages == ["resolve", "save"] and second == first
+
+        # A new commit is a new key
+        with open(os.path.join(repo, "extra.py"), 'w') as f:
+            f.write("def extra():\n    pass\n")
+        _commit_all(repo, "extra")
+        stages, third = run()
+        assert "clone" in stages and third != first
+        stats = store.get_stats()
+        assert (stats['hits'], stats['misses'], stats['entries']) == (1, 2, 2)
+        assert [entry['hits'] for entry in store.entry_stats()] == [1, 0]
+
+        # Results of the jaclang backend are stored apart from the regex backend's
+        jac_supervisor = CodeGeniusSupervisor(output_dir=os.path.join(root, "docs"),
+                                              result_store=store, use_jac_parser=True)
+        assert (jac_supervisor.result_version != supervisor.result_version) == jaclang_available()
+
+        # Expired and over-budget entries are dropped
+        store.ttl_seconds = -1
+        assert store.get(url, "0" * 40, supervisor.result_version) is None
+        store.purge_expired()
+        assert store.get_stats()['entries'] == 0
+        store.ttl_seconds = None
+        store.max_bytes = 3000
+        for i in range(3):
+            store.put(url, str(i) * 40, "v", {'entities': []}, "x" * 1000)
+        assert store.get(url, "0" * 40, "v") is None
+        assert store.get(url, "2" * 40, "v")['markdown'] == "x" * 1000
+
+        # An option-shaped URL is passed to git as a repository, never as an option
+        marker = os.path.join(root, "injected")
+        injected = f"--upload-pack=touch {marker}"
+        assert not supervisor.process_repository(injected)[0]
+        assert resolve_head_commit(injected) is None
+        assert not os.path.exists(marker)
+        store.close()
+    print("✓ Repeat request skipped the pipeline")
+
+
+def test_single_flight():
+    """Test concurrent identical requests share one run"""
+    print("Testing single flight...")
+    flights = SingleFlight(poll_interval=0.01)
+    release = threading.Event()
+    calls = []
+
+    def slow(cancelled):
+        calls.append(cancelled)
+        release.wait(30)
+        return len(calls)
+
+    results, errors = [], []
+
+    def call(**kwargs):
+        try:
+            results.append(flights.do("key", slow, **kwargs))
+        except (TimeoutError, CancelledError) as e:
+            errors.append(type(e))
+
+    cancel = threading.Event()
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    while flights.coalesced < 5:
+        time.sleep(0.01)
+    threads.append(threading.Thread(target=call, kwargs={'timeout': 0.05}))
+    threads.append(threading.Thread(target=call, kwargs={'cancel': cancel}))
+    threads[-2].start()
+    threads[-1].start()
+    cancel.set()
+    threads[-2].join()
+    threads[-1].join()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and results == [1] * 6
+    assert sorted(errors, key=str) == sorted([TimeoutError, CancelledError], key=str)
+    assert (flights.started, flights.coalesced) == (1, 7) and not calls[0].is_set()
+
+    # When every caller leaves, the run is told to stop and the next call starts afresh
+    release.clear()
+    try:
+        flights.do("key", slow, timeout=0.05)
+        assert False, "the call should time out"
+    except TimeoutError:
+        pass
+    assert calls[1].is_set() and flights.in_flight() == 0
+    release.set()
+    assert flights.do("key", slow) == 3
+    assert flight_key("file:///tmp/repo/") == flight_key("file:///tmp/repo")
+
+    # Jobs for one repository attach to a single run
+    with tempfile.TemporaryDirectory() as root:
+        url = _make_git_repo(os.path.join(root, "repo"))
+        gate = threading.Event()
+        supervisors = []
+
+        def held_supervisor():
+            supervisors.append(gate.wait(30))
+            return CodeGeniusSupervisor(os.path.join(root, "docs"))
+
+        manager = JobManager(workers=4, db_path=os.path.join(root, "jobs.sqlite"),
+                             supervisor_factory=held_supervisor)
+        job_ids = [manager.submit(url) for _ in range(3)] + [manager.submit(url + "/")]
+        while manager.flights.coalesced < 3:
+            time.sleep(0.01)
+        assert manager.cancel(job_ids[0])
+        gate.set()
+        jobs = [manager.wait(job_id, timeout=60) for job_id in job_ids]
+        manager.shutdown()
+    assert len(supervisors) == 1
+    assert jobs[0]['status'] == JobStatus.CANCELLED.value and not jobs[0]['stages']
+    assert {job['status'] for job in jobs[1:]} == {JobStatus.SUCCEEDED.value}
+    assert len({job['output_file'] for job in jobs[1:]}) == 1
+    assert all(len(job['stages']) == 4 for job in jobs[1:])
+    print("✓ 8 calls and 4 jobs each ran once")
+
+
+def test_pipeline_metrics():
+    """Test runs are measured per stage and exported"""
+    print("Testing pipeline metrics...")
+    with tempfile.TemporaryDirectory() as root:
+        url = _make_git_repo(os.path.join(root, "repo"))
+        log_path = os.path.join(root, "metrics.jsonl")
+        registry = MetricsRegistry(log_path)
+        cache = ParseCache(os.path.join(root, "cache.sqlite"))
+        supervisor = CodeGeniusSupervisor(output_dir=os.path.join(root, "docs"),
+                                          cache=cache, metrics=registry)
+        for _ in range(2):
+            assert supervisor.process_repository(url)[0]
+        streaming = CodeGeniusSupervisor(output_dir=os.path.join(root, "docs"),
+                                         execution_mode="streaming", metrics=registry)
+        assert streaming.process_repository(url)[0]
+        assert not streaming.process_repository(os.path.join(root, "missing"))[0]
+        # Without a registry nothing is measured
+        assert CodeGeniusSupervisor(output_dir=os.path.join(root, "docs")).process_repository(url)[0]
+
+        with open(log_path, encoding='utf-8') as f:
+            runs = [json.loads(line) for line in f]
+        assert len(runs) == 4
+        first, second, stream, failed = runs
+        assert [stage['name'] for stage in first['stages']] == [
+            "clone", "map", "analyze", "document", "save"]
+        assert [stage['name'] for stage in stream['stages']] == [
+            "clone", "analyze", "document", "save"]
+        assert first['files'] == stream['files'] > 0 and first['bytes'] == stream['bytes'] > 0
+        assert first['entities_per_second'] > 0 and first['wall_seconds'] > 0
+        assert first['cache']['parse_cache_hit_ratio'] == 0.0
+        assert second['cache']['parse_cache_hit_ratio'] == 1.0
+        assert failed['success'] is False and [stage['name'] for stage in failed['stages']] == ["clone"]
+
+        # Runs sharing the parse cache each count only their own lookups
+        other = _make_git_repo(os.path.join(root, "other"), file_count=3)
+        concurrent = CodeGeniusSupervisor(output_dir=os.path.join(root, "docs"), cache=cache)
+        measured = {repo_url: RunMetrics(repo_url) for repo_url in (url, other)}
+        threads = [threading.Thread(target=concurrent.process_repository, args=(repo_url,),
+                                    kwargs={'run_metrics': run})
+                   for repo_url, run in measured.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(run.success and run.parse_cache_hits + run.parse_cache_misses == run.file_count
+                   for run in measured.values())
+
+        text = registry.to_prometheus()
+        assert 'codebase_genius_runs_total{outcome="success"} 3' in text
+        assert 'codebase_genius_stage_runs_total{stage="map"} 2' in text
+        assert f"codebase_genius_analyzed_files_total {3 * first['files']}" in text
+        sample = re.compile(r'^[a-z_]+(\{[a-z]+="[a-z]+"\})? [0-9.e+-]+$')
+        assert all(sample.match(line) for line in text.splitlines() if not line.startswith('#'))
+        registry.write_prometheus(os.path.join(root, "metrics.prom"))
+
+        manager = JobManager(workers=1, db_path=os.path.join(root, "jobs.sqlite"),
+                             output_dir=os.path.join(root, "docs"), metrics=registry)
+        job = manager.wait(manager.submit(url), timeout=60)
+        manager.shutdown()
+        assert job['metrics']['files'] == first['files']
+        cache.close()
+    print(f"✓ Measured {len(runs)} runs, {first['files']} files per run")
+
+
+def test_stage_profiling():
+    """Test profiled runs dump per-stage profiles next to the documentation"""
+    print("Testing stage profiling...")
+
+    def inner():
+        return sum(i * i for i in range(20000))
+
+    def outer():
+        return [inner() for _ in range(5)]
+
+    profile = cProfile.Profile()
+    profile.runcall(outer)
+    stacks = collapsed_stacks(pstats.Stats(profile))
+    # Comprehensions may add their own frame between outer and inner
+    assert any(re.search(r"outer@test\.py:\d+;(.*;)?inner@test\.py:\d+;", stack)
+               for stack in stacks)
+
+    random.seed(7)
+    sampled = sum(ProfileConfig(sample_rate=0.25).sample() for _ in range(1000))
+    assert 180 < sampled < 320
+
+    with tempfile.TemporaryDirectory() as root:
+        url = _make_git_repo(os.path.join(root, "repo"))
+        docs = os.path.join(root, "docs")
+        supervisor = CodeGeniusSupervisor(output_dir=docs,
+                                          profiling=ProfileConfig(memory=True, sample_rate=0.0))
+        assert supervisor.process_repository(url)[0]
+        assert os.listdir(docs) == ["repo_documentation.md"]
+
+        run_metrics = RunMetrics(url)
+        assert supervisor.process_repository(url, run_metrics=run_metrics, profile=True)[0]
+        files = run_metrics.profile_files
+        stages = ["clone", "map", "analyze", "document", "save"]
+        suffixes = ["pstats", "collapsed", "allocations.txt"]
+        assert sorted(name.split(".", 1)[1] for name in map(os.path.basename, files)) == sorted(
+            f"{stage}.{suffix}" for stage in stages for suffix in suffixes)
+        assert all(os.path.dirname(path) == docs for path in files)
+        by_name = {os.path.basename(path).split(".", 1)[1]: path for path in files}
+        stats = pstats.Stats(by_name["analyze.pstats"])
+        assert any(func[2] == "analyze_repository" for func in stats.stats)
+        with open(by_name["analyze.collapsed"], encoding='utf-8') as f:
+            assert all(re.match(r"^\S.* \d+$", line) for line in f)
+        with open(by_name["map.allocations.txt"], encoding='utf-8') as f:
+            assert f.readline().startswith("Stage map:")
+        assert not tracemalloc.is_tracing()
+        assert run_metrics.cpu_profile_skipped == []
+
+        # While another run holds the CPU profiler, stages are skipped and reported
+        other = StageProfiler(ProfileConfig(), os.path.join(root, "other"), "other")
+        other.start_stage("busy")
+        blocked = RunMetrics(url)
+        assert supervisor.process_repository(url, run_metrics=blocked, profile=True)[0]
+        assert other.finish() == [os.path.join(root, "other", "other.busy.pstats"),
+                                  os.path.join(root, "other", "other.busy.collapsed")]
+        assert blocked.cpu_profile_skipped == stages
+        assert not any(path.endswith((".pstats", ".collapsed")) for path in blocked.profile_files)
+        assert blocked.to_dict()['cpu_profile_skipped'] == stages
+
+        manager = JobManager(workers=1, db_path=os.path.join(root, "jobs.sqlite"), output_dir=docs)
+        job = manager.wait(manager.submit(url, profile=True), timeout=60)
+        manager.shutdown()
+        assert job['profile'] and len(job['metrics']['profile_files']) == 10
+    print(f"✓ Wrote {len(files)} profile files for 5 stages")
+
+
 def test_doc_genie():
     """Test documentation generation"""
     print("Testing documentation generation...")
@@ -64,7 +1161,30 @@ def main():
     
     try:
         test_file_tree()
+        test_scan_file_tree()
+        test_parallel_file_tree()
+        test_compact_file_tree()
         test_code_analyzer()
+        test_jac_extraction()
+        test_jac_parser()
+        test_python_visitor()
+        test_multi_language_extraction()
+        test_call_graph()
+        test_import_graph()
+        test_parallel_analysis()
+        test_parse_cache()
+        test_incremental_analysis()
+        test_mirror_store()
+        test_checkout_free_analysis()
+        test_sparse_clone()
+        test_streaming_pipeline()
+        test_pipeline_backpressure()
+        test_job_queue()
+        test_concurrent_jobs()
+        test_result_store()
+        test_single_flight()
+        test_pipeline_metrics()
+        test_stage_profiling()
         test_doc_genie()
         test_supervisor()
         print("\n✅ All tests passed!")
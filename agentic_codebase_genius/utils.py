@@ -3,9 +3,13 @@ Utility functions and data structures for Codebase Genius
 """
 
 import os
+import sys
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Protocol, Sequence
 
 
 class LanguageType(Enum):
@@ -21,7 +25,7 @@ class LanguageType(Enum):
     UNKNOWN = "unknown"
 
 
-@dataclass
+@dataclass(slots=True)
 class FileNode:
     """Represents a file in the repository"""
     path: str
@@ -51,7 +55,7 @@ class FileNode:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class CodeEntity:
     """Represents a code entity (function, class, method, etc.)"""
     name: str
@@ -62,8 +66,14 @@ class CodeEntity:
     language: LanguageType = LanguageType.UNKNOWN
     docstring: str = ""
     signature: str = ""
-    modifiers: List[str] = field(default_factory=list)
+    # An immutable default lets entities without modifiers share one empty tuple
+    modifiers: Sequence[str] = ()
     parent_entity: Optional[str] = None
+    qualified_name: str = ""  # unique within its file, e.g. 'Outer.method'
+
+    def __post_init__(self) -> None:
+        # Entities from one file (or one cache entry) share a single path string
+        self.file_path = sys.intern(self.file_path)
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -76,12 +86,31 @@ class CodeEntity:
             'language': self.language.value if isinstance(self.language, LanguageType) else self.language,
             'docstring': self.docstring,
             'signature': self.signature,
-            'modifiers': self.modifiers,
+            'modifiers': list(self.modifiers),
             'parent_entity': self.parent_entity,
+            'qualified_name': self.qualified_name or self.name,
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CodeEntity':
+        """Create from a dictionary produced by to_dict"""
+        language = data.get('language', LanguageType.UNKNOWN.value)
+        return cls(
+            name=data['name'],
+            entity_type=data['type'],
+            file_path=data['file_path'],
+            line_number=data['line_number'],
+            end_line=data.get('end_line', 0),
+            language=LanguageType(language) if isinstance(language, str) else language,
+            docstring=data.get('docstring', ""),
+            signature=data.get('signature', ""),
+            modifiers=tuple(data.get('modifiers', ())),
+            parent_entity=data.get('parent_entity'),
+            qualified_name=data.get('qualified_name', ""),
+        )
+
 
-@dataclass
+@dataclass(slots=True)
 class CodeRelationship:
     """Represents a relationship between code entities"""
     source_entity: str
@@ -91,6 +120,10 @@ class CodeRelationship:
     target_file: str
     line_number: int = 0
 
+    def __post_init__(self) -> None:
+        self.source_file = sys.intern(self.source_file)
+        self.target_file = sys.intern(self.target_file)
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
         return {
@@ -103,33 +136,187 @@ class CodeRelationship:
         }
 
 
+@dataclass(slots=True)
+class ImportRecord:
+    """Represents one name bound by an import statement"""
+    module: str  # module as written, without leading dots
+    name: Optional[str]  # imported attribute for 'from' imports, else None
+    alias: str  # name bound in the importing scope
+    level: int = 0  # number of leading dots in a relative import
+    line_number: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'module': self.module,
+            'name': self.name,
+            'alias': self.alias,
+            'level': self.level,
+            'line_number': self.line_number,
+        }
+
+
+@dataclass(slots=True)
+class CallSite:
+    """Represents a call expression found in source"""
+    caller: str  # qualified name of the enclosing entity, '' at module level
+    callee: str  # dotted call target as written, e.g. 'self.run'
+    line_number: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {'caller': self.caller, 'callee': self.callee, 'line_number': self.line_number}
+
+
+@dataclass(slots=True)
+class FileAnalysis:
+    """Everything extracted from one file in a single parse"""
+    entities: List[CodeEntity] = field(default_factory=list)
+    imports: List[ImportRecord] = field(default_factory=list)
+    calls: List[CallSite] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary, leaving out the file path"""
+        entities = []
+        for entity in self.entities:
+            data = entity.to_dict()
+            del data['file_path']
+            entities.append(data)
+        return {
+            'entities': entities,
+            'imports': [i.to_dict() for i in self.imports],
+            'calls': [c.to_dict() for c in self.calls],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], file_path: str) -> 'FileAnalysis':
+        """Create from to_dict output, binding entities to file_path"""
+        return cls(
+            entities=[CodeEntity.from_dict({**e, 'file_path': file_path}) for e in data['entities']],
+            imports=[ImportRecord(**i) for i in data.get('imports', [])],
+            calls=[CallSite(**c) for c in data.get('calls', [])],
+        )
+
+
+class LineIndex:
+    """Maps character offsets in a text to 1-based line numbers.
+
+    Line starts are found once, so each lookup is a binary search instead
+    of counting newlines in a copy of the preceding text.
+    """
+
+    __slots__ = ('starts',)
+
+    def __init__(self, text: str):
+        starts = [0]
+        find = text.find
+        position = find('\n')
+        while position != -1:
+            starts.append(position + 1)
+            position = find('\n', position + 1)
+        self.starts = starts
+
+    def line_of(self, offset: int) -> int:
+        """Get the line number containing a character offset"""
+        return bisect_right(self.starts, offset)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+class FileSource(Protocol):
+    """Supplies file contents for tree paths without a working tree on disk"""
+
+    def read(self, path: str) -> Optional[bytes]:
+        """Read the content of a path"""
+        ...
+
+    def blob_sha(self, path: str) -> Optional[str]:
+        """Get the git blob SHA of a path, if known"""
+        ...
+
+
+def get_cache_dir() -> str:
+    """Get the directory used for persistent caches"""
+    return os.environ.get(
+        'CODEBASE_GENIUS_CACHE_DIR',
+        os.path.join(os.path.expanduser('~'), '.cache', 'codebase_genius'),
+    )
+
+
+def normalize_repo_url(repo_url: str) -> str:
+    """Normalize a repository URL so equivalent spellings share cache entries"""
+    url = repo_url.strip()
+    if url.startswith('file://'):
+        return 'file://' + os.path.abspath(url[len('file://'):]).rstrip('/')
+    if '://' not in url and ':' in url and '@' in url.split(':', 1)[0]:
+        # scp-like syntax: git@host:owner/repo.git
+        user_host, path = url.split(':', 1)
+        url = f"{user_host.split('@', 1)[1]}/{path}"
+    elif '://' in url:
+        url = url.split('://', 1)[1]
+        if '@' in url.split('/', 1)[0]:
+            url = url.split('@', 1)[1]
+    elif os.path.exists(url):
+        return 'file://' + os.path.abspath(url).rstrip('/')
+    host, _, path = url.partition('/')
+    path = path.rstrip('/')
+    if path.endswith('.git'):
+        path = path[:-len('.git')]
+    return f"{host.lower()}/{path}"
+
+
+EXTENSION_LANGUAGES = {
+    '.py': LanguageType.PYTHON,
+    '.jac': LanguageType.JAC,
+    '.js': LanguageType.JAVASCRIPT,
+    '.jsx': LanguageType.JAVASCRIPT,
+    '.mjs': LanguageType.JAVASCRIPT,
+    '.cjs': LanguageType.JAVASCRIPT,
+    '.ts': LanguageType.TYPESCRIPT,
+    '.tsx': LanguageType.TYPESCRIPT,
+    '.java': LanguageType.JAVA,
+    '.go': LanguageType.GO,
+    '.rs': LanguageType.RUST,
+    '.cpp': LanguageType.CPP,
+    '.cc': LanguageType.CPP,
+    '.cxx': LanguageType.CPP,
+    '.h': LanguageType.CPP,
+    '.hh': LanguageType.CPP,
+    '.hpp': LanguageType.CPP,
+}
+
+
 def get_language_from_extension(filename: str) -> LanguageType:
     """Determine language from file extension"""
-    ext_map = {
-        '.py': LanguageType.PYTHON,
-        '.jac': LanguageType.JAC,
-        '.js': LanguageType.JAVASCRIPT,
-        '.ts': LanguageType.TYPESCRIPT,
-        '.java': LanguageType.JAVA,
-        '.go': LanguageType.GO,
-        '.rs': LanguageType.RUST,
-        '.cpp': LanguageType.CPP,
-        '.cc': LanguageType.CPP,
-        '.h': LanguageType.CPP,
-    }
     _, ext = os.path.splitext(filename)
-    return ext_map.get(ext.lower(), LanguageType.UNKNOWN)
+    return EXTENSION_LANGUAGES.get(ext.lower(), LanguageType.UNKNOWN)
+
+
+def _language_for_name(name: str) -> LanguageType:
+    """get_language_from_extension for a bare file name, without splitext"""
+    dot = name.rfind('.')
+    # Like splitext, a run of leading dots does not start an extension
+    if dot <= 0 or (name[0] == '.' and not name[:dot].lstrip('.')):
+        return LanguageType.UNKNOWN
+    return EXTENSION_LANGUAGES.get(name[dot:].lower(), LanguageType.UNKNOWN)
+
+
+# Path components skipped when mapping a repository
+IGNORE_PATTERNS = frozenset({
+    '__pycache__', '.git', '.venv', 'venv', 'node_modules',
+    '.pytest_cache', '.egg-info', 'dist', 'build',
+    '.mypy_cache', '.tox', '.coverage',
+})
+
+# File extensions CodeAnalyzer has a built-in extractor for
+ANALYZABLE_EXTENSIONS = tuple(EXTENSION_LANGUAGES)
 
 
 def should_ignore(path: str) -> bool:
     """Check if path should be ignored"""
-    ignore_patterns = {
-        '__pycache__', '.git', '.venv', 'venv', 'node_modules',
-        '.pytest_cache', '.egg-info', 'dist', 'build',
-        '.mypy_cache', '.tox', '.coverage',
-    }
     for part in path.split(os.sep):
-        if part in ignore_patterns:
+        if part in IGNORE_PATTERNS:
             return True
     return False
 
@@ -174,6 +361,213 @@ def build_file_tree(root_path: str, max_depth: int = 10, current_depth: int = 0)
         return None
 
 
+def scan_file_tree(root_path: str, max_depth: int = 10) -> Optional[FileNode]:
+    """Build the same tree as build_file_tree using os.scandir and a stack.
+
+    Type and size come from the cached DirEntry data, ignored directories
+    are pruned by name before they are opened, and there is no recursion.
+    """
+    if max_depth < 0 or should_ignore(root_path):
+        return None
+
+    try:
+        name = os.path.basename(root_path) or root_path
+        is_dir = os.path.isdir(root_path)
+        root = FileNode(
+            path=root_path,
+            name=name,
+            is_dir=is_dir,
+            language=LanguageType.UNKNOWN if is_dir else get_language_from_extension(name),
+            depth=0,
+        )
+        if not is_dir:
+            try:
+                root.size = os.path.getsize(root_path)
+            except (OSError, IOError):
+                pass
+            return root
+    except Exception:
+        return None
+
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        child_depth = node.depth + 1
+        try:
+            with os.scandir(node.path) as entries:
+                if child_depth > max_depth:
+                    # build_file_tree still lists this directory, which can fail
+                    continue
+                children = node.children
+                for entry in entries:
+                    if entry.name in IGNORE_PATTERNS:
+                        continue
+                    try:
+                        entry_is_dir = entry.is_dir()
+                    except OSError:
+                        entry_is_dir = False
+                    child = FileNode(
+                        path=entry.path,
+                        name=entry.name,
+                        is_dir=entry_is_dir,
+                        language=LanguageType.UNKNOWN if entry_is_dir else _language_for_name(entry.name),
+                        depth=child_depth,
+                        parent=node,
+                    )
+                    if entry_is_dir:
+                        stack.append(child)
+                    else:
+                        try:
+                            child.size = entry.stat().st_size
+                        except OSError:
+                            pass
+                    children.append(child)
+        except PermissionError:
+            pass
+        except Exception:
+            if node.parent is None:
+                return None
+            node.parent.children.remove(node)
+
+    return root
+
+
+def _list_directory(path: str) -> List[tuple]:
+    """List a directory as sorted (name, path, is_dir, size) tuples"""
+    listing = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name in IGNORE_PATTERNS:
+                continue
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            size = 0
+            if not is_dir:
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    pass
+            listing.append((entry.name, entry.path, is_dir, size))
+    listing.sort()
+    return listing
+
+
+def scan_file_tree_parallel(root_path: str, max_depth: int = 10,
+                            max_workers: int = 8) -> Optional[FileNode]:
+    """Build a file tree listing directories concurrently.
+
+    Meant for network filesystems where each directory listing has high
+    latency. At most max_workers * 2 listings are in flight at once.
+    Children are sorted by name, so the result is deterministic, but it
+    differs from scan_file_tree, which keeps directory order.
+    """
+    if max_depth < 0 or should_ignore(root_path):
+        return None
+    if not os.path.isdir(root_path):
+        return scan_file_tree(root_path, max_depth)
+
+    root = FileNode(path=root_path, name=os.path.basename(root_path) or root_path,
+                    is_dir=True, depth=0)
+    pending = deque([root])
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or in_flight:
+            while pending and len(in_flight) < max_workers * 2:
+                node = pending.popleft()
+                in_flight[pool.submit(_list_directory, node.path)] = node
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = in_flight.pop(future)
+                try:
+                    listing = future.result()
+                except PermissionError:
+                    continue
+                except Exception:
+                    if node.parent is None:
+                        return None
+                    node.parent.children.remove(node)
+                    continue
+                child_depth = node.depth + 1
+                if child_depth > max_depth:
+                    continue
+                for name, path, is_dir, size in listing:
+                    child = FileNode(
+                        path=path,
+                        name=name,
+                        is_dir=is_dir,
+                        language=LanguageType.UNKNOWN if is_dir else _language_for_name(name),
+                        size=size,
+                        depth=child_depth,
+                        parent=node,
+                    )
+                    node.children.append(child)
+                    if is_dir:
+                        pending.append(child)
+
+    return root
+
+
+def iter_files(root_path: str, max_depth: int = 10) -> Iterator[FileNode]:
+    """Yield the file nodes scan_file_tree would create, as they are found.
+
+    Files come in the same depth-first order as a walk of that tree, but no
+    tree is built: each node is standalone, and only one open directory
+    listing per level is held.
+    """
+    if max_depth < 0 or should_ignore(root_path):
+        return
+    if not os.path.isdir(root_path):
+        try:
+            size = os.path.getsize(root_path)
+        except OSError:
+            return
+        name = os.path.basename(root_path) or root_path
+        yield FileNode(path=root_path, name=name, is_dir=False,
+                       language=get_language_from_extension(name), size=size, depth=0)
+        return
+
+    stack = []
+    try:
+        stack.append((os.scandir(root_path), 1))
+    except OSError:
+        return
+    try:
+        while stack:
+            entries, depth = stack[-1]
+            try:
+                entry = next(entries, None)
+            except OSError:
+                entry = None
+            if entry is None:
+                entries.close()
+                stack.pop()
+                continue
+            if entry.name in IGNORE_PATTERNS:
+                continue
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if depth < max_depth:
+                    try:
+                        stack.append((os.scandir(entry.path), depth + 1))
+                    except OSError:
+                        pass
+                continue
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                size = 0
+            yield FileNode(path=entry.path, name=entry.name, is_dir=False,
+                           language=_language_for_name(entry.name), size=size, depth=depth)
+    finally:
+        for entries, _ in stack:
+            entries.close()
+
+
 def count_entities_in_tree(node: Optional[FileNode], language: Optional[LanguageType] = None) -> int:
     """Count entities in file tree"""
     if not node:
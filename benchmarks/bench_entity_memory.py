@@ -0,0 +1,129 @@
+"""
+Benchmark - memory of slotted entity/tree models versus plain dataclasses
+
+Entities are rebuilt from JSON the way parse-cache and incremental hits
+rebuild them, so every record starts with its own file_path string.
+
+Usage: python benchmarks/bench_entity_memory.py [--files 2000] [--per-file 16]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agentic_codebase_genius.utils import CodeEntity, FileNode, LanguageType
+
+
+@dataclass
+class PlainCodeEntity:
+    """CodeEntity as it was before slots and interning"""
+    name: str
+    entity_type: str
+    file_path: str
+    line_number: int
+    end_line: int = 0
+    language: LanguageType = LanguageType.UNKNOWN
+    docstring: str = ""
+    signature: str = ""
+    modifiers: List[str] = field(default_factory=list)
+    parent_entity: Optional[str] = None
+
+
+@dataclass
+class PlainFileNode:
+    """FileNode as it was before slots"""
+    path: str
+    name: str
+    is_dir: bool
+    language: LanguageType = LanguageType.UNKNOWN
+    size: int = 0
+    depth: int = 0
+    children: List['PlainFileNode'] = field(default_factory=list)
+    parent: Optional['PlainFileNode'] = None
+
+
+def make_records(files: int, per_file: int) -> str:
+    """Serialize synthetic entity records like the parse cache stores them"""
+    records = []
+    for f in range(files):
+        path = f"/tmp/codebase_genius_bench/pkg{f % 50}/sub{f % 7}/module_{f}.py"
+        for e in range(per_file):
+            records.append({
+                'name': f"function_{e}", 'type': 'function', 'file_path': path,
+                'line_number': e * 10 + 1, 'end_line': e * 10 + 8,
+                'language': 'python', 'docstring': "", 'signature': "",
+                'modifiers': [], 'parent_entity': None,
+            })
+    return json.dumps(records)
+
+
+def retained(build) -> int:
+    """Bytes still allocated after build() returns its result"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def build_entities(cls, payload: str):
+    """Rebuild entities from JSON"""
+    entities = []
+    for data in json.loads(payload):
+        entities.append(cls(
+            name=data['name'], entity_type=data['type'], file_path=data['file_path'],
+            line_number=data['line_number'], end_line=data['end_line'],
+            language=LanguageType(data['language']), docstring=data['docstring'],
+            signature=data['signature'],
+            modifiers=list(data['modifiers']) if cls is PlainCodeEntity else tuple(data['modifiers']),
+            parent_entity=data['parent_entity'],
+        ))
+    return entities
+
+
+def build_tree(cls, files: int):
+    """Build a flat two-level tree with the given node class"""
+    root = cls(path="/repo", name="repo", is_dir=True)
+    for d in range(files // 50 + 1):
+        directory = cls(path=f"/repo/d{d}", name=f"d{d}", is_dir=True, depth=1, parent=root)
+        root.children.append(directory)
+        for f in range(50):
+            directory.children.append(cls(path=f"/repo/d{d}/f{f}.py", name=f"f{f}.py",
+                                          is_dir=False, language=LanguageType.PYTHON,
+                                          size=f, depth=2, parent=directory))
+    return root
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--per-file', type=int, default=16)
+    parser.add_argument('--tree-files', type=int, default=200_000)
+    args = parser.parse_args()
+
+    payload = make_records(args.files, args.per_file)
+    count = args.files * args.per_file
+    rows = [
+        (f"{count} entities", retained(lambda: build_entities(PlainCodeEntity, payload)),
+         retained(lambda: build_entities(CodeEntity, payload))),
+        (f"{args.tree_files} tree nodes", retained(lambda: build_tree(PlainFileNode, args.tree_files)),
+         retained(lambda: build_tree(FileNode, args.tree_files))),
+    ]
+    print(f"{'model':22s} {'plain MiB':>10s} {'slotted MiB':>12s} {'saved':>7s}")
+    for label, plain, slotted in rows:
+        print(f"{label:22s} {plain / 2**20:10.1f} {slotted / 2**20:12.1f} "
+              f"{1 - slotted / plain:7.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Benchmark - build_file_tree versus scan_file_tree on a synthetic tree
+
+Usage: python benchmarks/bench_file_tree.py [--files 200000] [--fanout 20] [--walk-workers 8]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agentic_codebase_genius.utils import (
+    build_file_tree, count_entities_in_tree, scan_file_tree, scan_file_tree_parallel,
+)
+
+
+def make_tree(root: str, files: int, fanout: int, files_per_dir: int) -> None:
+    """Create a directory tree holding the requested number of empty files"""
+    extensions = ['.py', '.jac', '.md', '.json', '.png']
+    pending = [(root, 0)]
+    created = 0
+    while created < files:
+        path, depth = pending.pop(0)
+        os.makedirs(path, exist_ok=True)
+        for i in range(min(files_per_dir, files - created)):
+            with open(os.path.join(path, f"file_{i}{extensions[i % len(extensions)]}"), 'w') as f:
+                f.write("x" * (i % 64))
+            created += 1
+        pending.extend((os.path.join(path, f"dir_{i}"), depth + 1) for i in range(fanout))
+        if depth == 0:
+            # Ignored directories must be pruned, not walked
+            os.makedirs(os.path.join(path, "node_modules", "pkg"), exist_ok=True)
+
+
+def timed(func, *args):
+    """Run func and return its result and wall time"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=200_000)
+    parser.add_argument('--fanout', type=int, default=20)
+    parser.add_argument('--files-per-dir', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--walk-workers', type=int, default=8)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_tree_")
+    try:
+        print(f"Creating {args.files} files under {root}...")
+        make_tree(root, args.files, args.fanout, args.files_per_dir)
+
+        best = {}
+        for _ in range(args.repeat):
+            parallel = partial(scan_file_tree_parallel, max_workers=args.walk_workers)
+            for name, builder in (('build_file_tree', build_file_tree),
+                                  ('scan_file_tree', scan_file_tree),
+                                  ('scan_parallel', parallel)):
+                tree, elapsed = timed(builder, root)
+                best[name] = min(best.get(name, elapsed), elapsed)
+
+        legacy = build_file_tree(root).to_dict()
+        assert legacy == scan_file_tree(root).to_dict(), "trees differ"
+        assert (count_entities_in_tree(scan_file_tree_parallel(root))
+                == count_entities_in_tree(build_file_tree(root))), "parallel tree differs"
+
+        for name, elapsed in best.items():
+            print(f"{name:16s} {elapsed:8.3f}s  {args.files / elapsed:12,.0f} files/s")
+        print(f"speedup          {best['build_file_tree'] / best['scan_file_tree']:8.2f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Benchmark - JAC entity extraction throughput on generated multi-MB files
+
+The previous extractor ran one regex per archetype and counted newlines in
+a copy of the text before every match, so its time grows with the square
+of the file size. It is only run up to --legacy-max-mb.
+
+Usage: python benchmarks/bench_jac_extraction.py [--sizes 1,2,4,8] [--legacy-max-mb 1]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agentic_codebase_genius.code_analyzer import CodeAnalyzer
+from agentic_codebase_genius.utils import CodeEntity, FileAnalysis, LanguageType
+
+
+def make_jac(size_bytes: int) -> str:
+    """Generate JAC source of roughly the given size"""
+    blocks = []
+    total = 0
+    i = 0
+    while total < size_bytes:
+        block = (f"node Person{i} {{\n    has name: str;\n    has age: int = {i};\n}}\n\n"
+                 f"edge Knows{i} {{}}\n\n"
+                 f"walker Greeter{i} {{\n    can greet with Person{i} entry {{\n"
+                 f"        print(here.name);\n    }}\n}}\n\n")
+        blocks.append(block)
+        total += len(block)
+        i += 1
+    return ''.join(blocks)
+
+
+def legacy_extract(content: str, file_path: str) -> list:
+    """The two-regex, prefix-counting extractor this replaced"""
+    entities = []
+    for pattern, entity_type in ((r'node\s+(\w+)', 'node'), (r'walker\s+(\w+)', 'walker')):
+        for match in re.finditer(pattern, content):
+            entities.append(CodeEntity(
+                name=match.group(1),
+                entity_type=entity_type,
+                file_path=file_path,
+                line_number=content[:match.start()].count('\n') + 1,
+                language=LanguageType.JAC,
+            ))
+    return entities
+
+
+def best_of(func, repeat: int) -> float:
+    """Best wall time of several runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default="1,2,4,8", help="file sizes in MB")
+    parser.add_argument('--legacy-max-mb', type=float, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    analyzer = CodeAnalyzer()
+    print(f"{'size MB':>8s} {'entities':>9s} {'single-scan s':>14s} {'MB/s':>8s} {'legacy s':>10s}")
+    for size_mb in (float(s) for s in args.sizes.split(',')):
+        content = make_jac(int(size_mb * 2**20))
+        analysis = FileAnalysis()
+        analyzer._extract_jac_entities(content, "bench.jac", analysis)
+        extract = analyzer._extract_jac_entities
+        elapsed = best_of(lambda: extract(content, "bench.jac", FileAnalysis()), args.repeat)
+        legacy = "skipped"
+        if size_mb <= args.legacy_max_mb:
+            legacy_entities = legacy_extract(content, "bench.jac")
+            new_lines = {(e.name, e.line_number) for e in analysis.entities}
+            assert all((e.name, e.line_number) in new_lines for e in legacy_entities)
+            legacy = f"{best_of(lambda: legacy_extract(content, 'bench.jac'), 1):10.3f}"
+        print(f"{size_mb:8.1f} {len(analysis.entities):9d} {elapsed:14.3f} "
+              f"{size_mb / elapsed:8.1f} {legacy:>10s}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
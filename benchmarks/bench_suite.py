@@ -0,0 +1,234 @@
+"""
+Benchmark - Reproducible suite over synthetic repositories, with history and regression checks
+
+Each shape (see synthetic_repo.SHAPES) is generated with a fixed seed and
+committed as a local file:// git repository. The suite times the tree walk,
+every CodeAnalyzer path (including the opt-in jaclang backend), DocGenie
+and the end-to-end supervisor in each execution mode, keeping the best of
+--repeat runs.
+
+Every run is appended to a JSON history. --compare checks the new run
+against an earlier one (the previous run by default) and exits with
+status 1 when a benchmark got slower by more than --threshold.
+
+Usage: python benchmarks/bench_suite.py [--shapes tiny,small,deep] [--repeat 3]
+       [--history benchmarks/history.json] [--compare [--baseline COMMIT]] [--threshold 0.1]
+       python benchmarks/bench_suite.py --compare-only [--baseline COMMIT]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agentic_codebase_genius.code_analyzer import CodeAnalyzer
+from agentic_codebase_genius.doc_genie import DocGenie
+from agentic_codebase_genius.parse_cache import ParseCache
+from agentic_codebase_genius.supervisor import CodeGeniusSupervisor
+from agentic_codebase_genius.utils import build_file_tree, iter_files, scan_file_tree
+from synthetic_repo import SHAPES, make_git_repo
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.json")
+
+DEFAULT_SHAPES = "tiny,small,huge_files,deep"
+
+# Benchmarks faster than this are too noisy to flag as regressions
+MIN_COMPARED_SECONDS = 0.005
+
+
+def best_of(func: Callable, repeat: int, setup: Optional[Callable] = None) -> float:
+    """Best wall time of several runs, calling setup untimed before each"""
+    best = float('inf')
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_repo(repo: str, url: str, repeat: int, work_dir: str) -> Dict[str, float]:
+    """Time every stage of the pipeline on one generated repository"""
+    results: Dict[str, float] = {}
+    tree = scan_file_tree(repo)
+
+    results['file_tree.build_file_tree'] = best_of(lambda: build_file_tree(repo), repeat)
+    results['file_tree.scan_file_tree'] = best_of(lambda: scan_file_tree(repo), repeat)
+    results['file_tree.iter_files'] = best_of(lambda: sum(1 for _ in iter_files(repo)), repeat)
+
+    results['analyzer.serial'] = best_of(
+        lambda: CodeAnalyzer().analyze_repository(tree), repeat)
+    results['analyzer.jac_parser'] = best_of(
+        lambda: CodeAnalyzer(use_jac_parser=True).analyze_repository(tree), repeat)
+    results['analyzer.parallel'] = best_of(
+        lambda: CodeAnalyzer(max_workers=0, parallel_threshold=1).analyze_repository(tree), repeat)
+    code_files = [(node.path, node.size) for node in CodeAnalyzer()._collect_code_nodes(tree)]
+    results['analyzer.streaming'] = best_of(
+        lambda: sum(1 for _ in CodeAnalyzer().iter_analyses(code_files, record=False)), repeat)
+
+    cache = ParseCache(os.path.join(work_dir, "parse_cache.sqlite"))
+    results['analyzer.cache_cold'] = best_of(
+        lambda: CodeAnalyzer(cache=cache).analyze_repository(tree), repeat, setup=cache.clear)
+    results['analyzer.cache_warm'] = best_of(
+        lambda: CodeAnalyzer(cache=cache).analyze_repository(tree), repeat)
+    cache.close()
+
+    analyzer = CodeAnalyzer()
+    data = analyzer.analyze_repository(tree)
+    data.update(repo_name="synthetic", primary_language="python",
+                import_graph=analyzer.build_import_graph(repo).to_dict())
+    results['doc_genie.generate'] = best_of(
+        lambda: DocGenie().generate_documentation(data), repeat)
+
+    for mode in ("batch", "streaming", "pipelined"):
+        supervisor = CodeGeniusSupervisor(output_dir=os.path.join(work_dir, mode),
+                                          execution_mode=mode)
+
+        def run():
+            success, message, _ = supervisor.process_repository(url)
+            assert success, message
+
+        results[f'supervisor.{mode}'] = best_of(run, repeat)
+    return results
+
+
+def run_suite(shapes: List[str], repeat: int, seed: int) -> Dict:
+    """Benchmark each shape and return one history record"""
+    record = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': source_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+        'repeat': repeat,
+        'shapes': {},
+    }
+    for name in shapes:
+        work_dir = tempfile.mkdtemp(prefix=f"bench_suite_{name}_")
+        try:
+            repo = os.path.join(work_dir, "repo")
+            url = make_git_repo(repo, SHAPES[name], seed)
+            print(f"[{name}] benchmarking {url}", flush=True)
+            results = benchmark_repo(repo, url, repeat, work_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        record['shapes'][name] = {'shape': asdict(SHAPES[name]), 'results': results}
+        for bench, seconds in results.items():
+            print(f"  {bench:28s} {seconds:9.4f}s")
+    return record
+
+
+def source_commit() -> Optional[str]:
+    """Commit of the benchmarked source tree, if it is a git checkout"""
+    result = subprocess.run(["git", "-C", os.path.dirname(os.path.abspath(__file__)),
+                             "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def load_history(path: str) -> List[Dict]:
+    """Load the recorded runs, oldest first"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def save_history(path: str, history: List[Dict]) -> None:
+    """Atomically replace the history file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def find_baseline(history: List[Dict], baseline: Optional[str]) -> Optional[Dict]:
+    """Pick the run to compare against: by commit prefix, else the one before the latest"""
+    if baseline:
+        for record in reversed(history[:-1]):
+            if (record.get('commit') or '').startswith(baseline):
+                return record
+        return None
+    return history[-2] if len(history) >= 2 else None
+
+
+def compare(old: Dict, new: Dict, threshold: float) -> List[str]:
+    """Print per-benchmark changes between two runs and return the regressions"""
+    regressions = []
+    print(f"Comparing {new.get('commit')} ({new['timestamp']}) "
+          f"against {old.get('commit')} ({old['timestamp']})")
+    for shape, entry in new['shapes'].items():
+        previous = old['shapes'].get(shape)
+        if not previous or previous['shape'] != entry['shape']:
+            print(f"[{shape}] no comparable baseline")
+            continue
+        for bench, seconds in entry['results'].items():
+            before = previous['results'].get(bench)
+            if before is None:
+                continue
+            change = (seconds - before) / before if before else 0.0
+            flag = ''
+            if change > threshold and before >= MIN_COMPARED_SECONDS:
+                flag = '  REGRESSION'
+                regressions.append(f"{shape}/{bench}: {before:.4f}s -> {seconds:.4f}s ({change:+.1%})")
+            print(f"  {shape}/{bench:28s} {before:9.4f}s -> {seconds:9.4f}s {change:+7.1%}{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shapes', default=DEFAULT_SHAPES,
+                        help=f"comma-separated shapes from: {', '.join(SHAPES)}")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--history', default=DEFAULT_HISTORY)
+    parser.add_argument('--no-record', action='store_true', help="do not append to the history")
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--compare-only', action='store_true',
+                        help="compare the latest recorded run without benchmarking")
+    parser.add_argument('--baseline', help="commit prefix of the run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10)
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    if not args.compare_only:
+        shapes = [name.strip() for name in args.shapes.split(',') if name.strip()]
+        unknown = [name for name in shapes if name not in SHAPES]
+        if unknown:
+            parser.error(f"unknown shapes: {', '.join(unknown)}")
+        history.append(run_suite(shapes, args.repeat, args.seed))
+        if not args.no_record:
+            save_history(args.history, history)
+
+    if args.compare or args.compare_only:
+        if not history:
+            print("No recorded runs to compare")
+            return 1
+        old = find_baseline(history, args.baseline)
+        if old is None:
+            print("No baseline run to compare against")
+            return 0
+        regressions = compare(old, history[-1], args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
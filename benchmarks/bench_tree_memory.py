@@ -0,0 +1,73 @@
+"""
+Benchmark - retained memory and GC cost of FileNode versus compact trees
+
+Usage: python benchmarks/bench_tree_memory.py [--files 200000]
+"""
+
+import argparse
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_file_tree import make_tree
+from agentic_codebase_genius.code_analyzer import CodeAnalyzer
+from agentic_codebase_genius.compact_tree import scan_compact_file_tree
+from agentic_codebase_genius.utils import scan_file_tree
+
+
+def measure(builder, root: str) -> dict:
+    """Build a tree and report retained bytes, build time and a full GC pass"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tree = builder(root)
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    gc.collect()
+    gc_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    code_files = len(CodeAnalyzer()._collect_code_files(tree))
+    collect_time = time.perf_counter() - start
+    return {'retained': retained, 'build': elapsed, 'gc': gc_time,
+            'collect': collect_time, 'code_files': code_files}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=200_000)
+    parser.add_argument('--fanout', type=int, default=20)
+    parser.add_argument('--files-per-dir', type=int, default=50)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_tree_mem_")
+    try:
+        print(f"Creating {args.files} files under {root}...")
+        make_tree(root, args.files, args.fanout, args.files_per_dir)
+        results = {
+            'FileNode': measure(scan_file_tree, root),
+            'compact': measure(scan_compact_file_tree, root),
+        }
+        assert results['FileNode']['code_files'] == results['compact']['code_files']
+        print(f"{'tree':10s} {'retained MiB':>13s} {'build s':>9s} {'gc s':>8s} {'collect s':>10s}")
+        for name, r in results.items():
+            print(f"{name:10s} {r['retained'] / 2**20:13.1f} {r['build']:9.3f} "
+                  f"{r['gc']:8.3f} {r['collect']:10.3f}")
+        ratio = results['FileNode']['retained'] / results['compact']['retained']
+        print(f"compact tree uses 1/{ratio:.1f} of the FileNode memory")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
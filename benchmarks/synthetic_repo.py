@@ -0,0 +1,175 @@
+"""
+Synthetic repositories of configurable shape for the benchmark suite
+
+The same shape and seed always produce the same files and, through fixed
+author and committer dates, the same commit SHA.
+
+Usage: python benchmarks/synthetic_repo.py DEST [--shape medium] [--seed 0]
+"""
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, List
+
+GIT_ENV = {
+    'GIT_AUTHOR_NAME': 'bench', 'GIT_AUTHOR_EMAIL': 'bench@example.com',
+    'GIT_AUTHOR_DATE': '2024-01-01T00:00:00Z',
+    'GIT_COMMITTER_NAME': 'bench', 'GIT_COMMITTER_EMAIL': 'bench@example.com',
+    'GIT_COMMITTER_DATE': '2024-01-01T00:00:00Z',
+}
+
+
+@dataclass(frozen=True)
+class RepoShape:
+    """Layout and content mix of a generated repository"""
+    files: int = 200
+    depth: int = 3
+    fanout: int = 4
+    jac_ratio: float = 0.2
+    other_ratio: float = 0.1
+    min_functions: int = 2
+    max_functions: int = 12
+    huge_files: int = 0
+    huge_file_kb: int = 2048
+    deep_chain: int = 0
+
+
+SHAPES: Dict[str, RepoShape] = {
+    'tiny': RepoShape(files=20, depth=2, fanout=2),
+    'small': RepoShape(files=200),
+    'medium': RepoShape(files=2000, depth=4, fanout=5),
+    'wide': RepoShape(files=2000, depth=1, fanout=200, max_functions=4),
+    # Pathological cases: a few multi-MB files, and nesting past the walk depth limit
+    'huge_files': RepoShape(files=50, huge_files=3, huge_file_kb=4096),
+    'deep': RepoShape(files=200, depth=2, fanout=2, deep_chain=40),
+}
+
+
+def _directories(shape: RepoShape) -> List[str]:
+    """Relative directories of the tree, in breadth-first order"""
+    directories = ['']
+    level = ['']
+    for depth in range(shape.depth):
+        level = [os.path.join(parent, f"pkg{depth}_{i}") for parent in level
+                 for i in range(shape.fanout)]
+        directories.extend(level)
+    return directories
+
+
+def _python_module(index: int, functions: int, modules: List[str], rng: random.Random) -> str:
+    """Python source with a class, functions and imports of sibling modules"""
+    lines = [f'"""Generated module {index}"""', "", "import os"]
+    for name in rng.sample(modules, min(3, len(modules))):
+        lines.append(f"import {name}")
+    lines += ["", "", f"class Service{index}:", f'    """Service {index}"""', ""]
+    for i in range(functions // 2):
+        lines += [f"    def method_{i}(self, value):", f'        """Method {i}"""',
+                  f"        return helper_{i}(value) + {i}", ""]
+    lines.append("")
+    for i in range(functions - functions // 2):
+        lines += [f"def helper_{i}(value):", f'    """Helper {i}"""',
+                  f"    return os.path.join(str(value), 'part{i}')", "", ""]
+    return "\n".join(lines)
+
+
+def _jac_module(index: int, functions: int) -> str:
+    """JAC source with nodes, an edge and a walker"""
+    lines = [f"node Item{index} {{", "    has name: str;", "}", "",
+             f"edge Link{index} {{}}", "", f"walker Visit{index} {{"]
+    for i in range(functions):
+        lines += [f"    can step_{i} with Item{index} entry {{", "        report here.name;", "    }"]
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def _other_file(index: int) -> str:
+    """Non-code content such as configuration"""
+    return '{"id": %d, "items": [%s]}\n' % (index, ", ".join(str(i) for i in range(index % 50)))
+
+
+def generate_repo(root: str, shape: RepoShape, seed: int = 0) -> Dict:
+    """Write a repository of the given shape under root and return what was written"""
+    rng = random.Random(seed)
+    directories = _directories(shape)
+    modules = [f"module_{i}" for i in range(shape.files)]
+    written = {'files': 0, 'bytes': 0, 'python': 0, 'jac': 0, 'other': 0}
+
+    def write(rel_path: str, content: str, kind: str) -> None:
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        written['files'] += 1
+        written['bytes'] += len(content)
+        written[kind] += 1
+
+    write("README.md", "# Synthetic repository\n\nGenerated for benchmarking.\n", 'other')
+    write("main.py", '"""Entry point"""\n\nimport module_0\n', 'python')
+    for i in range(shape.files):
+        directory = directories[i % len(directories)]
+        functions = rng.randint(shape.min_functions, shape.max_functions)
+        roll = rng.random()
+        if roll < shape.other_ratio:
+            write(os.path.join(directory, f"data_{i}.json"), _other_file(i), 'other')
+        elif roll < shape.other_ratio + shape.jac_ratio:
+            write(os.path.join(directory, f"graph_{i}.jac"), _jac_module(i, functions), 'jac')
+        else:
+            write(os.path.join(directory, f"module_{i}.py"),
+                  _python_module(i, functions, modules, rng), 'python')
+
+    for i in range(shape.huge_files):
+        blocks, size, j = [], 0, 0
+        while size < shape.huge_file_kb * 1024:
+            block = _python_module(j, 8, modules, rng)
+            blocks.append(block.replace("class Service", f"class Huge{i}_Service"))
+            size += len(block)
+            j += 1
+        write(os.path.join("huge", f"huge_{i}.py"), "\n".join(blocks), 'python')
+
+    if shape.deep_chain:
+        chain = os.path.join("deep", *[f"level{i}" for i in range(shape.deep_chain)])
+        for i in range(3):
+            write(os.path.join(chain, f"leaf_{i}.py"), _python_module(i, 2, modules, rng), 'python')
+    return written
+
+
+def make_git_repo(root: str, shape: RepoShape, seed: int = 0) -> str:
+    """Generate a repository, commit it reproducibly and return its file:// URL"""
+    generate_repo(root, shape, seed)
+    env = {**os.environ, **GIT_ENV}
+    for args in (["init", "-q"], ["add", "-A"], ["commit", "-q", "-m", "synthetic"]):
+        subprocess.run(["git", "-C", root, *args], check=True, capture_output=True, env=env)
+    return "file://" + os.path.abspath(root)
+
+
+def shape_from_args(name: str, overrides: Dict) -> RepoShape:
+    """Start from a named shape and replace the fields that were given"""
+    return replace(SHAPES[name], **{key: value for key, value in overrides.items()
+                                    if value is not None})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('dest')
+    parser.add_argument('--shape', choices=sorted(SHAPES), default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--files', type=int)
+    parser.add_argument('--no-git', action='store_true')
+    args = parser.parse_args()
+
+    shape = shape_from_args(args.shape, {'files': args.files})
+    if args.no_git:
+        written = generate_repo(args.dest, shape, args.seed)
+        print(written)
+    else:
+        print(make_git_repo(args.dest, shape, args.seed))
+    print(asdict(shape))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())